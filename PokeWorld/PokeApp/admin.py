@@ -1,6 +1,12 @@
 from django.contrib import admin
 from .models import Pokemon, Favorite
 
+
+@admin.register(Pokemon)
+class PokemonAdmin(admin.ModelAdmin):
+    # Maintained by the favorite writes; shown, never edited
+    readonly_fields = ('favorite_count',)
+
+
 # Register your models here.
-admin.site.register(Pokemon)
 admin.site.register(Favorite)
@@ -0,0 +1,296 @@
+"""Read-only, columnar NumPy snapshot of the Pokémon table for analytics.
+
+The snapshot holds one row per Pokémon ordered by id: an int16 matrix of the
+six base stats plus int8 codes for both type slots. Ranking, percentile and
+distribution questions become vectorised operations over those arrays instead
+of ORM queries.
+
+A snapshot is tagged with the dataset version it was built from and replaced
+as soon as that version moves on. Its arrays are flagged read-only, so a
+snapshot built before a pre-forking server forks its workers stays in pages
+shared copy-on-write between all of them.
+"""
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+
+from . import dataset
+from .constants import STAT_FIELDS, TYPE_COLORS
+from .models import Pokemon
+
+# Type codes follow TYPE_COLORS; types missing from it get codes after these
+TYPES = tuple(t.lower() for t in TYPE_COLORS)
+NO_TYPE = -1
+TOTAL = 'total'
+METRICS = STAT_FIELDS + [TOTAL]
+PERCENTILES = (10, 25, 50, 75, 90)
+
+TYPE_STATS_KEY = "pokeapp:type-stats:{version}"
+TYPE_STATS_LATEST_KEY = "pokeapp:type-stats:latest"
+TYPE_STATS_LOCK_KEY = "pokeapp:type-stats-lock:{version}"
+TYPE_STATS_TIMEOUT = 24 * 60 * 60
+# How long one worker may hold the recompute lock before another may try
+TYPE_STATS_LOCK_TIMEOUT = 60
+
+
+class StatSnapshot:
+    """Columnar view of every Pokémon at one dataset version."""
+
+    def __init__(self, version, ids, names, slugs, image_urls, stats, type1, type2, types=TYPES):
+        self.version = version
+        self.ids = self._freeze(np.asarray(ids, dtype=np.int64))
+        self.names = self._freeze(np.asarray(names, dtype=object))
+        self.slugs = self._freeze(np.asarray(slugs, dtype=object))
+        self.image_urls = self._freeze(np.asarray(image_urls, dtype=object))
+        self.stats = self._freeze(np.asarray(stats, dtype=np.int16).reshape(-1, len(STAT_FIELDS)))
+        self.totals = self._freeze(self.stats.sum(axis=1, dtype=np.int32))
+        self.type1 = self._freeze(np.asarray(type1, dtype=np.int8))
+        self.type2 = self._freeze(np.asarray(type2, dtype=np.int8))
+        self.types = tuple(types)
+        self._slug_rows = {slug: i for i, slug in enumerate(slugs)}
+
+    @staticmethod
+    def _freeze(array):
+        array.flags.writeable = False
+        return array
+
+    @classmethod
+    def from_rows(cls, rows, version=None):
+        """Build from ``(id, name, slug, image_url, type1, type2, *stats)`` tuples sorted by id."""
+        types = list(TYPES)
+        codes = {t: i for i, t in enumerate(types)}
+
+        def code(pokemon_type):
+            if not pokemon_type:
+                return NO_TYPE
+            pokemon_type = pokemon_type.lower()
+            if pokemon_type not in codes:
+                codes[pokemon_type] = len(types)
+                types.append(pokemon_type)
+            return codes[pokemon_type]
+
+        ids, names, slugs, image_urls, type1, type2, stats = [], [], [], [], [], [], []
+        for pokemon_id, name, slug, image_url, t1, t2, *values in rows:
+            ids.append(pokemon_id)
+            names.append(name)
+            slugs.append(slug)
+            image_urls.append(image_url)
+            type1.append(code(t1))
+            type2.append(code(t2))
+            stats.append(values)
+        return cls(version, ids, names, slugs, image_urls, stats, type1, type2, types)
+
+    @classmethod
+    def from_database(cls, version=None):
+        rows = Pokemon.objects.order_by('id').values_list(
+            'id', 'name', 'slug', 'image_url', 'type1', 'type2', *STAT_FIELDS
+        )
+        return cls.from_rows(rows.iterator(chunk_size=2000), version)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row(self, pokemon_id):
+        """Row index of ``pokemon_id``, or ``None`` if it is not in the snapshot."""
+        i = int(np.searchsorted(self.ids, pokemon_id))
+        if i < len(self.ids) and self.ids[i] == pokemon_id:
+            return i
+        return None
+
+    def row_for_slug(self, slug):
+        return self._slug_rows.get(slug)
+
+    def type_names(self, row):
+        """``(type1, type2)`` of ``row``; ``type2`` is ``None`` for single-type Pokémon."""
+        type2 = self.type2[row]
+        return self.types[self.type1[row]], (self.types[type2] if type2 != NO_TYPE else None)
+
+    def column(self, metric):
+        if metric == TOTAL:
+            return self.totals
+        try:
+            return self.stats[:, STAT_FIELDS.index(metric)]
+        except ValueError:
+            raise ValueError(f"Unknown stat: {metric}")
+
+    def type_mask(self, pokemon_type):
+        """Boolean mask of Pokémon having ``pokemon_type`` in either slot."""
+        try:
+            code = self.types.index(pokemon_type.lower())
+        except ValueError:
+            return np.zeros(len(self), dtype=bool)
+        return (self.type1 == code) | (self.type2 == code)
+
+    def top(self, metric='total', n=10, pokemon_type=None):
+        """Return the ``n`` highest rows for ``metric`` as ``(id, name, slug, value)``."""
+        values = self.column(metric)
+        rows = np.flatnonzero(self.type_mask(pokemon_type)) if pokemon_type else np.arange(len(self))
+        if n <= 0 or not len(rows):
+            return []
+        n = min(n, len(rows))
+        candidates = rows[np.argpartition(-values[rows], n - 1)[:n]]
+        # Highest value first, lowest id among ties
+        ranked = candidates[np.lexsort((self.ids[candidates], -values[candidates]))]
+        return [(int(self.ids[i]), self.names[i], self.slugs[i], int(values[i])) for i in ranked]
+
+    def percentile_in_type(self, pokemon_id, pokemon_type, metric='total'):
+        """Percentage of *other* ``pokemon_type`` Pokémon with a lower ``metric``.
+
+        Returns ``None`` when the Pokémon is unknown or is the only one of its type.
+        """
+        i = self.row(pokemon_id)
+        if i is None:
+            return None
+        mask = self.type_mask(pokemon_type)
+        mask_others = mask.copy()
+        mask_others[i] = False
+        others = self.column(metric)[mask_others]
+        if not len(others):
+            return None
+        return 100.0 * np.count_nonzero(others < self.column(metric)[i]) / len(others)
+
+    def type_percentiles(self, pokemon_id, metric='total'):
+        """``[(type, percent), ...]`` for each of the Pokémon's own types."""
+        i = self.row(pokemon_id)
+        if i is None:
+            return []
+        ranks = []
+        for code in (self.type1[i], self.type2[i]):
+            if code == NO_TYPE:
+                continue
+            percent = self.percentile_in_type(pokemon_id, self.types[code], metric)
+            if percent is not None:
+                ranks.append((self.types[code], percent))
+        return ranks
+
+    def distribution(self, metric='total', bins=10, pokemon_type=None):
+        """Histogram and summary statistics for ``metric``."""
+        values = self.column(metric)
+        if pokemon_type:
+            values = values[self.type_mask(pokemon_type)]
+        if not len(values):
+            return {'count': 0, 'counts': [], 'edges': []}
+        counts, edges = np.histogram(values, bins=bins)
+        p25, median, p75 = np.percentile(values, [25, 50, 75])
+        return {
+            'count': int(len(values)),
+            'min': int(values.min()),
+            'max': int(values.max()),
+            'mean': float(values.mean()),
+            'median': float(median),
+            'p25': float(p25),
+            'p75': float(p75),
+            'counts': counts.tolist(),
+            'edges': edges.tolist(),
+        }
+
+    def type_statistics(self):
+        """Per-type summaries of every stat and the type-pair co-occurrence matrix.
+
+        A dual-type Pokémon counts towards both of its types. Diagonal cells of
+        the co-occurrence matrix count single-type Pokémon.
+        """
+        values = np.column_stack((self.stats, self.totals))
+        dual = self.type2 != NO_TYPE
+        # One row per (type, Pokémon) membership, grouped by type with a single sort
+        codes = np.concatenate((self.type1, self.type2[dual])).astype(np.intp)
+        members = np.concatenate((values, values[dual]))
+        order = np.argsort(codes, kind='stable')
+        codes, members = codes[order], members[order]
+        bounds = np.searchsorted(codes, np.arange(len(self.types) + 1))
+
+        stats = {}
+        for code, pokemon_type in enumerate(self.types):
+            group = members[bounds[code]:bounds[code + 1]]
+            summary = {'count': int(len(group))}
+            if len(group):
+                percentiles = np.percentile(group, PERCENTILES, axis=0)
+                means, lows, highs = group.mean(axis=0), group.min(axis=0), group.max(axis=0)
+                for i, metric in enumerate(METRICS):
+                    summary[metric] = {
+                        'mean': round(float(means[i]), 2),
+                        'min': int(lows[i]),
+                        'max': int(highs[i]),
+                        **{f"p{q}": float(percentiles[j, i]) for j, q in enumerate(PERCENTILES)},
+                    }
+                    summary[metric]['median'] = summary[metric]['p50']
+            stats[pokemon_type] = summary
+
+        pairs = np.zeros((len(self.types), len(self.types)), dtype=np.int64)
+        np.add.at(pairs, (self.type1[dual], self.type2[dual]), 1)
+        pairs += pairs.T
+        np.add.at(pairs, (self.type1[~dual], self.type1[~dual]), 1)
+        return {
+            'version': self.version,
+            'count': len(self),
+            'types': list(self.types),
+            'stats': stats,
+            'co_occurrence': pairs.tolist(),
+        }
+
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+def get_snapshot():
+    """Return the process-wide snapshot, rebuilding it if the dataset has changed."""
+    global _snapshot
+    version = dataset.get_version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = StatSnapshot.from_database(version)
+        return _snapshot
+
+
+def reset_snapshot():
+    global _snapshot
+    with _lock:
+        _snapshot = None
+
+
+def warm_snapshot():
+    """Build the snapshot while a worker starts (before forking, when preloaded)."""
+    try:
+        get_snapshot()
+    except DatabaseError:
+        # Tables may not exist yet (e.g. before the first migrate); build lazily later
+        pass
+    finally:
+        connection.close()
+
+
+def refresh_type_stats():
+    """Recompute the per-type statistics and store them for the current dataset version."""
+    stats = get_snapshot().type_statistics()
+    cache.set(
+        TYPE_STATS_KEY.format(version=stats['version']), stats,
+        getattr(settings, 'POKEMON_TYPE_STATS_CACHE_TIMEOUT', TYPE_STATS_TIMEOUT),
+    )
+    cache.set(TYPE_STATS_LATEST_KEY, stats, None)
+    return stats
+
+
+def get_type_stats():
+    """Return the cached per-type statistics, recomputing at most once per dataset version.
+
+    While one worker recomputes after a change, the others keep answering with
+    the previous result (its ``version`` tells them apart), so polling clients
+    never pile up recomputes.
+    """
+    version = dataset.get_version()
+    stats = cache.get(TYPE_STATS_KEY.format(version=version))
+    if stats is not None:
+        return stats
+    if not cache.add(TYPE_STATS_LOCK_KEY.format(version=version), True, TYPE_STATS_LOCK_TIMEOUT):
+        stats = cache.get(TYPE_STATS_LATEST_KEY)
+        if stats is not None:
+            return stats
+    return refresh_type_stats()
+
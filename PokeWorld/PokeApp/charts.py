@@ -0,0 +1,153 @@
+import glob
+import hashlib
+import json
+import os
+
+from django.conf import settings
+
+from .constants import CHART_COLORS, STAT_FIELDS
+
+# Bump this whenever the chart drawing code changes so old files get a new key
+CHART_STYLE_VERSION = 1
+
+CHART_SUBDIR = 'pokemon_charts'
+CHART_KINDS = ('radar', 'bar')
+DEFAULT_CHART_COLOR = "#6b7280"
+
+# Total size of the chart directory before the oldest files get evicted
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+def chart_spec(pokemon):
+    """Collect everything that affects how a Pokémon's charts look."""
+    color1 = CHART_COLORS.get((pokemon.type1 or "").capitalize(), DEFAULT_CHART_COLOR)
+    color2 = None
+    if pokemon.type2:
+        color2 = CHART_COLORS.get(pokemon.type2.capitalize(), DEFAULT_CHART_COLOR)
+    spec = {
+        'name': pokemon.name,
+        'slug': pokemon.slug,
+        'values': [getattr(pokemon, field) for field in STAT_FIELDS],
+        'color1': color1,
+        'color2': color2,
+    }
+    spec['key'] = chart_key(spec)
+    return spec
+
+
+def chart_key(spec):
+    """Content hash of a chart spec; equal specs always map to the same files."""
+    payload = json.dumps(
+        [CHART_STYLE_VERSION, spec['name'], spec['values'], spec['color1'], spec['color2']],
+        separators=(',', ':'),
+    )
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def chart_dir():
+    return os.path.join(settings.MEDIA_ROOT, CHART_SUBDIR)
+
+
+def chart_filename(kind, spec):
+    return f"{kind}_{spec['slug']}_{spec['key']}.png"
+
+
+def chart_path(kind, spec, directory=None):
+    return os.path.join(directory or chart_dir(), chart_filename(kind, spec))
+
+
+def chart_url(kind, spec):
+    return f"{settings.MEDIA_URL}{CHART_SUBDIR}/{chart_filename(kind, spec)}"
+
+
+def charts_exist(spec, directory=None):
+    return all(os.path.exists(chart_path(kind, spec, directory)) for kind in CHART_KINDS)
+
+
+def ensure_charts(spec):
+    """Render the charts for ``spec`` unless the store already has them.
+
+    Returns ``True`` when new files were written.
+    """
+    if charts_exist(spec):
+        return False
+    directory = chart_dir()
+    render_png_charts(spec, directory)
+    evict(directory, getattr(settings, 'POKEMON_CHART_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+    return True
+
+
+def render_png_charts(spec, directory):
+    """Draw the radar and bar charts for ``spec`` into ``directory``."""
+    # pandas/matplotlib/seaborn are only loaded once a PNG actually has to be drawn
+    from . import pngcharts
+    pngcharts.render(spec, directory)
+
+
+def evict(directory, max_bytes):
+    """Delete the oldest chart files until the directory fits in ``max_bytes``."""
+    entries = []
+    total = 0
+    with os.scandir(directory) as it:
+        for entry in it:
+            if not entry.is_file() or not entry.name.endswith('.png'):
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+    if total <= max_bytes:
+        return 0
+
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
+
+
+def invalidate(slug, keep_key=None):
+    """Remove stored charts for ``slug``, except the ones for ``keep_key``."""
+    removed = 0
+    key_pattern = '[0-9a-f]' * 16
+    for kind in CHART_KINDS:
+        pattern = os.path.join(glob.escape(chart_dir()), f"{kind}_{glob.escape(slug)}_{key_pattern}.png")
+        for path in glob.glob(pattern):
+            if keep_key and path.endswith(f"_{keep_key}.png"):
+                continue
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+def invalidate_many(keep_keys):
+    """``invalidate`` for many Pokémon in one directory scan.
+
+    ``keep_keys`` maps each slug to the chart key to keep (or ``None``).
+    """
+    try:
+        names = os.listdir(chart_dir())
+    except FileNotFoundError:
+        return 0
+    removed = 0
+    for name in names:
+        stem, ext = os.path.splitext(name)
+        kind, _, rest = stem.partition('_')
+        slug, _, key = rest.rpartition('_')
+        if ext != '.png' or kind not in CHART_KINDS or slug not in keep_keys or key == keep_keys[slug]:
+            continue
+        try:
+            os.remove(os.path.join(chart_dir(), name))
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
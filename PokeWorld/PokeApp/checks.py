@@ -0,0 +1,25 @@
+"""System checks for settings the app relies on."""
+from django.conf import settings
+from django.core import checks
+
+# Backends whose entries only exist inside the process that wrote them
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [checks.Warning(
+        f"The default cache ({backend}) is not shared between processes.",
+        hint=(
+            "Favorite bitmaps and the dataset version are invalidated through the cache, so other "
+            "workers and management commands would not see each other's changes. Use a file, "
+            "Redis or Memcached cache."
+        ),
+        id='PokeApp.W001',
+    )]
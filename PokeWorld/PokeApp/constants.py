@@ -0,0 +1,67 @@
+# Color constants
+TYPE_COLORS = {
+    "Grass": "text-green-600",
+    "Poison": "text-purple-600",
+    "Fire": "text-red-500",
+    "Water": "text-blue-500",
+    "Electric": "text-yellow-400",
+    "Ice": "text-cyan-400",
+    "Fighting": "text-orange-600",
+    "Ground": "text-yellow-700",
+    "Flying": "text-indigo-400",
+    "Psychic": "text-pink-500",
+    "Bug": "text-lime-500",
+    "Rock": "text-gray-500",
+    "Ghost": "text-purple-800",
+    "Dragon": "text-indigo-800",
+    "Dark": "text-gray-800",
+    "Steel": "text-gray-400",
+    "Fairy": "text-pink-300",
+    "Normal": "text-gray-700"
+}
+
+TYPE_BG_COLORS = {
+    "Grass": "bg-green-500",
+    "Poison": "bg-purple-500",
+    "Fire": "bg-red-500",
+    "Water": "bg-blue-500",
+    "Electric": "bg-yellow-400",
+    "Ice": "bg-cyan-400",
+    "Fighting": "bg-orange-500",
+    "Ground": "bg-yellow-600",
+    "Flying": "bg-indigo-400",
+    "Psychic": "bg-pink-500",
+    "Bug": "bg-lime-500",
+    "Rock": "bg-gray-500",
+    "Ghost": "bg-purple-600",
+    "Dragon": "bg-indigo-600",
+    "Dark": "bg-gray-700",
+    "Steel": "bg-gray-400",
+    "Fairy": "bg-pink-300",
+    "Normal": "bg-gray-500"
+}
+
+CHART_COLORS = {
+    "Grass": "#10b981",      # green-500
+    "Poison": "#8b5cf6",     # purple-500
+    "Fire": "#ef4444",       # red-500
+    "Water": "#3b82f6",      # blue-500
+    "Electric": "#facc15",   # yellow-400
+    "Ice": "#22d3ee",        # cyan-400
+    "Fighting": "#f97316",   # orange-500
+    "Ground": "#ca8a04",     # yellow-600
+    "Flying": "#818cf8",     # indigo-400
+    "Psychic": "#ec4899",    # pink-500
+    "Bug": "#84cc16",        # lime-500
+    "Rock": "#6b7280",       # gray-500
+    "Ghost": "#9333ea",      # purple-600
+    "Dragon": "#6366f1",     # indigo-600
+    "Dark": "#374151",       # gray-700
+    "Steel": "#9ca3af",      # gray-400
+    "Fairy": "#f9a8d4",      # pink-300
+    "Normal": "#6b7280"      # gray-500
+}
+
+# Stat order used by every chart and stat table
+STAT_FIELDS = ['hp', 'attack', 'defense', 'sp_attack', 'sp_defense', 'speed']
+STAT_LABELS = ['HP', 'Attack', 'Defense', 'Sp. Atk', 'Sp. Def', 'Speed']
@@ -0,0 +1,34 @@
+"""A version counter for the Pokémon table.
+
+Derived in-memory structures (the analytics snapshot, cached aggregates) are
+tagged with the version they were built from and rebuilt once it moves on.
+The counter lives in the Django cache, which must be shared by every process
+(see ``CACHES`` and the ``PokeApp.W001`` check): a management command bumps it
+in its own process and the web workers only notice through that cache. It is
+bumped from the Pokemon signals and by bulk loaders that bypass them.
+"""
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = "pokeapp:dataset-version"
+
+
+def get_version():
+    """Return the current dataset version."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock rather than 1, so a counter that was evicted or
+        # flushed can never come back as a version some worker already built from
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """Mark every structure derived from the Pokémon table as stale."""
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        # The key is missing; seeding it is already a new version
+        return get_version()
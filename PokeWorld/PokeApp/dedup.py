@@ -0,0 +1,128 @@
+"""Set-based removal of duplicate Pokémon.
+
+Rows whose names only differ by case are duplicates, the same key as the
+``pokemon_name_ci_unique`` constraint. The constraint keeps new duplicates
+out; this cleans up tables where it is missing, such as copies loaded with raw
+SQL or databases whose constraint was dropped. ``collapse_duplicates`` keeps
+the lowest id of every group. It works in one transaction with a fixed
+number of statements, however many rows are involved:
+
+1. a temporary ``dup_id -> keep_id`` mapping is filled with a window function,
+2. every favorite of a group is ranked per user (oldest first); the first one
+   is kept (moved onto the kept Pokémon if needed) and the rest are merged away,
+   so ``Favorite``'s ``unique_together`` is never violated,
+3. the duplicates are deleted and the kept rows' ``favorite_count`` recounted.
+
+Raw statements skip the model signals, so the derived data they maintain is
+refreshed once after commit.
+"""
+from collections import namedtuple
+
+from django.db import connection, transaction
+
+from . import charts, dataset, search
+from .favorites import invalidate_favorite_ids
+from .models import Favorite, Pokemon
+
+MAP_TABLE = 'pokeapp_dedup_map'
+PLAN_TABLE = 'pokeapp_dedup_favorites'
+EXAMPLE_GROUPS = 10
+
+DedupReport = namedtuple('DedupReport', 'groups pokemons favorites_moved favorites_merged examples')
+
+
+def _statements():
+    qn = connection.ops.quote_name
+    pokemon, favorite = qn(Pokemon._meta.db_table), qn(Favorite._meta.db_table)
+    return {
+        'drop': [f'DROP TABLE IF EXISTS {PLAN_TABLE}', f'DROP TABLE IF EXISTS {MAP_TABLE}'],
+        'create': [
+            f'CREATE TEMPORARY TABLE {MAP_TABLE} (dup_id bigint PRIMARY KEY, keep_id bigint NOT NULL)',
+            f'CREATE TEMPORARY TABLE {PLAN_TABLE} ('
+            f'favorite_id bigint PRIMARY KEY, pokemon_id bigint NOT NULL, target_id bigint NOT NULL, '
+            f'user_id bigint NOT NULL, seq bigint NOT NULL)',
+        ],
+        'map': (
+            f'INSERT INTO {MAP_TABLE} (dup_id, keep_id) '
+            f'SELECT id, keep_id FROM ('
+            f'SELECT id, MIN(id) OVER (PARTITION BY LOWER(name)) AS keep_id FROM {pokemon}'
+            f') grouped WHERE id <> keep_id'
+        ),
+        # Every favorite on a kept or duplicate row, ranked per user and group
+        'plan': (
+            f'INSERT INTO {PLAN_TABLE} (favorite_id, pokemon_id, target_id, user_id, seq) '
+            f'SELECT id, pokemon_id, target_id, user_id, '
+            f'ROW_NUMBER() OVER (PARTITION BY user_id, target_id ORDER BY created_at, id) FROM ('
+            f'SELECT f.id, f.pokemon_id, f.user_id, f.created_at, COALESCE(m.keep_id, f.pokemon_id) AS target_id '
+            f'FROM {favorite} f LEFT JOIN {MAP_TABLE} m ON m.dup_id = f.pokemon_id '
+            f'WHERE f.pokemon_id IN (SELECT dup_id FROM {MAP_TABLE}) '
+            f'OR f.pokemon_id IN (SELECT keep_id FROM {MAP_TABLE})'
+            f') favorites'
+        ),
+        'report': (
+            f'SELECT (SELECT COUNT(DISTINCT keep_id) FROM {MAP_TABLE}), (SELECT COUNT(*) FROM {MAP_TABLE}), '
+            f'(SELECT COUNT(*) FROM {PLAN_TABLE} WHERE seq = 1 AND pokemon_id <> target_id), '
+            f'(SELECT COUNT(*) FROM {PLAN_TABLE} WHERE seq > 1)'
+        ),
+        'examples': (
+            f'SELECT p.name, COUNT(*) + 1 AS copies FROM {MAP_TABLE} m JOIN {pokemon} p ON p.id = m.keep_id '
+            f'GROUP BY p.id, p.name ORDER BY copies DESC, p.name LIMIT {EXAMPLE_GROUPS}'
+        ),
+        'affected': (
+            f'SELECT DISTINCT user_id FROM {PLAN_TABLE} WHERE seq > 1 OR pokemon_id <> target_id'
+        ),
+        'slugs': f'SELECT slug FROM {pokemon} WHERE id IN (SELECT dup_id FROM {MAP_TABLE})',
+        'apply': [
+            f'DELETE FROM {favorite} WHERE id IN (SELECT favorite_id FROM {PLAN_TABLE} WHERE seq > 1)',
+            f'UPDATE {favorite} SET pokemon_id = ('
+            f'SELECT target_id FROM {PLAN_TABLE} WHERE favorite_id = {favorite}.id'
+            f') WHERE id IN (SELECT favorite_id FROM {PLAN_TABLE} WHERE seq = 1 AND pokemon_id <> target_id)',
+            f'DELETE FROM {pokemon} WHERE id IN (SELECT dup_id FROM {MAP_TABLE})',
+            # The kept rows now hold every favorite of their group
+            f'UPDATE {pokemon} SET favorite_count = ('
+            f'SELECT COUNT(*) FROM {favorite} WHERE {favorite}.pokemon_id = {pokemon}.id'
+            f') WHERE id IN (SELECT keep_id FROM {MAP_TABLE})',
+        ],
+    }
+
+
+def collapse_duplicates(dry_run=False):
+    """Merge every group of case-insensitive duplicate names into its lowest id.
+
+    Returns a ``DedupReport``; with ``dry_run`` nothing is changed.
+    """
+    sql = _statements()
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Temporary tables created in this transaction vanish with it if anything fails
+        for statement in sql['drop'] + sql['create']:
+            cursor.execute(statement)
+        cursor.execute(sql['map'])
+        cursor.execute(sql['plan'])
+        cursor.execute(sql['report'])
+        groups, pokemons, moved, merged = cursor.fetchone()
+        examples = []
+        if groups:
+            cursor.execute(sql['examples'])
+            examples = cursor.fetchall()
+        report = DedupReport(groups, pokemons, moved, merged, examples)
+
+        if pokemons and not dry_run:
+            cursor.execute(sql['affected'])
+            user_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute(sql['slugs'])
+            slugs = [row[0] for row in cursor.fetchall()]
+            for statement in sql['apply']:
+                cursor.execute(statement)
+            transaction.on_commit(lambda: _refresh_derived_data(user_ids, slugs))
+        for statement in sql['drop']:
+            cursor.execute(statement)
+    return report
+
+
+def _refresh_derived_data(user_ids, slugs):
+    # What the post_delete handlers would have done, once for the whole cleanup
+    charts.invalidate_many(dict.fromkeys(slugs))
+    search.reset_search_index()
+    dataset.bump_version()
+    for user_id in user_ids:
+        invalidate_favorite_ids(user_id)
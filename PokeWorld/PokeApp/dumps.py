@@ -0,0 +1,201 @@
+"""Columnar ``.npz`` snapshots of the Pokédex for seeding and restores.
+
+A dump stores one array per ``Pokemon`` column (stats as a single int16
+matrix) and, optionally, the favorites as user names, Pokémon ids and
+timestamps. Everything is plain NumPy data, so it loads with
+``allow_pickle=False``. Loading writes the rows back with batched
+``bulk_create`` inside one transaction, keeping the original ids so favorites
+still point at the right Pokémon. Favorites go in through a plain INSERT so
+they keep their dumped ``created_at``.
+"""
+from datetime import timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import dataset, search
+from .constants import STAT_FIELDS
+from .favorites import invalidate_favorite_ids, reconcile_favorite_counts
+from .models import Favorite, Pokemon, normalize_type
+
+FORMAT_VERSION = 1
+DEFAULT_BATCH_SIZE = 2000
+_TEXT_FIELDS = ('name', 'slug', 'type1', 'type2', 'image_url')
+_NULLABLE_FIELDS = ('type2', 'image_url')
+
+
+class DumpError(ValueError):
+    pass
+
+
+def _text_array(values):
+    # Fixed-width unicode keeps the archive free of pickled object arrays
+    return np.array([value or '' for value in values], dtype=str)
+
+
+def dump_pokedex(path, with_favorites=False):
+    """Write every Pokémon (and optionally every favorite) to ``path``; return the counts."""
+    ids, stats = [], []
+    text = {field: [] for field in _TEXT_FIELDS}
+    rows = Pokemon.objects.order_by('id').values_list('id', *_TEXT_FIELDS, *STAT_FIELDS)
+    for pokemon_id, *values in rows.iterator(chunk_size=DEFAULT_BATCH_SIZE):
+        ids.append(pokemon_id)
+        for field, value in zip(_TEXT_FIELDS, values):
+            text[field].append(value)
+        stats.append(values[len(_TEXT_FIELDS):])
+
+    arrays = {
+        'format_version': np.array([FORMAT_VERSION]),
+        'pokemon_id': np.array(ids, dtype=np.int64),
+        'pokemon_stats': np.array(stats, dtype=np.int16).reshape(-1, len(STAT_FIELDS)),
+    }
+    for field, values in text.items():
+        arrays[f'pokemon_{field}'] = _text_array(values)
+        if field in _NULLABLE_FIELDS:
+            arrays[f'pokemon_{field}_null'] = np.array([value is None for value in values], dtype=bool)
+
+    favorite_count = 0
+    if with_favorites:
+        favorites = list(
+            Favorite.objects.order_by('id')
+            .values_list('user__username', 'pokemon_id', 'created_at')
+            .iterator(chunk_size=DEFAULT_BATCH_SIZE)
+        )
+        users, pokemon_ids, created = zip(*favorites) if favorites else ((), (), ())
+        arrays['favorite_user'] = _text_array(users)
+        arrays['favorite_pokemon_id'] = np.array(pokemon_ids, dtype=np.int64)
+        # Stored as naive UTC; datetime64 has no time zones
+        arrays['favorite_created_at'] = np.array(
+            [timezone.make_naive(value, dt_timezone.utc) if timezone.is_aware(value) else value for value in created],
+            dtype='datetime64[us]',
+        ).reshape(-1)
+        favorite_count = len(favorites)
+
+    with open(path, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+    return len(arrays['pokemon_id']), favorite_count
+
+
+def _insert_favorites(rows, batch_size):
+    """INSERT ``(user_id, pokemon_id, created_at)`` rows with their dumped timestamps.
+
+    ``bulk_create`` would let ``created_at``'s ``auto_now_add`` stamp them with "now".
+    """
+    qn = connection.ops.quote_name
+    sql = (
+        f"INSERT INTO {qn(Favorite._meta.db_table)} ({qn('user_id')}, {qn('pokemon_id')}, {qn('created_at')}) "
+        f"VALUES (%s, %s, %s)"
+    )
+    with connection.cursor() as cursor:
+        for i in range(0, len(rows), batch_size):
+            cursor.executemany(sql, rows[i:i + batch_size])
+
+
+def _from_utc(value):
+    return timezone.make_aware(value, dt_timezone.utc) if settings.USE_TZ else value
+
+
+def _read(path):
+    try:
+        with np.load(path, allow_pickle=False) as archive:
+            data = {name: archive[name] for name in archive.files}
+    except (OSError, ValueError) as e:
+        raise DumpError(f"Cannot read {path}: {e}")
+    if 'format_version' not in data or int(data['format_version'][0]) != FORMAT_VERSION:
+        raise DumpError(f"{path} is not a version {FORMAT_VERSION} Pokédex dump")
+    return data
+
+
+def _records(data):
+    """``(id, fields)`` for every Pokémon in a dump."""
+    text = {field: data[f'pokemon_{field}'].tolist() for field in _TEXT_FIELDS}
+    for field in _NULLABLE_FIELDS:
+        for i in np.flatnonzero(data[f'pokemon_{field}_null']):
+            text[field][i] = None
+    stats = data['pokemon_stats'].tolist()
+    for i, pokemon_id in enumerate(data['pokemon_id'].tolist()):
+        yield pokemon_id, {
+            **{field: values[i] for field, values in text.items()},
+            **dict(zip(STAT_FIELDS, stats[i])),
+        }
+
+
+def _pokemons(data):
+    for pokemon_id, fields in _records(data):
+        # bulk_create skips Pokemon.save(), which keeps types lower-case
+        fields['type1'], fields['type2'] = normalize_type(fields['type1']), normalize_type(fields['type2'])
+        yield Pokemon(id=pokemon_id, **fields)
+
+
+def read_pokemon_records(path):
+    """The Pokémon of a dump as field dicts, without their ids."""
+    return [fields for _, fields in _records(_read(path))]
+
+
+def load_pokedex(path, replace=False, with_favorites=True, create_users=False, drop_favorites=False,
+                 batch_size=DEFAULT_BATCH_SIZE):
+    """Load a dump written by ``dump_pokedex``.
+
+    Returns ``(pokemons, favorites, skipped_favorites)``; favorites of users
+    that do not exist here are skipped unless ``create_users`` is set.
+    Replacing the Pokémon deletes every favorite, so unless the dump restores
+    them that needs ``drop_favorites`` as well.
+    """
+    data = _read(path)
+    with_favorites = with_favorites and 'favorite_user' in data
+
+    with transaction.atomic():
+        if Pokemon.objects.exists():
+            if not replace:
+                raise DumpError("The Pokémon table is not empty; pass replace=True to overwrite it")
+            if not (with_favorites or drop_favorites) and Favorite.objects.exists():
+                raise DumpError(
+                    "Replacing the Pokémon would delete every favorite and this dump does not restore them; "
+                    "pass drop_favorites=True to accept that"
+                )
+            # Plain DELETEs: a queryset delete would load every row to send signals,
+            # and every cache the signals maintain is reset below anyway
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(Favorite._meta.db_table)}')
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(Pokemon._meta.db_table)}')
+
+        Pokemon.objects.bulk_create(_pokemons(data), batch_size=batch_size)
+
+        favorite_count = skipped = 0
+        if with_favorites:
+            usernames = data['favorite_user'].tolist()
+            user_ids = dict(User.objects.filter(username__in=set(usernames)).values_list('username', 'id'))
+            if create_users:
+                missing = sorted(set(usernames) - user_ids.keys())
+                for username in missing:
+                    user_ids[username] = User.objects.create_user(username=username).pk
+            created = data['favorite_created_at'].astype('datetime64[us]').tolist()
+            adapt = connection.ops.adapt_datetimefield_value
+            favorites = [
+                (user_ids[username], pokemon_id, adapt(_from_utc(created_at)))
+                for username, pokemon_id, created_at in zip(usernames, data['favorite_pokemon_id'].tolist(), created)
+                if username in user_ids
+            ]
+            skipped = len(usernames) - len(favorites)
+            _insert_favorites(favorites, batch_size)
+            favorite_count = len(favorites)
+            reconcile_favorite_counts()
+
+        # Explicit ids leave sequences behind on backends that have them (no-op on SQLite)
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Pokemon, Favorite]):
+                cursor.execute(sql)
+
+        transaction.on_commit(_reset_derived_data)
+    return len(data['pokemon_id']), favorite_count, skipped
+
+
+def _reset_derived_data():
+    dataset.bump_version()
+    search.reset_search_index()
+    for user_id in User.objects.values_list('id', flat=True).iterator():
+        invalidate_favorite_ids(user_id)
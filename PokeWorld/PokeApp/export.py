@@ -0,0 +1,84 @@
+"""Streaming export of every Pokémon as NDJSON or CSV.
+
+Rows come from ``.iterator(chunk_size=...)`` and leave as soon as they are
+formatted, in blocks of ``chunk_size`` rows, optionally through a gzip
+stream. Memory use stays flat however large the table is. The same
+generators back the export endpoint and the ``export_pokedex`` command.
+"""
+import csv
+import json
+import zlib
+
+from .constants import STAT_FIELDS
+from .models import Pokemon
+
+FORMATS = ('ndjson', 'csv')
+CONTENT_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+FIELDS = ['id', 'name', 'slug', 'type1', 'type2', *STAT_FIELDS, 'image_url']
+FAVORITE_COUNT = 'favorite_count'
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def export_fields(with_favorites=False):
+    return FIELDS + [FAVORITE_COUNT] if with_favorites else list(FIELDS)
+
+
+def export_rows(with_favorites=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield one tuple per Pokémon in id order, fetched ``chunk_size`` rows at a time."""
+    # favorite_count is a column on Pokemon, so the favorites table is never read here
+    queryset = Pokemon.objects.order_by('id').values_list(*export_fields(with_favorites))
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+class _Echo:
+    """File-like object whose ``write`` hands back what it was given, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_chunks(rows, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    # One encoder for the whole stream; json.dumps with options builds a new one per call
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    chunk = []
+    for row in rows:
+        chunk.append(encode(dict(zip(fields, row))))
+        if len(chunk) == chunk_size:
+            yield '\n'.join(chunk) + '\n'
+            chunk = []
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
+
+
+def csv_chunks(rows, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    chunk = []
+    for row in rows:
+        chunk.append(writer.writerow(row))
+        if len(chunk) == chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def gzip_chunks(chunks):
+    """Compress a stream of text chunks into gzip-framed bytes."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(fmt='ndjson', with_favorites=False, compress=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the whole Pokédex in ``fmt``: text chunks, or gzip bytes when ``compress``."""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+    fields = export_fields(with_favorites)
+    rows = export_rows(with_favorites, chunk_size)
+    formatter = ndjson_chunks if fmt == 'ndjson' else csv_chunks
+    chunks = formatter(rows, fields, chunk_size)
+    return gzip_chunks(chunks) if compress else chunks
@@ -0,0 +1,226 @@
+"""Per-user favorite Pokémon ids, cached as a compact bitmap.
+
+List pages only need to know *whether* a card is a favorite, so instead of a
+queryset scan per card they check a bit in a bitmap that is loaded from the
+cache once per request. The bitmap starts at the user's lowest favorite id, so
+it costs one bit per id in the range the user actually uses. The bitmap lives
+in the shared Django cache (see ``CACHES``), so dropping it in the process that
+changed a favorite is seen by every other worker.
+
+``toggle_favorite`` and ``set_favorites`` write with raw conditional
+statements that rely on ``Favorite``'s ``unique_together`` instead of a
+SELECT first. They skip the model signals, so they keep
+``Pokemon.favorite_count`` in step and drop the bitmap themselves, moving each
+counter only for rows their own statements actually inserted or deleted.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.constants import OnConflict
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Favorite, Pokemon
+
+CACHE_KEY = "pokeapp:favorite-ids:{user_id}"
+DEFAULT_TIMEOUT = 24 * 60 * 60
+# Ids per ``IN (...)`` list, below SQLite's bound-parameter limit
+ID_BATCH_SIZE = 500
+# Ids must fit the database's signed 64-bit integer columns
+MIN_ID, MAX_ID = -2 ** 63, 2 ** 63 - 1
+
+
+class FavoriteIdSet:
+    """Read-only bitmap of Pokémon ids with O(1) membership tests."""
+    __slots__ = ('offset', 'bits', 'count')
+
+    def __init__(self, offset=0, bits=b'', count=0):
+        self.offset = offset
+        self.bits = bytes(bits)
+        self.count = count
+
+    @classmethod
+    def from_ids(cls, ids):
+        ids = sorted(set(ids))
+        if not ids:
+            return cls()
+        offset = ids[0]
+        bits = bytearray(((ids[-1] - offset) >> 3) + 1)
+        for pokemon_id in ids:
+            index = pokemon_id - offset
+            bits[index >> 3] |= 1 << (index & 7)
+        return cls(offset, bits, len(ids))
+
+    def __contains__(self, pokemon_id):
+        index = pokemon_id - self.offset
+        if index < 0 or (index >> 3) >= len(self.bits):
+            return False
+        return bool(self.bits[index >> 3] & (1 << (index & 7)))
+
+    def __iter__(self):
+        for byte_index, byte in enumerate(self.bits):
+            while byte:
+                low = byte & -byte
+                yield self.offset + (byte_index << 3) + low.bit_length() - 1
+                byte ^= low
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    def __getstate__(self):
+        return (self.offset, self.bits, self.count)
+
+    def __setstate__(self, state):
+        self.offset, self.bits, self.count = state
+
+
+def get_favorite_ids(user):
+    """Return the cached ``FavoriteIdSet`` for ``user`` (empty for anonymous users)."""
+    if not user.is_authenticated:
+        return FavoriteIdSet()
+    key = CACHE_KEY.format(user_id=user.pk)
+    favorite_ids = cache.get(key)
+    if favorite_ids is None:
+        favorite_ids = FavoriteIdSet.from_ids(
+            Favorite.objects.filter(user_id=user.pk).values_list('pokemon_id', flat=True)
+        )
+        cache.set(key, favorite_ids, getattr(settings, 'POKEMON_FAVORITES_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+    return favorite_ids
+
+
+def invalidate_favorite_ids(user_id):
+    cache.delete(CACHE_KEY.format(user_id=user_id))
+
+
+def _insert_sql(id_count):
+    # INSERT ... SELECT only adds rows for Pokémon that exist, and the conflict
+    # clause turns an existing favorite into a no-op instead of an error
+    qn = connection.ops.quote_name
+    return (
+        f"{connection.ops.insert_statement(on_conflict=OnConflict.IGNORE)} {qn(Favorite._meta.db_table)} "
+        f"({qn('user_id')}, {qn('pokemon_id')}, {qn('created_at')}) "
+        f"SELECT %s, {qn('id')}, %s FROM {qn(Pokemon._meta.db_table)} "
+        f"WHERE {qn('id')} IN ({', '.join(['%s'] * id_count)}) "
+        f"{connection.ops.on_conflict_suffix_sql([], OnConflict.IGNORE, None, None)}"
+    )
+
+
+def _delete_sql(id_count):
+    qn = connection.ops.quote_name
+    return (
+        f"DELETE FROM {qn(Favorite._meta.db_table)} "
+        f"WHERE {qn('user_id')} = %s AND {qn('pokemon_id')} IN ({', '.join(['%s'] * id_count)})"
+    )
+
+
+def _now():
+    return connection.ops.adapt_datetimefield_value(timezone.now())
+
+
+def is_valid_id(pokemon_id):
+    """Whether ``pokemon_id`` can be bound as a database integer at all."""
+    return MIN_ID <= pokemon_id <= MAX_ID
+
+
+def _changed_ids(cursor, make_sql, params, pokemon_ids):
+    """Run ``make_sql`` over ``pokemon_ids``; returns the ids whose favorite row it changed.
+
+    Where the database can return rows from an INSERT/DELETE that is one
+    statement; elsewhere each id gets its own statement and rowcount.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        cursor.execute(
+            f"{make_sql(len(pokemon_ids))} RETURNING {connection.ops.quote_name('pokemon_id')}",
+            [*params, *pokemon_ids],
+        )
+        return [row[0] for row in cursor.fetchall()]
+    changed = []
+    for pokemon_id in pokemon_ids:
+        cursor.execute(make_sql(1), [*params, pokemon_id])
+        if cursor.rowcount == 1:
+            changed.append(pokemon_id)
+    return changed
+
+
+def _bump_counts(pokemon_ids, delta):
+    if pokemon_ids:
+        Pokemon.objects.filter(id__in=pokemon_ids).update(favorite_count=F('favorite_count') + delta)
+
+
+def toggle_favorite(user_id, pokemon_id):
+    """Add the favorite if it is missing, otherwise remove it.
+
+    Returns ``'added'``, ``'removed'``, or ``None`` when there is no such
+    Pokémon. The favorite is written with one conditional statement (two to
+    remove), and ``Pokemon.favorite_count`` moves with it in the same transaction.
+    """
+    if not is_valid_id(pokemon_id):
+        return None
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(_insert_sql(1), [user_id, _now(), pokemon_id])
+        if cursor.rowcount == 1:
+            status, delta = 'added', 1
+        else:
+            cursor.execute(_delete_sql(1), [user_id, pokemon_id])
+            if cursor.rowcount:
+                status, delta = 'removed', -1
+            elif Pokemon.objects.filter(id=pokemon_id).exists():
+                # A concurrent toggle removed it first, and counted it
+                status, delta = 'removed', 0
+            else:
+                return None
+        if delta:
+            _bump_counts([pokemon_id], delta)
+        transaction.on_commit(lambda: invalidate_favorite_ids(user_id))
+    return status
+
+
+def set_favorites(user_id, add=(), remove=()):
+    """Add and remove many favorites in one transaction; returns ``(added, removed)``.
+
+    Ids of missing Pokémon and favorites the user already has (or lacks) are
+    skipped. Each batch of ids costs a fixed number of statements where the
+    database supports ``RETURNING`` (one per id elsewhere). Raises
+    ``ValueError`` for ids outside the database's integer range.
+    """
+    add, remove = sorted(set(add)), sorted(set(remove))
+    if not all(map(is_valid_id, add + remove)):
+        raise ValueError("Pokémon ids must be 64-bit integers")
+    added = removed = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        now = _now()
+        for i in range(0, len(add), ID_BATCH_SIZE):
+            changed = _changed_ids(cursor, _insert_sql, [user_id, now], add[i:i + ID_BATCH_SIZE])
+            added += len(changed)
+            _bump_counts(changed, 1)
+        for i in range(0, len(remove), ID_BATCH_SIZE):
+            changed = _changed_ids(cursor, _delete_sql, [user_id], remove[i:i + ID_BATCH_SIZE])
+            removed += len(changed)
+            _bump_counts(changed, -1)
+        if added or removed:
+            transaction.on_commit(lambda: invalidate_favorite_ids(user_id))
+    return added, removed
+
+
+def favorite_total():
+    """Per-Pokémon count of ``Favorite`` rows as a correlated subquery expression."""
+    counts = (
+        Favorite.objects.filter(pokemon=OuterRef('pk')).order_by()
+        .values('pokemon').annotate(count=Count('id')).values('count')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def reconcile_favorite_counts(dry_run=False):
+    """Set every ``Pokemon.favorite_count`` that drifted from its favorites; returns how many did.
+
+    One UPDATE over the Pokémon table, counting through the favorite index per row.
+    """
+    stale = Pokemon.objects.annotate(actual=favorite_total()).exclude(favorite_count=F('actual'))
+    if dry_run:
+        return stale.count()
+    return stale.update(favorite_count=favorite_total())
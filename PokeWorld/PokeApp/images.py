@@ -0,0 +1,156 @@
+"""Local mirror of Pokémon artwork with resized PNG and WebP variants.
+
+``mirror_images`` downloads each ``image_url`` into ``MEDIA_ROOT`` and writes
+one PNG and one WebP per width in ``variant_widths()`` (every display size at
+1x and 2x). ``Pokemon.image_path`` records the mirrored original. Its name
+carries a hash of the URL it came from, so a Pokémon whose artwork URL
+changed falls back to the remote image until it is mirrored again.
+
+Pillow is optional and only imported while variants are generated.
+"""
+import glob
+import hashlib
+import io
+import os
+import tempfile
+
+from django.conf import settings
+
+IMAGE_SUBDIR = 'pokemon_images'
+# CSS pixel widths the artwork is shown at: home grid cards (w-24) and the detail header (w-56)
+DISPLAY_WIDTHS = {'card': 96, 'detail': 224}
+DENSITIES = (1, 2)
+VARIANT_FORMATS = ('webp', 'png')
+WEBP_QUALITY = 80
+
+
+class ImageError(Exception):
+    pass
+
+
+def pillow_available():
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def variant_widths():
+    return sorted({width * density for width in DISPLAY_WIDTHS.values() for density in DENSITIES})
+
+
+def image_key(image_url):
+    return hashlib.sha1(image_url.encode('utf-8')).hexdigest()[:16]
+
+
+def image_path_for(pokemon):
+    """Where ``pokemon``'s artwork is mirrored to, relative to ``MEDIA_ROOT``."""
+    return f"{IMAGE_SUBDIR}/{pokemon.slug}_{image_key(pokemon.image_url)}.png"
+
+
+def variant_path(image_path, width, fmt):
+    return f"{os.path.splitext(image_path)[0]}_{width}.{fmt}"
+
+
+def has_local_image(pokemon):
+    """Whether ``image_path`` holds a mirror of the current ``image_url``."""
+    return bool(pokemon.image_path and pokemon.image_url and pokemon.image_path == image_path_for(pokemon))
+
+
+def mirror_complete(pokemon, media_root=None):
+    media_root = media_root or settings.MEDIA_ROOT
+    paths = [image_path_for(pokemon)] + [
+        variant_path(image_path_for(pokemon), width, fmt) for width in variant_widths() for fmt in VARIANT_FORMATS
+    ]
+    return all(os.path.exists(os.path.join(media_root, path)) for path in paths)
+
+
+def image_sources(pokemon, size='card'):
+    """``src``/``srcset`` values for showing ``pokemon`` at ``DISPLAY_WIDTHS[size]``.
+
+    ``srcset`` and ``webp_srcset`` are empty when there is no local mirror.
+    """
+    width = DISPLAY_WIDTHS[size]
+    if not has_local_image(pokemon):
+        return {'src': pokemon.image_url or '', 'srcset': '', 'webp_srcset': '', 'width': width}
+
+    def srcset(fmt):
+        return ', '.join(
+            f"{settings.MEDIA_URL}{variant_path(pokemon.image_path, width * density, fmt)} {density}x"
+            for density in DENSITIES
+        )
+
+    return {
+        'src': f"{settings.MEDIA_URL}{variant_path(pokemon.image_path, width, 'png')}",
+        'srcset': srcset('png'),
+        'webp_srcset': srcset('webp'),
+        'width': width,
+    }
+
+
+def remove_stale(slug, keep_path, media_root=None):
+    """Delete mirrored files of ``slug`` other than ``keep_path`` and its variants."""
+    directory = os.path.join(media_root or settings.MEDIA_ROOT, IMAGE_SUBDIR)
+    keep = os.path.splitext(os.path.basename(keep_path))[0]
+    removed = 0
+    for path in glob.glob(os.path.join(glob.escape(directory), f"{glob.escape(slug)}_{'[0-9a-f]' * 16}*")):
+        if os.path.basename(path).startswith(keep):
+            continue
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def _write(path, save):
+    # Write then rename so a page never links to a half-written file;
+    # mkstemp gives concurrent mirror runs their own temp names
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            save(f)
+        # mkstemp creates the file private to its owner; artwork is served as media
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def write_variants(content, image_path, media_root=None):
+    """Store the original ``content`` at ``image_path`` plus every resized variant.
+
+    Returns the number of files written.
+    """
+    from PIL import Image, UnidentifiedImageError
+
+    media_root = media_root or settings.MEDIA_ROOT
+    try:
+        original = Image.open(io.BytesIO(content))
+        original.load()
+        original = original.convert('RGBA')
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError) as e:
+        raise ImageError(f"{image_path}: {e}")
+
+    target = os.path.join(media_root, image_path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    _write(target, lambda f: f.write(content))
+    written = 1
+    for width in variant_widths():
+        # Never upscale; a small original is stored as is under each larger width
+        scaled_width = min(width, original.width)
+        height = max(1, round(original.height * scaled_width / original.width))
+        resized = original.resize((scaled_width, height), Image.LANCZOS)
+        _write(
+            os.path.join(media_root, variant_path(image_path, width, 'png')),
+            lambda f: resized.save(f, 'PNG', optimize=True),
+        )
+        _write(
+            os.path.join(media_root, variant_path(image_path, width, 'webp')),
+            lambda f: resized.save(f, 'WEBP', quality=WEBP_QUALITY, method=4),
+        )
+        written += 2
+    return written
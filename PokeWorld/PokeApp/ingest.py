@@ -0,0 +1,80 @@
+"""Batched writes of parsed Pokémon records.
+
+``upsert_pokemons`` replaces one ``update_or_create`` per row (a SELECT plus
+an INSERT or UPDATE, each committed on its own) with multi-row
+``INSERT ... ON CONFLICT (slug) DO UPDATE`` statements inside one
+transaction. ``bulk_create`` skips ``Pokemon.save()`` and the model signals,
+so slugs are filled in here and the derived data those signals maintain is
+refreshed once, after the commit.
+"""
+from django.db import transaction
+from django.utils.text import slugify
+
+from . import charts, dataset, search
+from .models import Pokemon, normalize_type
+
+DEFAULT_BATCH_SIZE = 500
+# Slugs per ``slug IN (...)`` lookup, below SQLite's bound-parameter limit
+LOOKUP_BATCH_SIZE = 500
+UPDATE_FIELDS = [
+    'name', 'type1', 'type2', 'hp', 'attack', 'defense', 'sp_attack', 'sp_defense', 'speed', 'image_url',
+]
+
+
+def with_slugs(records):
+    """Fill in each record's slug from its name and lower-case its types, as ``Pokemon.save()`` would.
+
+    Later records win when several share a slug: one statement cannot update
+    the same row twice.
+    """
+    by_slug = {}
+    for record in records:
+        slug = record.get('slug') or slugify(record['name'])
+        by_slug.pop(slug, None)
+        by_slug[slug] = {
+            **record, 'slug': slug,
+            **{slot: normalize_type(record[slot]) for slot in ('type1', 'type2') if slot in record},
+        }
+    return list(by_slug.values())
+
+
+def changed_records(records):
+    """The slugged ``records`` whose row is missing or differs from what is stored."""
+    stored = {}
+    for i in range(0, len(records), LOOKUP_BATCH_SIZE):
+        slugs = [record['slug'] for record in records[i:i + LOOKUP_BATCH_SIZE]]
+        rows = Pokemon.objects.filter(slug__in=slugs).values_list('slug', *UPDATE_FIELDS)
+        stored.update((slug, tuple(values)) for slug, *values in rows)
+    return [
+        record for record in records
+        if stored.get(record['slug']) != tuple(record.get(field) for field in UPDATE_FIELDS)
+    ]
+
+
+def upsert_pokemons(records, batch_size=DEFAULT_BATCH_SIZE, skip_unchanged=False):
+    """Insert or update ``records`` (dicts of ``Pokemon`` fields) keyed by slug.
+
+    Every batch runs in a single transaction; returns the number of rows
+    written. With ``skip_unchanged`` records identical to their stored row are
+    left out, so an unchanged dataset costs one SELECT per lookup batch and no writes.
+    """
+    records = with_slugs(records)
+    if skip_unchanged:
+        records = changed_records(records)
+    if not records:
+        return 0
+    pokemons = [Pokemon(**record) for record in records]
+    with transaction.atomic():
+        Pokemon.objects.bulk_create(
+            pokemons, batch_size=batch_size,
+            update_conflicts=True, unique_fields=['slug'], update_fields=UPDATE_FIELDS,
+        )
+        transaction.on_commit(lambda: _refresh_derived_data(pokemons))
+    return len(pokemons)
+
+
+def _refresh_derived_data(pokemons):
+    # What the post_save handlers would have done, once for the whole batch
+    charts.invalidate_many({pokemon.slug: charts.chart_spec(pokemon)['key'] for pokemon in pokemons})
+    search.reset_search_index()
+    dataset.bump_version()
@@ -0,0 +1,52 @@
+"""Most-favorited Pokémon, read from the denormalised ``Pokemon.favorite_count``.
+
+The top ``LEADERBOARD_SIZE`` rows are one range scan of the
+``pokemon_favorite_count_idx`` index, never a count over the favorites
+table. They are kept in process memory for ``POKEMON_LEADERBOARD_TTL``
+seconds (or until the dataset version moves on), so most requests are served
+without a query and the cost stays proportional to the board's size
+however many favorites exist.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from . import dataset
+from .models import Pokemon
+
+LEADERBOARD_SIZE = 100
+DEFAULT_LIMIT = 10
+DEFAULT_TTL = 60
+FIELDS = ('id', 'name', 'slug', 'type1', 'type2', 'image_url', 'favorite_count')
+
+_board = None  # (expires_at, dataset version, rows)
+_lock = threading.Lock()
+
+
+def _load():
+    return list(
+        Pokemon.objects.filter(favorite_count__gt=0)
+        .order_by('-favorite_count', 'id')
+        .values(*FIELDS)[:LEADERBOARD_SIZE]
+    )
+
+
+def top_favorited(limit=DEFAULT_LIMIT):
+    """The ``limit`` (at most ``LEADERBOARD_SIZE``) most-favorited Pokémon as dicts."""
+    global _board
+    version = dataset.get_version()
+    board = _board
+    if board is None or board[0] < time.monotonic() or board[1] != version:
+        with _lock:
+            board = _board
+            if board is None or board[0] < time.monotonic() or board[1] != version:
+                ttl = getattr(settings, 'POKEMON_LEADERBOARD_TTL', DEFAULT_TTL)
+                board = _board = (time.monotonic() + ttl, version, _load())
+    return board[2][:limit]
+
+
+def reset_leaderboard():
+    global _board
+    with _lock:
+        _board = None
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Write every Pokémon (and optionally favorites) to a compressed columnar .npz file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='pokedex.npz', help="Output file (default: pokedex.npz)")
+        parser.add_argument(
+            '--favorites', action='store_true',
+            help="Include favorites (stored by username)",
+        )
+
+    def handle(self, *args, **options):
+        from PokeApp.dumps import dump_pokedex
+
+        started = time.perf_counter()
+        pokemons, favorites = dump_pokedex(options['path'], with_favorites=options['favorites'])
+        message = f"Dumped {pokemons} Pokémon"
+        if options['favorites']:
+            message += f" and {favorites} favorites"
+        self.stdout.write(self.style.SUCCESS(
+            f"{message} to {options['path']} in {time.perf_counter() - started:.2f}s"
+        ))
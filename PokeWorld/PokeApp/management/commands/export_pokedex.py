@@ -0,0 +1,53 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from PokeApp import export
+
+
+class Command(BaseCommand):
+    help = "Stream every Pokémon (optionally with favorite counts) to NDJSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=export.FORMATS, default='ndjson')
+        parser.add_argument(
+            '--favorites', action='store_true',
+            help="Add a favorite_count column",
+        )
+        parser.add_argument('--gzip', action='store_true', help="Gzip the output")
+        parser.add_argument(
+            '-o', '--output', default='-',
+            help="File to write to (default: standard output)",
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=export.DEFAULT_CHUNK_SIZE,
+            help="Rows fetched from the database and written per chunk",
+        )
+
+    def handle(self, *args, **options):
+        chunks = export.export_chunks(
+            options['format'], options['favorites'], options['gzip'], options['chunk_size'],
+        )
+        started = time.perf_counter()
+        written = 0
+        if options['output'] == '-':
+            # Gzip output is binary, so it bypasses the text wrapper around stdout
+            out = sys.stdout.buffer if options['gzip'] else self.stdout
+            for chunk in chunks:
+                out.write(chunk)
+                written += len(chunk)
+            out.flush()
+        else:
+            mode = 'wb' if options['gzip'] else 'w'
+            encoding = None if options['gzip'] else 'utf-8'
+            with open(options['output'], mode, encoding=encoding, newline='' if encoding else None) as out:
+                for chunk in chunks:
+                    out.write(chunk)
+                    written += len(chunk)
+        # Progress goes to stderr so the export itself can be piped
+        self.stderr.write(
+            f"Exported {written} {'bytes' if options['gzip'] else 'characters'} "
+            f"in {time.perf_counter() - started:.2f}s",
+            style_func=self.style.SUCCESS,
+        )
@@ -1,38 +1,173 @@
-from django.core.management.base import BaseCommand
-from django.utils.text import slugify
-import requests
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
 from tqdm import tqdm
-from PokeApp.models import Pokemon
+from PokeApp import ingest, pokeapi
+
+CHECKPOINT_FILE = 'checkpoint.json'
+DEFAULT_CHECKPOINT_EVERY = 100
 
 class Command(BaseCommand):
     help = "Fetch Pokémon data from PokeAPI and save to DB"
 
-    def handle(self, *args, **kwargs):
-        n = 50  # Amount of pokemon that fetched
-        for i in tqdm(range(1, n+1)):
-            url = f"https://pokeapi.co/api/v2/pokemon/{i}"
-            response = requests.get(url)
-            data = response.json()
-            
-            stats = {stat['stat']['name']: stat['base_stat'] for stat in data['stats']}
-            types = [t['type']['name'] for t in data['types']]
-            
-            pokemon_name = data['name'].capitalize()
-            pokemon_slug = slugify(pokemon_name)
-            
-            Pokemon.objects.update_or_create(
-                slug=pokemon_slug,
-                defaults={
-                    'name': pokemon_name,
-                    'type1': types[0],
-                    'type2': types[1] if len(types) > 1 else None,
-                    'hp': stats['hp'],
-                    'attack': stats['attack'],
-                    'defense': stats['defense'],
-                    'sp_attack': stats['special-attack'],
-                    'sp_defense': stats['special-defense'],
-                    'speed': stats['speed'],
-                    'image_url': data['sprites']['other']['official-artwork']['front_default']
-                }
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=int, default=1, help="First national dex number to fetch")
+        parser.add_argument('--end', type=int, default=50, help="Last national dex number to fetch (inclusive)")
+        parser.add_argument(
+            '--concurrency', type=int, default=pokeapi.DEFAULT_CONCURRENCY,
+            help="Requests in flight at once",
+        )
+        parser.add_argument(
+            '--base-url', default=pokeapi.DEFAULT_BASE_URL,
+            help="PokeAPI root, e.g. a local mirror",
+        )
+        parser.add_argument(
+            '--rate', type=float, default=pokeapi.DEFAULT_RATE,
+            help="Maximum requests per second (0 for no limit)",
+        )
+        parser.add_argument(
+            '--retries', type=int, default=pokeapi.DEFAULT_RETRIES,
+            help="Retries per Pokémon after connection errors, 429 and 5xx responses",
+        )
+        parser.add_argument(
+            '--backoff', type=float, default=pokeapi.DEFAULT_BACKOFF,
+            help="Seconds before the first retry; doubled on each further retry",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=ingest.DEFAULT_BATCH_SIZE,
+            help="Rows per INSERT ... ON CONFLICT statement",
+        )
+        parser.add_argument('--timeout', type=float, default=pokeapi.DEFAULT_TIMEOUT, help="Per-request timeout in seconds")
+        parser.add_argument(
+            '--sync', action='store_true',
+            help="Incremental sync: cache responses on disk, send conditional requests, "
+                 "checkpoint progress and skip rows that did not change",
+        )
+        parser.add_argument(
+            '--cache-dir', default=None,
+            help="Response cache and checkpoint directory for --sync (default: POKEAPI_CACHE_DIR)",
+        )
+        parser.add_argument(
+            '--checkpoint-every', type=int, default=DEFAULT_CHECKPOINT_EVERY,
+            help="With --sync, Pokémon fetched and saved between checkpoints",
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help="With --sync, ignore a checkpoint left by an interrupted run",
+        )
+
+    def handle(self, *args, **options):
+        start, end = options['start'], options['end']
+        if start < 1 or end < start:
+            raise CommandError("--start must be at least 1 and no greater than --end")
+        if options['concurrency'] < 1:
+            raise CommandError("--concurrency must be at least 1")
+
+        sync = options['sync']
+        cache = checkpoint = None
+        numbers = list(range(start, end + 1))
+        step = len(numbers)
+        if sync:
+            if options['checkpoint_every'] < 1:
+                raise CommandError("--checkpoint-every must be at least 1")
+            cache_dir = options['cache_dir'] or getattr(
+                settings, 'POKEAPI_CACHE_DIR', os.path.join(settings.BASE_DIR, '.pokeapi-cache'),
             )
-        self.stdout.write(self.style.SUCCESS(f"{n} Pokémon data fetched and saved!"))
+            cache = pokeapi.ResponseCache(cache_dir)
+            checkpoint = Checkpoint(os.path.join(cache_dir, CHECKPOINT_FILE), options['base_url'], start, end)
+            if not options['restart']:
+                resumed = checkpoint.load()
+                if resumed is not None:
+                    start, retry = resumed
+                    self.stdout.write(f"Resuming from #{start}")
+                    if retry:
+                        self.stdout.write(f"Retrying {len(retry)} Pokémon that failed before")
+                    # Numbers that failed before the interruption go first
+                    numbers = retry + list(range(start, end + 1))
+            step = options['checkpoint_every']
+
+        client = pokeapi.PokeAPIClient(
+            options['base_url'], options['concurrency'], options['rate'],
+            options['retries'], options['backoff'], options['timeout'], cache,
+        )
+        saved, failed = 0, []
+        next_number = start
+        with client, tqdm(total=len(numbers), disable=options['verbosity'] == 0) as progress:
+            # Without --sync the whole range is one chunk, written in one transaction
+            for i in range(0, len(numbers), step):
+                chunk = numbers[i:i + step]
+                records = []
+                # Requests run on the pool; parsing happens here and the rows are written together below
+                for number, data, error in client.fetch_pokemon(chunk):
+                    progress.update()
+                    if error is not None:
+                        failed.append((number, error))
+                        continue
+                    try:
+                        records.append(pokeapi.parse_pokemon(data))
+                    except (KeyError, IndexError, TypeError, AttributeError):
+                        failed.append((number, "unexpected payload"))
+                saved += ingest.upsert_pokemons(records, options['batch_size'], skip_unchanged=sync)
+                if checkpoint:
+                    # Retried numbers all lie below next_number, so only new ones move it on
+                    next_number = max(next_number, chunk[-1] + 1)
+                    checkpoint.save(next_number, sorted(number for number, _ in failed))
+        if checkpoint:
+            checkpoint.clear()
+
+        # Have the per-type statistics ready before dashboards ask for them
+        from PokeApp.analytics import refresh_type_stats
+        refresh_type_stats()
+        for number, error in sorted(failed, key=lambda f: f[0]):
+            self.stderr.write(f"#{number}: {error}")
+        self.stdout.write(self.style.SUCCESS(f"{saved} Pokémon data fetched and saved!"))
+        if sync:
+            self.stdout.write(f"{client.not_modified} not modified since the last sync")
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{len(failed)} Pokémon could not be fetched"))
+
+
+class Checkpoint:
+    """Progress of a --sync run, saved after every written chunk.
+
+    It records the next dex number to fetch and the numbers that failed so
+    far, which a resumed run tries again before carrying on.
+    """
+
+    def __init__(self, path, base_url, start, end):
+        self.path = path
+        self.run = {'base_url': base_url, 'start': start, 'end': end}
+
+    def load(self):
+        """``(next number, failed numbers)`` where an interrupted run over the same range stopped, or ``None``."""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(state, dict) or state.get('run') != self.run:
+            return None
+        next_number, failed = state.get('next'), state.get('failed', [])
+        if not isinstance(next_number, int) or not isinstance(failed, list):
+            return None
+        if not self.run['start'] <= next_number <= self.run['end'] + 1:
+            return None
+        if not all(isinstance(n, int) and self.run['start'] <= n < next_number for n in failed):
+            return None
+        if next_number == self.run['start'] or (next_number > self.run['end'] and not failed):
+            return None
+        return next_number, sorted(set(failed))
+
+    def save(self, next_number, failed=()):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'run': self.run, 'next': next_number, 'failed': list(failed)}, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Seed the database from a .npz file written by dump_pokedex, in one transaction"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='pokedex.npz', help="Dump file (default: pokedex.npz)")
+        parser.add_argument(
+            '--replace', action='store_true',
+            help="Delete the existing Pokémon and favorites first",
+        )
+        parser.add_argument(
+            '--drop-favorites', action='store_true',
+            help="With --replace, allow deleting existing favorites the dump does not restore",
+        )
+        parser.add_argument(
+            '--skip-favorites', action='store_true',
+            help="Ignore favorites stored in the dump",
+        )
+        parser.add_argument(
+            '--create-users', action='store_true',
+            help="Create (password-less) users for favorites whose user does not exist",
+        )
+        parser.add_argument('--batch-size', type=int, default=2000, help="Rows per INSERT")
+
+    def handle(self, *args, **options):
+        from PokeApp.dumps import DumpError, load_pokedex
+
+        started = time.perf_counter()
+        try:
+            pokemons, favorites, skipped = load_pokedex(
+                options['path'],
+                replace=options['replace'],
+                with_favorites=not options['skip_favorites'],
+                create_users=options['create_users'],
+                drop_favorites=options['drop_favorites'],
+                batch_size=options['batch_size'],
+            )
+        except DumpError as e:
+            raise CommandError(str(e))
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f"Skipped {skipped} favorites of unknown users (use --create-users to keep them)"
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {pokemons} Pokémon and {favorites} favorites in {time.perf_counter() - started:.2f}s"
+        ))
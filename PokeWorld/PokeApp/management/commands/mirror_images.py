@@ -0,0 +1,90 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from tqdm import tqdm
+
+from PokeApp import images, pokeapi
+from PokeApp.models import Pokemon
+
+
+class Command(BaseCommand):
+    help = "Download Pokémon artwork into MEDIA_ROOT with resized PNG and WebP variants"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=pokeapi.DEFAULT_CONCURRENCY,
+            help="Images downloaded and resized at once",
+        )
+        parser.add_argument(
+            '--rate', type=float, default=pokeapi.DEFAULT_RATE,
+            help="Maximum downloads started per second (0 for no limit)",
+        )
+        parser.add_argument('--retries', type=int, default=pokeapi.DEFAULT_RETRIES)
+        parser.add_argument('--timeout', type=float, default=pokeapi.DEFAULT_TIMEOUT, help="Per-request timeout in seconds")
+        parser.add_argument(
+            '--slug', action='append', dest='slugs', default=[],
+            help="Only mirror this Pokémon (can be given several times)",
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Download and resize again even when a complete mirror exists",
+        )
+
+    def handle(self, *args, **options):
+        if not images.pillow_available():
+            raise CommandError("mirror_images needs Pillow (pip install Pillow)")
+        if options['concurrency'] < 1:
+            raise CommandError("--concurrency must be at least 1")
+
+        pokemons = (
+            Pokemon.objects.exclude(image_url__isnull=True).exclude(image_url='')
+            .only('id', 'slug', 'image_url', 'image_path').order_by('id')
+        )
+        if options['slugs']:
+            pokemons = pokemons.filter(slug__in=options['slugs'])
+        todo = [
+            p for p in pokemons
+            if options['force'] or not (images.has_local_image(p) and images.mirror_complete(p))
+        ]
+        if not todo:
+            self.stdout.write(self.style.SUCCESS("All images are already mirrored!"))
+            return
+
+        client = pokeapi.PokeAPIClient(
+            concurrency=options['concurrency'], rate=options['rate'],
+            retries=options['retries'], timeout=options['timeout'],
+        )
+
+        def mirror(pokemon):
+            path = images.image_path_for(pokemon)
+            written = images.write_variants(client.get(pokemon.image_url).content, path)
+            images.remove_stale(pokemon.slug, path)
+            return path, written
+
+        started = time.perf_counter()
+        mirrored, failed, files = [], [], 0
+        # Downloads and resizing (Pillow releases the GIL) run on the pool; the rows are updated here
+        try:
+            with client, ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                futures = {pool.submit(mirror, p): p for p in todo}
+                for future in tqdm(as_completed(futures), total=len(futures), disable=options['verbosity'] == 0):
+                    pokemon = futures[future]
+                    try:
+                        pokemon.image_path, written = future.result()
+                    except (pokeapi.FetchError, images.ImageError, OSError) as e:
+                        failed.append((pokemon.slug, e))
+                        continue
+                    mirrored.append(pokemon)
+                    files += written
+        finally:
+            # Even if the run is cut short, point the rows at the files already on disk
+            Pokemon.objects.bulk_update(mirrored, ['image_path'], batch_size=500)
+
+        for slug, error in sorted(failed, key=lambda f: f[0]):
+            self.stderr.write(f"{slug}: {error}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Mirrored {len(mirrored)} images ({files} files) in {time.perf_counter() - started:.2f}s"
+        ))
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{len(failed)} images could not be mirrored"))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+from PokeApp.favorites import reconcile_favorite_counts
+
+class Command(BaseCommand):
+    help = "Recompute every Pokémon's denormalised favorite count from the favorites table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Report how many counts are off without changing anything",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        started = time.perf_counter()
+        stale = reconcile_favorite_counts(dry_run=dry_run)
+        elapsed = time.perf_counter() - started
+
+        if not stale:
+            self.stdout.write(self.style.SUCCESS(f"All favorite counts are correct! ({elapsed:.2f}s)"))
+        elif dry_run:
+            self.stdout.write(self.style.WARNING(f"{stale} favorite counts are out of date"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Fixed {stale} favorite counts in {elapsed:.2f}s"))
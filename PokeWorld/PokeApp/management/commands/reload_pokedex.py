@@ -0,0 +1,90 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from tqdm import tqdm
+
+from PokeApp import pokeapi, reload
+
+
+class Command(BaseCommand):
+    help = "Reload the whole Pokédex through a staging table and swap it in atomically"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--from-dump', metavar='PATH',
+            help="Stage the Pokémon of a dump_pokedex file instead of fetching them",
+        )
+        parser.add_argument('--start', type=int, default=1, help="First national dex number to fetch")
+        parser.add_argument('--end', type=int, default=50, help="Last national dex number to fetch (inclusive)")
+        parser.add_argument('--concurrency', type=int, default=pokeapi.DEFAULT_CONCURRENCY)
+        parser.add_argument('--base-url', default=pokeapi.DEFAULT_BASE_URL, help="PokeAPI root, e.g. a local mirror")
+        parser.add_argument('--rate', type=float, default=pokeapi.DEFAULT_RATE, help="Maximum requests per second")
+        parser.add_argument('--retries', type=int, default=pokeapi.DEFAULT_RETRIES)
+        parser.add_argument('--backoff', type=float, default=pokeapi.DEFAULT_BACKOFF)
+        parser.add_argument('--timeout', type=float, default=pokeapi.DEFAULT_TIMEOUT)
+        parser.add_argument('--batch-size', type=int, default=reload.DEFAULT_BATCH_SIZE, help="Rows per staging INSERT")
+        parser.add_argument(
+            '--min-ratio', type=float, default=reload.DEFAULT_MIN_RATIO,
+            help="Refuse to swap when fewer than this share of the live Pokémon were staged",
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Swap even if some Pokémon could not be fetched or validation fails",
+        )
+
+    def fetch(self, options):
+        start, end = options['start'], options['end']
+        if start < 1 or end < start:
+            raise CommandError("--start must be at least 1 and no greater than --end")
+        client = pokeapi.PokeAPIClient(
+            options['base_url'], options['concurrency'], options['rate'],
+            options['retries'], options['backoff'], options['timeout'],
+        )
+        records, failed = [], []
+        with client:
+            results = client.fetch_pokemon(range(start, end + 1))
+            for number, data, error in tqdm(results, total=end - start + 1, disable=options['verbosity'] == 0):
+                if error is None:
+                    try:
+                        records.append(pokeapi.parse_pokemon(data))
+                        continue
+                    except (KeyError, IndexError, TypeError, AttributeError):
+                        error = "unexpected payload"
+                failed.append((number, error))
+        for number, error in sorted(failed, key=lambda f: f[0]):
+            self.stderr.write(f"#{number}: {error}")
+        return records, len(failed)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['from_dump']:
+            from PokeApp.dumps import DumpError, read_pokemon_records
+            try:
+                records, failed = read_pokemon_records(options['from_dump']), 0
+            except DumpError as e:
+                raise CommandError(str(e))
+        else:
+            records, failed = self.fetch(options)
+        if failed and not options['force']:
+            # Missing Pokémon would be deleted from the live table along with their favorites
+            raise CommandError(f"{failed} Pokémon could not be fetched; nothing was changed (use --force to swap anyway)")
+
+        staged = reload.stage_records(records, options['batch_size'])
+        self.stdout.write(f"Staged {staged} Pokémon in {time.perf_counter() - started:.2f}s")
+
+        swap_started = time.perf_counter()
+        try:
+            report = reload.swap_in(options['min_ratio'], force=options['force'])
+        except reload.ReloadError as e:
+            raise CommandError(f"Staged data rejected, live Pokédex unchanged: {e}")
+        finally:
+            reload.clear_staging()
+        swap_time = time.perf_counter() - swap_started
+
+        # Have the per-type statistics ready before dashboards ask for them
+        from PokeApp.analytics import refresh_type_stats
+        refresh_type_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Swapped in {swap_time:.2f}s: {report.inserted} added, {report.updated} updated, "
+            f"{report.deleted} removed ({report.favorites_dropped} favorites of removed Pokémon dropped)"
+        ))
@@ -0,0 +1,76 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from tqdm import tqdm
+
+from PokeApp import charts
+from PokeApp.models import Pokemon
+
+
+def render_spec(spec, directory):
+    """Pool worker: draw both charts for one spec and return how many were written."""
+    charts.render_png_charts(spec, directory)
+    return len(charts.CHART_KINDS)
+
+
+class Command(BaseCommand):
+    help = "Pre-render radar and bar charts for every Pokémon using a process pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help="Number of worker processes (default: number of CPUs)",
+        )
+        parser.add_argument(
+            '--only-missing', action='store_true',
+            help="Skip Pokémon whose charts are already in the chart store",
+        )
+        parser.add_argument(
+            '--slug', action='append', dest='slugs', default=[],
+            help="Only render this Pokémon (can be given several times)",
+        )
+
+    def handle(self, *args, **options):
+        pokemons = Pokemon.objects.order_by('id')
+        if options['slugs']:
+            pokemons = pokemons.filter(slug__in=options['slugs'])
+
+        directory = charts.chart_dir()
+        os.makedirs(directory, exist_ok=True)
+
+        specs = []
+        for pokemon in pokemons:
+            spec = charts.chart_spec(pokemon)
+            if options['only_missing'] and charts.charts_exist(spec, directory):
+                continue
+            charts.invalidate(pokemon.slug, keep_key=spec['key'])
+            specs.append(spec)
+
+        if not specs:
+            self.stdout.write(self.style.SUCCESS("All charts are already rendered!"))
+            return
+
+        workers = max(1, min(options['workers'], len(specs)))
+        self.stdout.write(f"Rendering charts for {len(specs)} Pokémon with {workers} worker(s)...")
+
+        started = time.perf_counter()
+        rendered = 0
+        if workers == 1:
+            for spec in tqdm(specs):
+                rendered += render_spec(spec, directory)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(render_spec, spec, directory) for spec in specs]
+                for future in tqdm(as_completed(futures), total=len(futures)):
+                    rendered += future.result()
+        elapsed = time.perf_counter() - started
+
+        charts.evict(directory, getattr(settings, 'POKEMON_CHART_CACHE_MAX_BYTES', charts.DEFAULT_MAX_BYTES))
+
+        rate = rendered / elapsed if elapsed else float(rendered)
+        self.stdout.write(self.style.SUCCESS(
+            f"{rendered} charts rendered in {elapsed:.2f}s ({rate:.1f} charts/s)"
+        ))
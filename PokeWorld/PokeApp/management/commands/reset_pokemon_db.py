@@ -19,3 +19,4 @@ class Command(BaseCommand):
         
         self.stdout.write(self.style.SUCCESS("Database reset complete!"))
         self.stdout.write("Now run: python manage.py fetch_pokemon")
+        self.stdout.write("(To refresh a live site without emptying it or losing favorites, use reload_pokedex instead)")
@@ -0,0 +1,200 @@
+"""Type effectiveness and team coverage.
+
+``EFFECTIVENESS[attacker, defender]`` is the damage multiplier of an attack of
+one type against a single-typed defender, for the 18 types in ``TYPE_COLORS``
+order. Dual types multiply their two columns.
+
+Teams are summarised per member as three 18-bit masks:
+
+* ``offense`` – defending types a member's own (STAB) types hit super effectively
+* ``weak`` / ``resist`` – attacking types the member takes more / less damage from
+
+A team's coverage then reduces to OR-ing member masks. Ranking every possible
+completion of a team is a handful of array operations over those masks.
+"""
+from math import comb
+
+import numpy as np
+
+from .analytics import NO_TYPE, TYPES
+
+TYPE_COUNT = len(TYPES)
+TEAM_SIZE = 6
+ALL_TYPES_MASK = (1 << TYPE_COUNT) - 1
+# Upper bound on candidate teams scored in one search; larger pools are trimmed first
+MAX_CANDIDATE_TEAMS = 200_000
+
+# Multipliers other than 1x, attacker -> {defender: multiplier}
+_CHART = {
+    'normal': {'rock': .5, 'ghost': 0, 'steel': .5},
+    'fire': {'fire': .5, 'water': .5, 'grass': 2, 'ice': 2, 'bug': 2, 'rock': .5, 'dragon': .5, 'steel': 2},
+    'water': {'fire': 2, 'water': .5, 'grass': .5, 'ground': 2, 'rock': 2, 'dragon': .5},
+    'electric': {'water': 2, 'electric': .5, 'grass': .5, 'ground': 0, 'flying': 2, 'dragon': .5},
+    'grass': {'fire': .5, 'water': 2, 'grass': .5, 'poison': .5, 'ground': 2, 'flying': .5, 'bug': .5,
+              'rock': 2, 'dragon': .5, 'steel': .5},
+    'ice': {'fire': .5, 'water': .5, 'grass': 2, 'ice': .5, 'ground': 2, 'flying': 2, 'dragon': 2, 'steel': .5},
+    'fighting': {'normal': 2, 'ice': 2, 'poison': .5, 'flying': .5, 'psychic': .5, 'bug': .5, 'rock': 2,
+                 'ghost': 0, 'dark': 2, 'steel': 2, 'fairy': .5},
+    'poison': {'grass': 2, 'poison': .5, 'ground': .5, 'rock': .5, 'ghost': .5, 'steel': 0, 'fairy': 2},
+    'ground': {'fire': 2, 'electric': 2, 'grass': .5, 'poison': 2, 'flying': 0, 'bug': .5, 'rock': 2, 'steel': 2},
+    'flying': {'electric': .5, 'grass': 2, 'fighting': 2, 'bug': 2, 'rock': .5, 'steel': .5},
+    'psychic': {'fighting': 2, 'poison': 2, 'psychic': .5, 'dark': 0, 'steel': .5},
+    'bug': {'fire': .5, 'grass': 2, 'fighting': .5, 'poison': .5, 'flying': .5, 'psychic': 2, 'ghost': .5,
+            'dark': 2, 'steel': .5, 'fairy': .5},
+    'rock': {'fire': 2, 'ice': 2, 'fighting': .5, 'ground': .5, 'flying': 2, 'bug': 2, 'steel': .5},
+    'ghost': {'normal': 0, 'psychic': 2, 'ghost': 2, 'dark': .5},
+    'dragon': {'dragon': 2, 'steel': .5, 'fairy': 0},
+    'dark': {'fighting': .5, 'psychic': 2, 'ghost': 2, 'dark': .5, 'fairy': .5},
+    'steel': {'fire': .5, 'water': .5, 'electric': .5, 'ice': 2, 'rock': 2, 'steel': .5, 'fairy': 2},
+    'fairy': {'fire': .5, 'fighting': 2, 'poison': .5, 'dragon': 2, 'dark': 2, 'steel': .5},
+}
+
+
+def _effectiveness_matrix():
+    matrix = np.ones((TYPE_COUNT, TYPE_COUNT), dtype=np.float32)
+    for attacker, row in _CHART.items():
+        for defender, multiplier in row.items():
+            matrix[TYPES.index(attacker), TYPES.index(defender)] = multiplier
+    matrix.flags.writeable = False
+    return matrix
+
+
+EFFECTIVENESS = _effectiveness_matrix()
+_BITS = np.uint32(1) << np.arange(TYPE_COUNT, dtype=np.uint32)
+# Defending types each attacking type hits super effectively
+SUPER_EFFECTIVE = (EFFECTIVENESS > 1).astype(np.uint32) @ _BITS
+# Set bits of every 18-bit mask
+POPCOUNT = sum((np.arange(1 << TYPE_COUNT) >> bit) & 1 for bit in range(TYPE_COUNT)).astype(np.uint8)
+
+
+def type_code(pokemon_type):
+    """Index of ``pokemon_type`` in ``TYPES``, or ``NO_TYPE`` for none/unknown."""
+    try:
+        return TYPES.index((pokemon_type or '').lower())
+    except ValueError:
+        return NO_TYPE
+
+
+def _codes(codes):
+    # Snapshot codes past the 18 known types (unexpected API data) count as no type
+    codes = np.asarray(codes, dtype=np.int64).reshape(-1)
+    return np.where((codes >= 0) & (codes < TYPE_COUNT), codes, NO_TYPE)
+
+
+def defensive_multipliers(type1, type2):
+    """``(members, 18)`` damage multipliers taken from each attacking type."""
+    type1, type2 = _codes(type1), _codes(type2)
+    # An extra all-ones column stands in for a missing type
+    padded = np.hstack((EFFECTIVENESS, np.ones((TYPE_COUNT, 1), dtype=np.float32)))
+    return (padded[:, type1] * padded[:, type2]).T
+
+
+def member_masks(type1, type2):
+    """``(offense, weak, resist)`` 18-bit masks for each member."""
+    type1, type2 = _codes(type1), _codes(type2)
+    padded = np.append(SUPER_EFFECTIVE, np.uint32(0))
+    offense = padded[type1] | padded[type2]
+    multipliers = defensive_multipliers(type1, type2)
+    weak = (multipliers > 1).astype(np.uint32) @ _BITS
+    resist = (multipliers < 1).astype(np.uint32) @ _BITS
+    return offense.astype(np.uint32), weak.astype(np.uint32), resist.astype(np.uint32)
+
+
+def _type_names(mask):
+    return [TYPES[i] for i in range(TYPE_COUNT) if mask >> i & 1]
+
+
+def coverage_score(offense, weak, resist):
+    """Types hit super effectively plus attacking types the team is not left open to.
+
+    An attacking type leaves the team open when some member is weak to it and
+    no member resists it. Accepts scalars or arrays of team masks.
+    """
+    open_to = weak & ~resist & ALL_TYPES_MASK
+    return POPCOUNT[offense].astype(np.int32) + TYPE_COUNT - POPCOUNT[open_to]
+
+
+def analyze_team(type1, type2):
+    """Offensive and defensive coverage of a team given its members' type codes."""
+    offense, weak, resist = member_masks(type1, type2)
+    team_offense = int(np.bitwise_or.reduce(offense)) if len(offense) else 0
+    team_weak = int(np.bitwise_or.reduce(weak)) if len(weak) else 0
+    team_resist = int(np.bitwise_or.reduce(resist)) if len(resist) else 0
+    multipliers = defensive_multipliers(type1, type2)
+    defense = [
+        {
+            'type': attacker,
+            'weak': int(np.count_nonzero(multipliers[:, i] > 1)),
+            'resist': int(np.count_nonzero((multipliers[:, i] < 1) & (multipliers[:, i] > 0))),
+            'immune': int(np.count_nonzero(multipliers[:, i] == 0)),
+        }
+        for i, attacker in enumerate(TYPES)
+    ]
+    return {
+        'offense': {
+            'covered': _type_names(team_offense),
+            'missing': _type_names(~team_offense & ALL_TYPES_MASK),
+        },
+        'defense': defense,
+        'open_to': _type_names(team_weak & ~team_resist & ALL_TYPES_MASK),
+        'score': int(coverage_score(team_offense, team_weak, team_resist)),
+    }
+
+
+def _combinations(n, r):
+    """All ``r``-element combinations of ``range(n)`` as rows, in lexicographic order."""
+    teams = np.arange(n, dtype=np.int32)[:, None]
+    for _ in range(r - 1):
+        # Extend every combination with each index after its last one
+        last = teams[:, -1]
+        counts = n - 1 - last
+        rows = np.repeat(np.arange(len(teams)), counts)
+        offsets = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+        teams = np.hstack((teams[rows], (last[rows] + 1 + offsets)[:, None].astype(np.int32)))
+    return teams
+
+
+def suggest_completions(team_type1, team_type2, candidate_type1, candidate_type2, slots=None, limit=5):
+    """Rank ways of filling the team's open slots from the candidates.
+
+    Returns up to ``limit`` ``(candidate_indices, score)`` pairs, best first.
+    Candidates sharing a type pair contribute identical masks, so only the
+    first of each pair is considered.
+    """
+    team_offense, team_weak, team_resist = (
+        np.bitwise_or.reduce(m) if len(m) else np.uint32(0) for m in member_masks(team_type1, team_type2)
+    )
+    open_slots = TEAM_SIZE - len(_codes(team_type1))
+    slots = open_slots if slots is None else min(slots, open_slots)
+
+    candidate_type1, candidate_type2 = _codes(candidate_type1), _codes(candidate_type2)
+    if not len(candidate_type1):
+        return []
+    pairs = np.sort(np.stack((candidate_type1, candidate_type2), axis=1), axis=1)
+    _, first = np.unique(pairs, axis=0, return_index=True)
+    candidates = np.sort(first)
+    slots = min(slots, len(candidates))
+    if slots <= 0 or limit <= 0:
+        return []
+
+    offense, weak, resist = member_masks(candidate_type1[candidates], candidate_type2[candidates])
+
+    if comb(len(candidates), slots) > MAX_CANDIDATE_TEAMS:
+        # Keep the candidates that help most on their own until the search fits
+        alone = coverage_score(team_offense | offense, team_weak | weak, team_resist | resist)
+        keep = len(candidates)
+        while keep > slots and comb(keep, slots) > MAX_CANDIDATE_TEAMS:
+            keep -= 1
+        best = np.sort(np.argsort(-alone, kind='stable')[:keep])
+        candidates, offense, weak, resist = candidates[best], offense[best], weak[best], resist[best]
+
+    teams = _combinations(len(candidates), slots)
+    scores = coverage_score(
+        team_offense | np.bitwise_or.reduce(offense[teams], axis=1),
+        team_weak | np.bitwise_or.reduce(weak[teams], axis=1),
+        team_resist | np.bitwise_or.reduce(resist[teams], axis=1),
+    )
+    # Fewer weaknesses across the added members breaks ties
+    weaknesses = POPCOUNT[weak].astype(np.int32)[teams].sum(axis=1)
+    order = np.lexsort((weaknesses, -scores))[:limit]
+    return [(candidates[teams[i]].tolist(), int(scores[i])) for i in order]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:01
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count, Min
+from django.db.models.functions import Lower
+
+
+def collapse_duplicates(apps, schema_editor):
+    """Keep the lowest id for every case-insensitive name and move favorites onto it."""
+    Pokemon = apps.get_model('PokeApp', 'Pokemon')
+    Favorite = apps.get_model('PokeApp', 'Favorite')
+
+    groups = (
+        Pokemon.objects.annotate(lname=Lower('name'))
+        .values('lname')
+        .annotate(keep_id=Min('id'), count=Count('id'))
+        .filter(count__gt=1)
+    )
+    for group in groups:
+        duplicate_ids = list(
+            Pokemon.objects.annotate(lname=Lower('name'))
+            .filter(lname=group['lname'])
+            .exclude(id=group['keep_id'])
+            .values_list('id', flat=True)
+        )
+        # A user may have favorited several copies; keep one favorite per user
+        seen_users = set(
+            Favorite.objects.filter(pokemon_id=group['keep_id']).values_list('user_id', flat=True)
+        )
+        for fav in Favorite.objects.filter(pokemon_id__in=duplicate_ids).order_by('created_at', 'id'):
+            if fav.user_id in seen_users:
+                fav.delete()
+                continue
+            seen_users.add(fav.user_id)
+            fav.pokemon_id = group['keep_id']
+            fav.save(update_fields=['pokemon'])
+        Pokemon.objects.filter(id__in=duplicate_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PokeApp', '0002_favorite'),
+    ]
+
+    operations = [
+        migrations.RunPython(collapse_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='pokemon',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='pokemon_name_ci_unique'),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:07
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PokeApp', '0003_canonical_pokemon_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pokemon',
+            index=models.Index(fields=['type1', 'id'], name='pokemon_type1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pokemon',
+            index=models.Index(fields=['type2', 'id'], name='pokemon_type2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pokemon',
+            index=models.Index(fields=['hp', 'id'], name='pokemon_hp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pokemon',
+            index=models.Index(fields=['attack', 'id'], name='pokemon_attack_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pokemon',
+            index=models.Index(fields=['defense', 'id'], name='pokemon_defense_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pokemon',
+            index=models.Index(fields=['sp_attack', 'id'], name='pokemon_sp_attack_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pokemon',
+            index=models.Index(fields=['sp_defense', 'id'], name='pokemon_sp_defense_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pokemon',
+            index=models.Index(fields=['speed', 'id'], name='pokemon_speed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pokemon',
+            index=models.Index(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('hp'), '+', models.F('attack')), '+', models.F('defense')), '+', models.F('sp_attack')), '+', models.F('sp_defense')), '+', models.F('speed')), models.F('id'), name='pokemon_total_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pokemon',
+            index=models.Index(fields=['type1', 'hp', 'id'], name='pokemon_type1_hp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pokemon',
+            index=models.Index(fields=['type1', 'attack', 'id'], name='pokemon_type1_attack_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pokemon',
+            index=models.Index(fields=['type1', 'defense', 'id'], name='pokemon_type1_defense_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pokemon',
+            index=models.Index(fields=['type1', 'sp_attack', 'id'], name='pokemon_type1_sp_attack_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pokemon',
+            index=models.Index(fields=['type1', 'sp_defense', 'id'], name='pokemon_type1_sp_defense_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pokemon',
+            index=models.Index(fields=['type1', 'speed', 'id'], name='pokemon_type1_speed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pokemon',
+            index=models.Index(models.F('type1'), django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('hp'), '+', models.F('attack')), '+', models.F('defense')), '+', models.F('sp_attack')), '+', models.F('sp_defense')), '+', models.F('speed')), models.F('id'), name='pokemon_type1_total_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PokeApp', '0004_pokemon_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pokemon',
+            name='image_path',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
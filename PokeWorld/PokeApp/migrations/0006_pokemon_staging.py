@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PokeApp', '0005_pokemon_image_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PokemonStaging',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(unique=True)),
+                ('type1', models.CharField(max_length=50)),
+                ('type2', models.CharField(blank=True, max_length=50, null=True)),
+                ('hp', models.IntegerField()),
+                ('attack', models.IntegerField()),
+                ('defense', models.IntegerField()),
+                ('sp_attack', models.IntegerField()),
+                ('sp_defense', models.IntegerField()),
+                ('speed', models.IntegerField()),
+                ('image_url', models.URLField(blank=True, null=True)),
+            ],
+        ),
+    ]
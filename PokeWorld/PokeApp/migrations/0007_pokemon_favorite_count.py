@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:03
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_favorites(apps, schema_editor):
+    """Fill the new counter from the existing favorites in one UPDATE."""
+    Pokemon = apps.get_model('PokeApp', 'Pokemon')
+    Favorite = apps.get_model('PokeApp', 'Favorite')
+    counts = (
+        Favorite.objects.filter(pokemon=OuterRef('pk')).order_by()
+        .values('pokemon').annotate(count=Count('id')).values('count')
+    )
+    Pokemon.objects.update(favorite_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PokeApp', '0006_pokemon_staging'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pokemon',
+            name='favorite_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='pokemon',
+            index=models.Index(models.OrderBy(models.F('favorite_count'), descending=True), models.F('id'), name='pokemon_favorite_count_idx'),
+        ),
+        migrations.RunPython(count_favorites, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:14
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PokeApp', '0008_favorite_user_recent_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='pokemon',
+            name='pokemon_type2_idx',
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+from django.db.models.functions import Lower
+
+
+def lowercase_types(apps, schema_editor):
+    # Rows saved before types were normalised on write, e.g. through the admin
+    Pokemon = apps.get_model('PokeApp', 'Pokemon')
+    Pokemon.objects.update(type1=Lower('type1'), type2=Lower('type2'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PokeApp', '0009_drop_pokemon_type2_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_types, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PokeApp', '0010_lowercase_pokemon_types'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pokemon',
+            name='favorite_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,9 +1,21 @@
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Lower
 from django.utils.text import slugify
 from django.contrib.auth.models import User
 
 # Create your models here.
 
+def stat_total():
+    """Base-stat total as an expression; matches the expression index on Pokemon."""
+    return F('hp') + F('attack') + F('defense') + F('sp_attack') + F('sp_defense') + F('speed')
+
+
+def normalize_type(value):
+    """Types are stored lower-case so type filters can compare them exactly against the indexes."""
+    return value.lower() if value else value
+
+
 class Pokemon(models.Model):
     name = models.CharField(max_length=100, unique=True)
     type1 = models.CharField(max_length=50)
@@ -17,21 +29,85 @@ class Pokemon(models.Model):
     image_url = models.URLField(null=True, blank=True)
     slug = models.SlugField(unique=True, blank=True)  
     # Images saved as url
+    # Locally mirrored copy of image_url, relative to MEDIA_ROOT (see PokeApp.images)
+    image_path = models.CharField(max_length=255, blank=True, default='')
+    # Denormalised number of Favorite rows; kept in step by PokeApp.favorites and the
+    # Favorite signals, repaired by the reconcile_favorite_counts command. Only those
+    # F() updates write it: forms never see it and full saves leave it out
+    favorite_count = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        constraints = [
+            # One canonical row per name regardless of case, so list views need no dedup
+            models.UniqueConstraint(Lower('name'), name='pokemon_name_ci_unique'),
+        ]
+        # Every filter/sort column is paired with id so keyset pages are a single range scan.
+        # type2 has no index: SQLite would pick it and sort every match, while walking
+        # the sort column's index and filtering on type2 stops after one page of rows
+        indexes = [
+            models.Index(fields=['type1', 'id'], name='pokemon_type1_idx'),
+            models.Index(fields=['hp', 'id'], name='pokemon_hp_idx'),
+            models.Index(fields=['attack', 'id'], name='pokemon_attack_idx'),
+            models.Index(fields=['defense', 'id'], name='pokemon_defense_idx'),
+            models.Index(fields=['sp_attack', 'id'], name='pokemon_sp_attack_idx'),
+            models.Index(fields=['sp_defense', 'id'], name='pokemon_sp_defense_idx'),
+            models.Index(fields=['speed', 'id'], name='pokemon_speed_idx'),
+            models.Index(stat_total(), F('id'), name='pokemon_total_idx'),
+            # Primary type + stat sort is the most common filtered listing
+            models.Index(fields=['type1', 'hp', 'id'], name='pokemon_type1_hp_idx'),
+            models.Index(fields=['type1', 'attack', 'id'], name='pokemon_type1_attack_idx'),
+            models.Index(fields=['type1', 'defense', 'id'], name='pokemon_type1_defense_idx'),
+            models.Index(fields=['type1', 'sp_attack', 'id'], name='pokemon_type1_sp_attack_idx'),
+            models.Index(fields=['type1', 'sp_defense', 'id'], name='pokemon_type1_sp_defense_idx'),
+            models.Index(fields=['type1', 'speed', 'id'], name='pokemon_type1_speed_idx'),
+            models.Index(F('type1'), stat_total(), F('id'), name='pokemon_type1_total_idx'),
+            # Most-favorited leaderboard reads the top of this index
+            models.Index(F('favorite_count').desc(), F('id'), name='pokemon_favorite_count_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)  # örn: "Pikachu" -> "pikachu"
+        self.type1, self.type2 = normalize_type(self.type1), normalize_type(self.type2)
+        if not self._state.adding and kwargs.get('update_fields') is None and not args:
+            # The loaded favorite_count may be stale by now; writing it back would lose increments
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname != 'favorite_count'
+            ]
         super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
 
 
+class PokemonStaging(models.Model):
+    """Scratch copy of the Pokémon columns that ``reload_pokedex`` fills before swapping it in."""
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(unique=True)
+    type1 = models.CharField(max_length=50)
+    type2 = models.CharField(max_length=50, null=True, blank=True)
+    hp = models.IntegerField()
+    attack = models.IntegerField()
+    defense = models.IntegerField()
+    sp_attack = models.IntegerField()
+    sp_defense = models.IntegerField()
+    speed = models.IntegerField()
+    image_url = models.URLField(null=True, blank=True)
+
+    def __str__(self):
+        return self.name
+
+
 class Favorite(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='favorites')
     pokemon = models.ForeignKey('Pokemon', on_delete=models.CASCADE, related_name='favorited_by')
     created_at = models.DateTimeField(auto_now_add=True)
     class Meta:
         unique_together = ('user', 'pokemon')
+        indexes = [
+            # A page of the favorites list is one range scan, newest first
+            models.Index(fields=['user', '-created_at', '-id'], name='favorite_user_recent_idx'),
+        ]
     def __str__(self):
         return f"{self.user.username} - {self.pokemon.name}"
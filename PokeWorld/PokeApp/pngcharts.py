@@ -0,0 +1,80 @@
+"""Matplotlib/Seaborn chart rendering.
+
+Importing this module pulls in pandas, matplotlib, seaborn and numpy, so it is
+only imported from ``charts.render_png_charts`` when a PNG has to be drawn.
+"""
+import os
+import tempfile
+
+from . import charts
+from .constants import STAT_LABELS
+
+# Third-party imports
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import seaborn as sns
+import numpy as np
+
+
+def render(spec, directory):
+    """Draw the radar and bar charts for ``spec`` into ``directory``."""
+    os.makedirs(directory, exist_ok=True)
+    chart_color = spec['color1']
+    secondary_chart_color = spec['color2']
+    df = pd.DataFrame({'stat': STAT_LABELS, 'value': spec['values']})
+
+    # Generate Radar Chart with type color
+    categories = df['stat'].tolist()
+    values = df['value'].tolist()
+    values += values[:1]
+
+    angles = np.linspace(0, 2*np.pi, len(categories), endpoint=False).tolist()
+    angles += angles[:1]
+
+    fig, ax = plt.subplots(figsize=(5,5), subplot_kw=dict(polar=True))
+
+    # Use gradient effect for dual-type Pokémon
+    if secondary_chart_color:
+        ax.plot(angles, values, color=chart_color, linewidth=2)
+        ax.fill(angles, values, color=chart_color, alpha=0.3)
+        # Add a subtle overlay with secondary color
+        ax.fill(angles, values, color=secondary_chart_color, alpha=0.1)
+    else:
+        ax.plot(angles, values, color=chart_color, linewidth=2)
+        ax.fill(angles, values, color=chart_color, alpha=0.25)
+
+    ax.set_thetagrids(np.degrees(angles[:-1]), categories)
+    _save_figure(fig, charts.chart_path('radar', spec, directory))
+    plt.close(fig)
+
+    # Generate Bar Chart with type color
+    fig = plt.figure(figsize=(6,4))
+
+    if secondary_chart_color:
+        # Create alternating colors for dual-type Pokémon
+        custom_palette = [chart_color if i % 2 == 0 else secondary_chart_color for i in range(len(df))]
+    else:
+        # Use single color for single-type Pokémon
+        custom_palette = [chart_color] * len(df)
+
+    sns.barplot(x='stat', y='value', data=df, palette=custom_palette)
+    plt.title(f"{spec['name']} Stats")
+    _save_figure(fig, charts.chart_path('bar', spec, directory))
+    plt.close(fig)
+
+
+def _save_figure(fig, path):
+    # Write to a temp file first so a concurrent request never serves half a PNG;
+    # mkstemp gives every thread and process its own name
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            fig.savefig(f, format='png', bbox_inches='tight')
+        # mkstemp creates the file private to its owner; charts are served as media
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
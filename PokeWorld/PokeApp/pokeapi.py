@@ -0,0 +1,225 @@
+"""Concurrent PokeAPI client used by ``fetch_pokemon``.
+
+One ``requests.Session`` is shared by a thread pool, so connections are kept
+alive and reused. A token bucket caps the request rate across all threads,
+and transient failures (connection errors, truncated bodies, 429 and 5xx
+responses) are retried with exponential backoff, honouring ``Retry-After``;
+any other ``requests`` error is reported as a ``FetchError``. Responses are handed back
+to the calling thread, which is the only one that touches the database.
+
+With a ``ResponseCache`` every payload is kept on disk next to its ``ETag`` and
+``Last-Modified`` validators, and later requests for the same URL are
+conditional: a ``304 Not Modified`` answers from the cached copy.
+"""
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = "https://pokeapi.co/api/v2"
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE = 20.0  # requests per second
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5  # seconds before the first retry, doubled each time
+DEFAULT_TIMEOUT = 10.0
+MAX_BACKOFF = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    pass
+
+
+class RateLimiter:
+    """Thread-safe token bucket allowing ``rate`` calls per second with bursts of ``burst``."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class ResponseCache:
+    """JSON response bodies and their validators on disk, one file per URL."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest()[:32] + '.json')
+
+    def get(self, url):
+        """The cached ``{'url', 'etag', 'last_modified', 'data'}`` entry for ``url``, or ``None``."""
+        try:
+            with open(self._path(url), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get('url') == url else None
+
+    def put(self, url, headers, data):
+        entry = {
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'data': data,
+        }
+        # Write then rename, so an interrupted run never leaves a truncated entry behind
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp, self._path(url))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+def _conditional_headers(entry):
+    headers = {}
+    if entry and entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry and entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+class PokeAPIClient:
+    def __init__(self, base_url=DEFAULT_BASE_URL, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, timeout=DEFAULT_TIMEOUT, cache=None):
+        self.base_url = base_url.rstrip('/')
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limiter = RateLimiter(rate)
+        self.cache = cache
+        # Responses answered from the cache after a 304
+        self.not_modified = 0
+        self._counter_lock = threading.Lock()
+        self.session = requests.Session()
+        # One pooled keep-alive connection per worker thread
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def pokemon_url(self, number):
+        return f"{self.base_url}/pokemon/{number}/"
+
+    def _delay(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), MAX_BACKOFF)
+        # Full jitter keeps retrying workers from hitting the server in lockstep
+        return random.uniform(0, min(MAX_BACKOFF, self.backoff * 2 ** attempt))
+
+    def get(self, url, headers=None):
+        """GET ``url``, retrying transient failures; returns a 2xx or 304 response.
+
+        Raises ``FetchError`` for every failure, including ``requests`` errors.
+        """
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            response = None
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                error = FetchError(f"{url}: {e}")
+            except requests.RequestException as e:
+                # Bad URLs, redirect loops, undecodable bodies: retrying won't help
+                raise FetchError(f"{url}: {e}") from e
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    if response.status_code >= 300 and response.status_code != 304:
+                        raise FetchError(f"{url}: HTTP {response.status_code}")
+                    return response
+                error = FetchError(f"{url}: HTTP {response.status_code}")
+            if attempt < self.retries:
+                time.sleep(self._delay(attempt, response))
+        raise error
+
+    def get_json(self, url):
+        """GET ``url`` and decode it.
+
+        With a cache the request is conditional on the cached copy's validators.
+        """
+        entry = self.cache.get(url) if self.cache else None
+        response = self.get(url, _conditional_headers(entry))
+        if response.status_code == 304:
+            if not entry:
+                raise FetchError(f"{url}: HTTP 304 without a cached copy")
+            with self._counter_lock:
+                self.not_modified += 1
+            return entry['data']
+        try:
+            data = response.json()
+        except ValueError:
+            raise FetchError(f"{url}: invalid JSON")
+        if self.cache:
+            self.cache.put(url, response.headers, data)
+        return data
+
+    def fetch_pokemon(self, numbers):
+        """Fetch every Pokémon in ``numbers`` concurrently.
+
+        Yields ``(number, data, error)`` in completion order; exactly one of
+        ``data`` and ``error`` is set.
+        """
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = {pool.submit(self.get_json, self.pokemon_url(n)): n for n in numbers}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except FetchError as e:
+                    yield futures[future], None, e
+
+
+def parse_pokemon(data):
+    """Turn a PokeAPI ``/pokemon/`` payload into ``Pokemon`` field values (the slug is left to ``ingest``)."""
+    stats = {stat['stat']['name']: stat['base_stat'] for stat in data['stats']}
+    types = [t['type']['name'] for t in sorted(data['types'], key=lambda t: t.get('slot', 0))]
+    return {
+        'name': data['name'].capitalize(),
+        'type1': types[0],
+        'type2': types[1] if len(types) > 1 else None,
+        'hp': stats['hp'],
+        'attack': stats['attack'],
+        'defense': stats['defense'],
+        'sp_attack': stats['special-attack'],
+        'sp_defense': stats['special-defense'],
+        'speed': stats['speed'],
+        'image_url': data['sprites']['other']['official-artwork']['front_default'],
+    }
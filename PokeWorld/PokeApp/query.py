@@ -0,0 +1,77 @@
+"""Turns ``/api/pokemons/`` query parameters into an index-friendly queryset.
+
+Supported parameters:
+
+* ``type1`` / ``type2`` – exact type (case-insensitive), ``type`` – either slot
+* ``<stat>_min`` / ``<stat>_max`` – inclusive range on any stat or ``total``
+* ``sort`` – ``id``, ``name``, any stat or ``total``; prefix with ``-`` for descending
+
+Every ordering ends with ``id`` in the same direction as the sort key, so it
+matches one of the ``(column, id)`` indexes on ``Pokemon`` and the database
+can walk a single index forwards or backwards for each keyset page.
+"""
+from django.db.models import Q
+
+from .constants import STAT_FIELDS
+from .models import Pokemon, stat_total
+
+RANGE_FIELDS = STAT_FIELDS + ['total']
+SORT_FIELDS = ['id', 'name'] + RANGE_FIELDS
+DEFAULT_SORT = 'id'
+
+
+class QueryError(ValueError):
+    pass
+
+
+def _int_param(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise QueryError(f"{name} must be an integer")
+
+
+def plan_pokemon_query(params, queryset=None):
+    """Return ``(queryset, ordering)`` for the filters and sort in ``params``."""
+    queryset = Pokemon.objects.all() if queryset is None else queryset
+
+    sort = params.get('sort') or DEFAULT_SORT
+    descending = sort.startswith('-')
+    sort_field = sort.lstrip('-')
+    if sort_field not in SORT_FIELDS:
+        raise QueryError(f"sort must be one of: {', '.join(SORT_FIELDS)}")
+
+    ranges = {}
+    for field in RANGE_FIELDS:
+        low, high = _int_param(params, f"{field}_min"), _int_param(params, f"{field}_max")
+        if low is not None or high is not None:
+            ranges[field] = (low, high)
+
+    # The total is only computed when something needs it; the expression is the
+    # same one the pokemon_total_idx index is built on
+    if sort_field == 'total' or 'total' in ranges:
+        queryset = queryset.annotate(total=stat_total())
+
+    # Every write path stores types lower-case (see models.normalize_type), so exact matches can use the index
+    for slot in ('type1', 'type2'):
+        if params.get(slot):
+            queryset = queryset.filter(**{slot: params[slot].lower()})
+    if params.get('type'):
+        pokemon_type = params['type'].lower()
+        queryset = queryset.filter(Q(type1=pokemon_type) | Q(type2=pokemon_type))
+
+    for field, (low, high) in ranges.items():
+        if low is not None:
+            queryset = queryset.filter(**{f"{field}__gte": low})
+        if high is not None:
+            queryset = queryset.filter(**{f"{field}__lte": high})
+
+    prefix = '-' if descending else ''
+    if sort_field == 'id':
+        ordering = [f"{prefix}id"]
+    else:
+        ordering = [f"{prefix}{sort_field}", f"{prefix}id"]
+    return queryset, ordering
@@ -0,0 +1,168 @@
+"""Replace the whole Pokédex without the site ever showing an empty table.
+
+A reload happens in three steps:
+
+1. ``stage_records`` fills ``PokemonStaging`` with the fresh data. This is
+   the slow part (fetching, parsing, inserting), and the live table is not
+   touched.
+2. ``validate_staging`` rejects staging data that is empty, much smaller than
+   the live table, or internally inconsistent.
+3. ``swap_in`` merges the staged rows into the live table inside one short
+   transaction of three set-based statements. Favorites of Pokémon that are no
+   longer staged are deleted, those Pokémon are deleted, and every staged row
+   is upserted by slug. Rows keep their ids, so favorites stay attached to
+   the same slug.
+
+Readers see the old data until the commit and the new data right after it.
+"""
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef
+from django.db.models.functions import Lower
+
+from . import charts, dataset, search
+from .constants import STAT_FIELDS
+from .favorites import invalidate_favorite_ids
+from .ingest import with_slugs
+from .models import Favorite, Pokemon, PokemonStaging
+
+DEFAULT_BATCH_SIZE = 500
+# A staged Pokédex much smaller than the live one is more likely a failed fetch than a real change
+DEFAULT_MIN_RATIO = 0.9
+STAGED_FIELDS = ['name', 'slug', 'type1', 'type2', *STAT_FIELDS, 'image_url']
+
+SwapReport = namedtuple('SwapReport', 'inserted updated deleted favorites_dropped')
+
+
+class ReloadError(Exception):
+    pass
+
+
+def stage_records(records, batch_size=DEFAULT_BATCH_SIZE):
+    """Replace the staging table's contents with ``records``; returns how many were staged."""
+    records = with_slugs(records)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {connection.ops.quote_name(PokemonStaging._meta.db_table)}')
+        PokemonStaging.objects.bulk_create(
+            (PokemonStaging(**{field: record.get(field) for field in STAGED_FIELDS}) for record in records),
+            batch_size=batch_size,
+        )
+    return len(records)
+
+
+def validate_staging(min_ratio=DEFAULT_MIN_RATIO):
+    """Problems that should stop a swap; empty when the staged data looks sound."""
+    problems = []
+    staged = PokemonStaging.objects.count()
+    live = Pokemon.objects.count()
+    if not staged:
+        return ["Nothing is staged"]
+    if staged < live * min_ratio:
+        problems.append(f"Only {staged} Pokémon are staged for {live} live ones (minimum ratio {min_ratio:.0%})")
+    duplicate_names = (
+        PokemonStaging.objects.annotate(lname=Lower('name')).values('lname')
+        .annotate(count=Count('id')).filter(count__gt=1).values_list('lname', flat=True)[:5]
+    )
+    if duplicate_names:
+        problems.append(f"Duplicate names: {', '.join(duplicate_names)}")
+    # The upsert renames rows one at a time, so a name still held by another surviving
+    # row would break the case-insensitive unique constraint halfway through the swap
+    taken_names = (
+        PokemonStaging.objects.annotate(lname=Lower('name'))
+        .filter(lname__in=Pokemon.objects.filter(slug__in=PokemonStaging.objects.values('slug'))
+                .annotate(lname=Lower('name')).values('lname'))
+        .exclude(lname__in=Pokemon.objects.annotate(lname=Lower('name')).filter(
+            slug=OuterRef('slug')).values('lname'))
+        .values_list('lname', flat=True)[:5]
+    )
+    if taken_names:
+        problems.append(f"Names still held by other Pokémon: {', '.join(taken_names)}")
+    for field in STAT_FIELDS:
+        if PokemonStaging.objects.filter(**{f'{field}__lt': 0}).exists():
+            problems.append(f"Negative {field} values")
+    if PokemonStaging.objects.filter(type1='').exists():
+        problems.append("Pokémon without a primary type")
+    return problems
+
+
+def _distinct(column):
+    # Null-safe "differs from" for ON CONFLICT ... DO UPDATE ... WHERE
+    if connection.vendor == 'sqlite':
+        return f'{column} IS NOT excluded.{column.split(".")[-1]}'
+    return f'{column} IS DISTINCT FROM excluded.{column.split(".")[-1]}'
+
+
+def _statements():
+    qn = connection.ops.quote_name
+    pokemon, staging, favorite = (
+        qn(model._meta.db_table) for model in (Pokemon, PokemonStaging, Favorite)
+    )
+    stale = f'SELECT id FROM {pokemon} WHERE slug NOT IN (SELECT slug FROM {staging})'
+    columns = ', '.join(qn(field) for field in STAGED_FIELDS)
+    updates = [field for field in STAGED_FIELDS if field != 'slug']
+    # A mirror of the old artwork is no mirror of the new one
+    image_path, image_url = qn('image_path'), f'{pokemon}.{qn("image_url")}'
+    return {
+        'report': (
+            f'SELECT (SELECT COUNT(*) FROM {staging}), (SELECT COUNT(*) FROM {pokemon}), '
+            f'(SELECT COUNT(*) FROM {pokemon} WHERE id IN ({stale})), '
+            f'(SELECT COUNT(*) FROM {favorite} WHERE pokemon_id IN ({stale}))'
+        ),
+        'affected_users': f'SELECT DISTINCT user_id FROM {favorite} WHERE pokemon_id IN ({stale})',
+        'stale_slugs': f'SELECT slug FROM {pokemon} WHERE id IN ({stale})',
+        'delete_favorites': f'DELETE FROM {favorite} WHERE pokemon_id IN ({stale})',
+        'delete_pokemons': f'DELETE FROM {pokemon} WHERE id IN ({stale})',
+        # "WHERE 1 = 1" keeps SQLite from reading ON CONFLICT as part of a join
+        'upsert': (
+            f'INSERT INTO {pokemon} ({columns}, {qn("image_path")}, {qn("favorite_count")}) '
+            f"SELECT {columns}, '', 0 FROM {staging} WHERE 1 = 1 "
+            f'ON CONFLICT ({qn("slug")}) DO UPDATE SET '
+            + ', '.join(f'{qn(field)} = excluded.{qn(field)}' for field in updates)
+            + f", {image_path} = CASE WHEN {_distinct(image_url)} THEN '' ELSE {pokemon}.{image_path} END"
+            + ' WHERE '
+            + ' OR '.join(_distinct(f'{pokemon}.{qn(field)}') for field in updates)
+        ),
+    }
+
+
+def swap_in(min_ratio=DEFAULT_MIN_RATIO, force=False):
+    """Make the staged rows the live Pokédex in one transaction; returns a ``SwapReport``.
+
+    Raises ``ReloadError`` (and changes nothing) when validation fails, unless ``force``.
+    """
+    problems = validate_staging(min_ratio)
+    if problems and not (force and PokemonStaging.objects.exists()):
+        raise ReloadError('; '.join(problems))
+
+    sql = _statements()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql['report'])
+        staged, live, deleted, favorites_dropped = cursor.fetchone()
+        cursor.execute(sql['affected_users'])
+        user_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute(sql['stale_slugs'])
+        stale_slugs = [row[0] for row in cursor.fetchall()]
+
+        cursor.execute(sql['delete_favorites'])
+        cursor.execute(sql['delete_pokemons'])
+        cursor.execute(sql['upsert'])
+        written = cursor.rowcount
+        inserted = staged - (live - deleted)
+        transaction.on_commit(lambda: _refresh_derived_data(user_ids, stale_slugs))
+    return SwapReport(inserted, max(0, written - inserted), deleted, favorites_dropped)
+
+
+def clear_staging():
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {connection.ops.quote_name(PokemonStaging._meta.db_table)}')
+
+
+def _refresh_derived_data(user_ids, stale_slugs):
+    # Charts are keyed by content, so only the removed Pokémon leave files to clean up
+    charts.invalidate_many(dict.fromkeys(stale_slugs))
+    search.reset_search_index()
+    dataset.bump_version()
+    for user_id in user_ids:
+        invalidate_favorite_ids(user_id)
@@ -0,0 +1,232 @@
+"""In-memory typeahead index over Pokémon names and types.
+
+The index keeps a sorted name list for prefix lookups and a trigram inverted
+index for substring and fuzzy (misspelled) matches. It is built once per
+process and then patched from the Pokemon save/delete signals, so queries
+never touch the database. Like the analytics snapshot it is tagged with the
+dataset version it was built from and rebuilt once that moves on, which is
+how writes made in other processes reach it. A save or delete patched in here
+moves the index on with the version bump it causes, so it costs no rebuild.
+"""
+import bisect
+import heapq
+import threading
+from collections import Counter, defaultdict, namedtuple
+
+from django.db import DatabaseError, connection
+
+from . import dataset
+from .models import Pokemon
+
+Entry = namedtuple('Entry', 'id name slug type1 type2 image_url')
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+# Fuzzy matches below this trigram similarity are dropped
+MIN_SIMILARITY = 0.3
+# Trigrams shared by more than this many entries are too common to rank on their own
+MAX_POSTING_SIZE = 2000
+# How many trigram-overlap candidates get an exact similarity score per result
+FUZZY_CANDIDATES_PER_RESULT = 5
+
+SCORE_EXACT = 4.0
+SCORE_PREFIX = 3.0
+SCORE_TYPE = 2.0
+
+
+def _normalize(text):
+    return ' '.join((text or '').lower().split())
+
+
+def trigrams(text):
+    """pg_trgm style trigrams: each word padded with two leading and one trailing space."""
+    grams = set()
+    for word in _normalize(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class SearchIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.built = False
+        self.version = None
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.entries = {}
+            self.names = []  # sorted (normalized name, id) pairs for prefix search
+            self.grams = {}  # id -> trigram set
+            self.postings = defaultdict(set)  # trigram -> ids
+            self.types = defaultdict(set)  # normalized type -> ids
+
+    def build(self, pokemons, version=None):
+        with self._lock:
+            self.clear()
+            for pokemon in pokemons:
+                self._insert(pokemon)
+            self.names.sort()
+            self.built = True
+            self.version = version
+
+    def add(self, pokemon):
+        with self._lock:
+            self._remove(pokemon.id)
+            key = self._insert(pokemon)
+            self.names.pop()
+            bisect.insort(self.names, key)
+
+    def remove(self, pokemon_id):
+        with self._lock:
+            self._remove(pokemon_id)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _insert(self, pokemon):
+        entry = Entry(pokemon.id, pokemon.name, pokemon.slug, pokemon.type1, pokemon.type2, pokemon.image_url)
+        self.entries[entry.id] = entry
+        key = (_normalize(entry.name), entry.id)
+        self.names.append(key)
+        grams = trigrams(entry.name)
+        self.grams[entry.id] = grams
+        for gram in grams:
+            self.postings[gram].add(entry.id)
+        for pokemon_type in (entry.type1, entry.type2):
+            if pokemon_type:
+                self.types[_normalize(pokemon_type)].add(entry.id)
+        return key
+
+    def _remove(self, pokemon_id):
+        entry = self.entries.pop(pokemon_id, None)
+        if entry is None:
+            return
+        key = (_normalize(entry.name), entry.id)
+        i = bisect.bisect_left(self.names, key)
+        if i < len(self.names) and self.names[i] == key:
+            del self.names[i]
+        for gram in self.grams.pop(pokemon_id, ()):
+            ids = self.postings[gram]
+            ids.discard(pokemon_id)
+            if not ids:
+                del self.postings[gram]
+        for pokemon_type in (entry.type1, entry.type2):
+            if pokemon_type:
+                ids = self.types[_normalize(pokemon_type)]
+                ids.discard(pokemon_id)
+                if not ids:
+                    del self.types[_normalize(pokemon_type)]
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """Return up to ``limit`` ``(score, Entry)`` pairs, best match first."""
+        q = _normalize(query)
+        if not q:
+            return []
+        with self._lock:
+            scores = {}
+
+            # Prefix matches straight from the sorted name list
+            i = bisect.bisect_left(self.names, (q,))
+            while i < len(self.names) and self.names[i][0].startswith(q) and len(scores) < limit:
+                name, pokemon_id = self.names[i]
+                # Shorter names are closer to what was typed
+                scores[pokemon_id] = SCORE_EXACT if name == q else SCORE_PREFIX + len(q) / len(name)
+                i += 1
+
+            # Type names ("fire", "fir") list Pokémon of that type
+            if len(scores) < limit:
+                for pokemon_type, ids in self.types.items():
+                    if pokemon_type.startswith(q):
+                        for pokemon_id in heapq.nsmallest(limit, ids):
+                            scores.setdefault(pokemon_id, SCORE_TYPE)
+
+            # Substring and misspelling matches ranked by trigram similarity
+            if len(scores) < limit:
+                self._fuzzy(q, scores, limit)
+
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], self.entries[item[0]].name))
+            return [(score, self.entries[pokemon_id]) for pokemon_id, score in ranked[:limit]]
+
+    def _fuzzy(self, q, scores, limit):
+        query_grams = trigrams(q)
+        if not query_grams:
+            return
+        postings = [self.postings[g] for g in query_grams if g in self.postings]
+        selective = [ids for ids in postings if len(ids) <= MAX_POSTING_SIZE] or sorted(postings, key=len)[:1]
+        shared = Counter()
+        for ids in selective:
+            shared.update(ids)
+        # Only the entries sharing the most trigrams can be close; score those exactly
+        for pokemon_id, _ in shared.most_common(limit * FUZZY_CANDIDATES_PER_RESULT):
+            if pokemon_id in scores:
+                continue
+            grams = self.grams[pokemon_id]
+            overlap = len(query_grams & grams)
+            similarity = overlap / (len(query_grams) + len(grams) - overlap)
+            if similarity >= MIN_SIMILARITY:
+                scores[pokemon_id] = similarity
+
+
+_index = SearchIndex()
+
+
+def _current(version):
+    return _index.built and _index.version == version
+
+
+def get_index():
+    """Return the process-wide index, rebuilding it if the dataset has changed."""
+    # Read the version before the rows, so a change made in between triggers another rebuild
+    version = dataset.get_version()
+    if not _current(version):
+        with _index._lock:
+            if not _current(version):
+                _index.build(
+                    Pokemon.objects.only('id', 'name', 'slug', 'type1', 'type2', 'image_url').iterator(),
+                    version,
+                )
+    return _index
+
+
+def reset_search_index():
+    """Forget the current index; the next search rebuilds it from the database."""
+    with _index._lock:
+        _index.clear()
+        _index.built = False
+        _index.version = None
+
+
+def bump_version_after_patch():
+    """Bump the dataset version for a change this process already patched into the index.
+
+    The index follows the bump only if it was current just before it, so a
+    change made anywhere else in between still triggers a rebuild.
+    """
+    with _index._lock:
+        version = dataset.bump_version()
+        if _index.built and _index.version == version - 1:
+            _index.version = version
+
+
+def warm_search_index():
+    """Build the index while a worker starts so the first search is already fast."""
+    try:
+        get_index()
+    except DatabaseError:
+        # Tables may not exist yet (e.g. before the first migrate); build lazily later
+        pass
+    finally:
+        # Don't hand a connection opened at import time over to forked workers
+        connection.close()
+
+
+def index_pokemon(pokemon):
+    if _index.built:
+        _index.add(pokemon)
+
+
+def unindex_pokemon(pokemon_id):
+    if _index.built:
+        _index.remove(pokemon_id)
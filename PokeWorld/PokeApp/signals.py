@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import charts, search
+from .favorites import invalidate_favorite_ids
+from .models import Pokemon, Favorite
+
+
+@receiver(post_save, sender=Pokemon)
+def drop_stale_charts(sender, instance, **kwargs):
+    # Charts are keyed by their content, so anything else stored for this slug is outdated
+    charts.invalidate(instance.slug, keep_key=charts.chart_spec(instance)['key'])
+
+
+@receiver(post_delete, sender=Pokemon)
+def drop_deleted_charts(sender, instance, **kwargs):
+    charts.invalidate(instance.slug)
+
+
+@receiver(post_save, sender=Pokemon)
+def update_search_index(sender, instance, **kwargs):
+    search.index_pokemon(instance)
+
+
+@receiver(post_delete, sender=Pokemon)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.unindex_pokemon(instance.pk)
+
+
+@receiver(post_save, sender=Pokemon)
+@receiver(post_delete, sender=Pokemon)
+def bump_dataset_version(sender, instance, **kwargs):
+    # Bump after commit so no worker rebuilds from rows it cannot see yet; this
+    # process's search index was patched above and just follows the new version
+    transaction.on_commit(search.bump_version_after_patch)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def refresh_favorite_ids(sender, instance, **kwargs):
+    invalidate_favorite_ids(instance.user_id)
+
+
+@receiver(post_save, sender=Favorite)
+def count_added_favorite(sender, instance, created, **kwargs):
+    if created:
+        Pokemon.objects.filter(pk=instance.pokemon_id).update(favorite_count=F('favorite_count') + 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def count_removed_favorite(sender, instance, **kwargs):
+    Pokemon.objects.filter(pk=instance.pokemon_id).update(favorite_count=F('favorite_count') - 1)
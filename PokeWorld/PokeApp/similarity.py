@@ -0,0 +1,200 @@
+"""Nearest neighbours over the six base stats ("Pokémon with similar stats").
+
+A k-d tree is built over the stat vectors of the analytics snapshot when that
+snapshot is first used. Every query then visits O(log n) nodes instead of
+measuring the distance to every Pokémon. Trees for type-filtered or
+normalised searches are built on first use, and recent answers are kept in a
+small LRU cache. All of it is dropped together with the snapshot once the
+dataset version changes.
+"""
+import heapq
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from . import analytics
+
+LEAF_SIZE = 256
+DEFAULT_K = 6
+MAX_K = 50
+# Answers kept per snapshot; a detail page view repeats the same lookup
+RESULT_CACHE_SIZE = 4096
+
+
+class KDTree:
+    """Static k-d tree with Euclidean k-nearest-neighbour queries.
+
+    Nodes live in flat arrays. Leaves hold a contiguous slice of ``order``, so
+    a leaf is scanned with a single vectorised distance computation.
+    """
+
+    def __init__(self, points, leaf_size=LEAF_SIZE):
+        self.points = np.ascontiguousarray(points, dtype=np.float64)
+        n, dims = self.points.shape
+        self.order = np.arange(n)
+        self.leaf_size = leaf_size
+
+        # Per node: slice of ``order`` it covers, children (-1 for leaves) and bounding box
+        starts, ends, lefts, rights, lows, highs = [], [], [], [], [], []
+
+        def add_node(start, end):
+            chunk = self.points[self.order[start:end]]
+            starts.append(start)
+            ends.append(end)
+            lefts.append(-1)
+            rights.append(-1)
+            lows.append(chunk.min(axis=0) if end > start else np.zeros(dims))
+            highs.append(chunk.max(axis=0) if end > start else np.zeros(dims))
+            return len(starts) - 1
+
+        stack = [add_node(0, n)] if n else []
+        while stack:
+            node = stack.pop()
+            start, end = starts[node], ends[node]
+            if end - start <= leaf_size:
+                continue
+            # Split the widest dimension at the median
+            dim = int(np.argmax(highs[node] - lows[node]))
+            middle = (end - start) // 2
+            segment = self.order[start:end]
+            segment[:] = segment[np.argpartition(self.points[segment, dim], middle)]
+            lefts[node] = add_node(start, start + middle)
+            rights[node] = add_node(start + middle, end)
+            stack.extend((lefts[node], rights[node]))
+
+        self.starts = np.array(starts, dtype=np.int64)
+        self.ends = np.array(ends, dtype=np.int64)
+        self.lefts = np.array(lefts, dtype=np.int64)
+        self.rights = np.array(rights, dtype=np.int64)
+        self.lows = np.array(lows).reshape(-1, dims)
+        self.highs = np.array(highs).reshape(-1, dims)
+        # Plain lists are much cheaper than NumPy scalars to walk node by node
+        self._nodes = (lefts, rights, starts, ends)
+
+    def __len__(self):
+        return len(self.points)
+
+    def query(self, point, k=DEFAULT_K, exclude=None):
+        """Return ``(indices, distances)`` of the ``k`` points closest to ``point``.
+
+        ``exclude`` is a point index to skip, typically the query point itself.
+        """
+        point = np.asarray(point, dtype=np.float64)
+        best_rows = np.empty(0, dtype=np.int64)
+        best_dist = np.empty(0)
+        if not len(self.points) or k <= 0:
+            return best_rows, best_dist
+
+        lefts, rights, starts, ends = self._nodes
+        kth = np.inf  # squared distance of the current k-th best match
+        # Best-first over nodes by the squared distance to their bounding box
+        heap = [(0.0, 0)]
+        while heap:
+            bound, node = heapq.heappop(heap)
+            if bound > kth:
+                break
+            left = lefts[node]
+            if left != -1:
+                children = [left, rights[node]]
+                gap = np.maximum(self.lows[children] - point, 0) + np.maximum(point - self.highs[children], 0)
+                for child, child_bound in zip(children, np.einsum('ij,ij->i', gap, gap).tolist()):
+                    if child_bound <= kth:
+                        heapq.heappush(heap, (child_bound, child))
+                continue
+
+            rows = self.order[starts[node]:ends[node]]
+            if exclude is not None:
+                rows = rows[rows != exclude]
+            diff = self.points[rows] - point
+            best_rows = np.concatenate((best_rows, rows))
+            best_dist = np.concatenate((best_dist, np.einsum('ij,ij->i', diff, diff)))
+            if len(best_dist) >= k:
+                keep = np.argpartition(best_dist, k - 1)[:k]
+                best_rows, best_dist = best_rows[keep], best_dist[keep]
+                kth = best_dist.max()
+
+        # Closest first; ties go to the lower index
+        ranked = np.lexsort((best_rows, best_dist))
+        return best_rows[ranked], np.sqrt(best_dist[ranked])
+
+
+class SimilarityIndex:
+    """k-d trees and cached neighbour lists for one analytics snapshot."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.stats = snapshot.stats.astype(np.float64)
+        std = self.stats.std(axis=0) if len(snapshot) else np.ones(self.stats.shape[1])
+        self.mean = self.stats.mean(axis=0) if len(snapshot) else np.zeros(self.stats.shape[1])
+        self.scale = np.where(std > 0, std, 1.0)
+        self._lock = threading.Lock()
+        self._trees = {}
+        self._results = OrderedDict()
+        # The unfiltered raw-stat tree serves the detail page, so build it up front
+        self._tree(False, None)
+
+    def _tree(self, normalize, pokemon_type):
+        key = (normalize, pokemon_type)
+        with self._lock:
+            entry = self._trees.get(key)
+        if entry is None:
+            if pokemon_type:
+                rows = np.flatnonzero(self.snapshot.type_mask(pokemon_type))
+            else:
+                rows = np.arange(len(self.snapshot))
+            points = self.stats[rows]
+            if normalize:
+                points = (points - self.mean) / self.scale
+            entry = (rows, KDTree(points))
+            with self._lock:
+                entry = self._trees.setdefault(key, entry)
+        return entry
+
+    def neighbours(self, row, k=DEFAULT_K, normalize=False, pokemon_type=None):
+        """Return ``[(row, distance), ...]`` for the ``k`` Pokémon closest to ``row``.
+
+        Raises ``ValueError`` for a ``pokemon_type`` the snapshot does not know,
+        so the per-type trees stay bounded by the number of types.
+        """
+        pokemon_type = pokemon_type.lower() if pokemon_type else None
+        if pokemon_type and pokemon_type not in self.snapshot.types:
+            raise ValueError(f"Unknown type: {pokemon_type}")
+        key = (row, k, normalize, pokemon_type)
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+
+        rows, tree = self._tree(normalize, pokemon_type)
+        point = self.stats[row]
+        if normalize:
+            point = (point - self.mean) / self.scale
+        # The queried Pokémon only appears in trees of its own types
+        position = np.searchsorted(rows, row)
+        exclude = int(position) if position < len(rows) and rows[position] == row else None
+        found, distances = tree.query(point, k, exclude=exclude)
+        result = [(int(rows[i]), float(d)) for i, d in zip(found, distances)]
+
+        with self._lock:
+            self._results[key] = result
+            if len(self._results) > RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+        return result
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_similarity_index():
+    """Return the index for the current analytics snapshot, rebuilding it if that changed."""
+    global _index
+    snapshot = analytics.get_snapshot()
+    index = _index
+    if index is not None and index.snapshot is snapshot:
+        return index
+    with _lock:
+        if _index is None or _index.snapshot is not snapshot:
+            _index = SimilarityIndex(snapshot)
+        return _index
@@ -0,0 +1,147 @@
+"""Dependency-free SVG versions of the radar and bar stat charts.
+
+The output only depends on the chart spec built by ``charts.chart_spec``, so it
+can be memoised and shared between threads without any global drawing state.
+"""
+import math
+from functools import lru_cache
+from html import escape
+
+from .constants import STAT_LABELS
+
+NICE_STEPS = (10, 20, 25, 50, 100, 200, 250, 500)
+AXIS_COLOR = "#d1d5db"
+TEXT_COLOR = "#374151"
+FONT = 'font-family="DejaVu Sans, Arial, sans-serif"'
+
+
+def render_radar_svg(spec):
+    return _radar_svg(spec['name'], tuple(spec['values']), spec['color1'], spec['color2'])
+
+
+def render_bar_svg(spec):
+    return _bar_svg(spec['name'], tuple(spec['values']), spec['color1'], spec['color2'])
+
+
+def _nice_scale(max_value, max_ticks=6):
+    """Pick a round tick step and axis maximum that fits ``max_value``."""
+    max_value = max(max_value, 1)
+    for step in NICE_STEPS:
+        if math.ceil(max_value / step) <= max_ticks:
+            break
+    top = max(step, math.ceil(max_value / step) * step)
+    return step, top
+
+
+def _fmt(value):
+    return f"{value:.1f}".rstrip('0').rstrip('.')
+
+
+@lru_cache(maxsize=2048)
+def _radar_svg(name, values, color1, color2):
+    size, cx, cy, radius = 400, 200, 200, 130
+    step, top = _nice_scale(max(values))
+    count = len(values)
+    # Same orientation as matplotlib's polar axes: first stat on the right, counter-clockwise
+    angles = [2 * math.pi * i / count for i in range(count)]
+
+    def point(angle, value):
+        r = radius * value / top
+        return cx + r * math.cos(angle), cy - r * math.sin(angle)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size}" '
+        f'role="img" aria-label="{escape(name)} stat radar chart">',
+        f'<rect width="{size}" height="{size}" fill="#ffffff"/>',
+    ]
+    for tick in range(step, top + 1, step):
+        parts.append(
+            f'<circle cx="{cx}" cy="{cy}" r="{_fmt(radius * tick / top)}" '
+            f'fill="none" stroke="{AXIS_COLOR}" stroke-width="1"/>'
+        )
+        parts.append(
+            f'<text x="{_fmt(cx + 4)}" y="{_fmt(cy - radius * tick / top - 2)}" '
+            f'font-size="10" fill="#6b7280" {FONT}>{tick}</text>'
+        )
+    for angle, label in zip(angles, STAT_LABELS):
+        x, y = point(angle, top)
+        lx, ly = point(angle, top * 1.14)
+        anchor = 'middle' if abs(math.cos(angle)) < 0.3 else ('start' if math.cos(angle) > 0 else 'end')
+        parts.append(
+            f'<line x1="{cx}" y1="{cy}" x2="{_fmt(x)}" y2="{_fmt(y)}" '
+            f'stroke="{AXIS_COLOR}" stroke-width="1"/>'
+        )
+        parts.append(
+            f'<text x="{_fmt(lx)}" y="{_fmt(ly + 4)}" text-anchor="{anchor}" '
+            f'font-size="13" fill="{TEXT_COLOR}" {FONT}>{escape(label)}</text>'
+        )
+
+    polygon = ' '.join(f'{_fmt(x)},{_fmt(y)}' for x, y in (point(a, v) for a, v in zip(angles, values)))
+    if color2:
+        # Dual types keep the primary fill and get a subtle secondary overlay
+        parts.append(f'<polygon points="{polygon}" fill="{escape(color1)}" fill-opacity="0.3"/>')
+        parts.append(f'<polygon points="{polygon}" fill="{escape(color2)}" fill-opacity="0.1"/>')
+    else:
+        parts.append(f'<polygon points="{polygon}" fill="{escape(color1)}" fill-opacity="0.25"/>')
+    parts.append(
+        f'<polygon points="{polygon}" fill="none" stroke="{escape(color1)}" '
+        f'stroke-width="2" stroke-linejoin="round"/>'
+    )
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+@lru_cache(maxsize=2048)
+def _bar_svg(name, values, color1, color2):
+    width, height = 480, 320
+    left, right, top_pad, bottom = 48, 16, 40, 48
+    plot_w = width - left - right
+    plot_h = height - top_pad - bottom
+    step, top = _nice_scale(max(values))
+    slot = plot_w / len(values)
+    bar_w = slot * 0.8
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" '
+        f'role="img" aria-label="{escape(name)} stat bar chart">',
+        f'<rect width="{width}" height="{height}" fill="#ffffff"/>',
+        f'<text x="{_fmt(left + plot_w / 2)}" y="24" text-anchor="middle" font-size="15" '
+        f'fill="{TEXT_COLOR}" {FONT}>{escape(name)} Stats</text>',
+    ]
+    for tick in range(0, top + 1, step):
+        y = top_pad + plot_h - plot_h * tick / top
+        parts.append(
+            f'<line x1="{left}" y1="{_fmt(y)}" x2="{left + plot_w}" y2="{_fmt(y)}" '
+            f'stroke="{AXIS_COLOR}" stroke-width="1"/>'
+        )
+        parts.append(
+            f'<text x="{left - 6}" y="{_fmt(y + 4)}" text-anchor="end" font-size="11" '
+            f'fill="{TEXT_COLOR}" {FONT}>{tick}</text>'
+        )
+    for i, (label, value) in enumerate(zip(STAT_LABELS, values)):
+        # Dual types alternate between the two type colors, like the seaborn palette did
+        color = color2 if color2 and i % 2 else color1
+        bar_h = plot_h * value / top
+        x = left + slot * i + (slot - bar_w) / 2
+        parts.append(
+            f'<rect x="{_fmt(x)}" y="{_fmt(top_pad + plot_h - bar_h)}" width="{_fmt(bar_w)}" '
+            f'height="{_fmt(bar_h)}" fill="{escape(color)}"><title>{escape(label)}: {value}</title></rect>'
+        )
+        parts.append(
+            f'<text x="{_fmt(left + slot * i + slot / 2)}" y="{top_pad + plot_h + 18}" '
+            f'text-anchor="middle" font-size="12" fill="{TEXT_COLOR}" {FONT}>{escape(label)}</text>'
+        )
+    parts.append(
+        f'<line x1="{left}" y1="{top_pad + plot_h}" x2="{left + plot_w}" y2="{top_pad + plot_h}" '
+        f'stroke="{TEXT_COLOR}" stroke-width="1"/>'
+    )
+    parts.append(
+        f'<text x="{_fmt(left + plot_w / 2)}" y="{height - 8}" text-anchor="middle" '
+        f'font-size="12" fill="{TEXT_COLOR}" {FONT}>stat</text>'
+    )
+    parts.append(
+        f'<text x="14" y="{_fmt(top_pad + plot_h / 2)}" text-anchor="middle" font-size="12" '
+        f'fill="{TEXT_COLOR}" transform="rotate(-90 14 {_fmt(top_pad + plot_h / 2)})" {FONT}>value</text>'
+    )
+    parts.append('</svg>')
+    return ''.join(parts)
@@ -1,6 +1,35 @@
-from django.test import TestCase
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock, skipUnless
+
+import requests
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth.models import User
-from .models import Pokemon, Favorite
+from . import (
+    analytics, charts, dataset, export, favorites, images, ingest, leaderboard, matchups, pokeapi, reload,
+    search, similarity, svgcharts,
+)
+from .favorites import FavoriteIdSet, get_favorite_ids
+from .pagination import encode_cursor
+from .models import Pokemon, PokemonStaging, Favorite
 
 # Create your tests here.
 class PokemonModelTest(TestCase):
@@ -20,12 +49,20 @@ class PokemonModelTest(TestCase):
     
     def test_pokemon_creation(self):
         self.assertEqual(self.pokemon.name, "TestPokemon")
-        self.assertEqual(self.pokemon.type1, "Fire")
+        # Types are stored lower-case whatever case they were given in
+        self.assertEqual((self.pokemon.type1, self.pokemon.type2), ("fire", "flying"))
         self.assertEqual(self.pokemon.slug, "testpokemon")
     
     def test_pokemon_str_method(self):
         self.assertEqual(str(self.pokemon), "TestPokemon")
 
+    def test_name_is_unique_regardless_of_case(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Pokemon.objects.create(
+                name="testpokemon", slug="testpokemon-2", type1="Fire", hp=1,
+                attack=1, defense=1, sp_attack=1, sp_defense=1, speed=1
+            )
+
 class FavoriteModelTest(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -54,3 +91,1881 @@ class FavoriteModelTest(TestCase):
     def test_favorite_str_method(self):
         expected = f"{self.user.username} - {self.pokemon.name}"
         self.assertEqual(str(self.favorite), expected)
+
+
+class ChartCacheTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.pokemon = Pokemon.objects.create(
+            name="Charizard",
+            type1="fire",
+            type2="flying",
+            hp=78,
+            attack=84,
+            defense=78,
+            sp_attack=109,
+            sp_defense=85,
+            speed=100
+        )
+
+    @override_settings(POKEMON_CHART_BACKEND='png')
+    def test_charts_rendered_once_per_key(self):
+        url = reverse('PokeApp:pokemon_detail', args=[self.pokemon.slug])
+        with mock.patch.object(charts, 'render_png_charts', wraps=charts.render_png_charts) as render:
+            self.client.get(url)
+            response = self.client.get(url)
+        self.assertEqual(render.call_count, 1)
+        spec = charts.chart_spec(self.pokemon)
+        self.assertTrue(charts.charts_exist(spec))
+        self.assertEqual(response.context['radar_chart_url'], charts.chart_url('radar', spec))
+
+    def test_concurrent_saves_use_their_own_temp_files(self):
+        from . import pngcharts
+        path = os.path.join(self.media_root, 'chart.png')
+        both_writing = threading.Barrier(2, timeout=5)
+
+        class Figure:
+            def __init__(self, data):
+                self.data = data
+
+            def savefig(self, f, **kwargs):
+                f.write(self.data)
+                both_writing.wait()
+
+        errors = []
+
+        def save(data):
+            try:
+                pngcharts._save_figure(Figure(data), path)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=save, args=(data,)) for data in (b'a' * 10, b'b' * 10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(os.listdir(self.media_root), ['chart.png'])
+        with open(path, 'rb') as f:
+            self.assertIn(f.read(), (b'a' * 10, b'b' * 10))
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o644)
+
+    def test_key_depends_on_stats_and_colors(self):
+        spec = charts.chart_spec(self.pokemon)
+        self.pokemon.speed = 101
+        self.assertNotEqual(charts.chart_spec(self.pokemon)['key'], spec['key'])
+        self.pokemon.speed = 100
+        self.pokemon.type2 = None
+        self.assertNotEqual(charts.chart_spec(self.pokemon)['key'], spec['key'])
+
+    def test_saving_pokemon_drops_stale_charts(self):
+        old_spec = charts.chart_spec(self.pokemon)
+        charts.ensure_charts(old_spec)
+        self.pokemon.attack = 90
+        self.pokemon.save()
+        self.assertFalse(os.path.exists(charts.chart_path('radar', old_spec)))
+        self.assertFalse(os.path.exists(charts.chart_path('bar', old_spec)))
+
+    def test_invalidate_many_keeps_current_keys(self):
+        directory = charts.chart_dir()
+        os.makedirs(directory)
+        names = ['radar_charizard_0000000000000001.png', 'bar_charizard_0000000000000002.png',
+                 'radar_mr-mime_0000000000000003.png', 'radar_pikachu_0000000000000004.png', 'notes.txt']
+        for name in names:
+            open(os.path.join(directory, name), 'wb').close()
+        removed = charts.invalidate_many({'charizard': '0000000000000002', 'mr-mime': None})
+        self.assertEqual(removed, 2)
+        self.assertEqual(sorted(os.listdir(directory)), sorted([names[1], names[3], names[4]]))
+
+    def test_evict_removes_oldest_files_first(self):
+        directory = charts.chart_dir()
+        os.makedirs(directory)
+        for i, name in enumerate(['old.png', 'mid.png', 'new.png']):
+            path = os.path.join(directory, name)
+            with open(path, 'wb') as f:
+                f.write(b'x' * 100)
+            os.utime(path, (i, i))
+        self.assertEqual(charts.evict(directory, 250), 1)
+        self.assertEqual(sorted(os.listdir(directory)), ['mid.png', 'new.png'])
+
+
+class RenderChartsCommandTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        for name, hp in [("Bulbasaur", 45), ("Pikachu", 35)]:
+            Pokemon.objects.create(
+                name=name, type1="grass", hp=hp, attack=50, defense=50,
+                sp_attack=50, sp_defense=50, speed=50
+            )
+
+    def run_command(self, **options):
+        out = io.StringIO()
+        call_command('render_charts', stdout=out, stderr=io.StringIO(), **{'workers': 1, **options})
+        return out.getvalue()
+
+    def test_renders_every_pokemon(self):
+        output = self.run_command()
+        self.assertIn("4 charts rendered", output)
+        for pokemon in Pokemon.objects.all():
+            self.assertTrue(charts.charts_exist(charts.chart_spec(pokemon)))
+
+    def test_slug_filter_and_only_missing(self):
+        self.run_command(slug=['pikachu'])
+        self.assertFalse(charts.charts_exist(charts.chart_spec(Pokemon.objects.get(slug='bulbasaur'))))
+        output = self.run_command(only_missing=True)
+        self.assertIn("2 charts rendered", output)
+        self.assertIn("already rendered", self.run_command(only_missing=True))
+
+    def test_process_pool_writes_every_chart(self):
+        output = self.run_command(workers=2)
+        self.assertIn("with 2 worker(s)", output)
+        self.assertIn("4 charts rendered", output)
+        for pokemon in Pokemon.objects.all():
+            spec = charts.chart_spec(pokemon)
+            for kind in charts.CHART_KINDS:
+                with open(charts.chart_path(kind, spec), 'rb') as f:
+                    self.assertEqual(f.read(8), b'\x89PNG\r\n\x1a\n')
+
+
+class SvgChartTest(TestCase):
+    def setUp(self):
+        self.pokemon = Pokemon.objects.create(
+            name="Gyarados",
+            type1="water",
+            type2="flying",
+            hp=95,
+            attack=125,
+            defense=79,
+            sp_attack=60,
+            sp_defense=100,
+            speed=81
+        )
+
+    def test_dual_type_uses_both_colors(self):
+        spec = charts.chart_spec(self.pokemon)
+        radar = svgcharts.render_radar_svg(spec)
+        bar = svgcharts.render_bar_svg(spec)
+        self.assertTrue(radar.startswith('<svg'))
+        self.assertIn('fill="#3b82f6" fill-opacity="0.3"', radar)
+        self.assertIn('fill="#818cf8" fill-opacity="0.1"', radar)
+        self.assertEqual(bar.count('fill="#3b82f6"'), 3)
+        self.assertEqual(bar.count('fill="#818cf8"'), 3)
+
+    def test_single_type_and_escaping(self):
+        self.pokemon.type2 = None
+        self.pokemon.name = "<Gyarados>"
+        spec = charts.chart_spec(self.pokemon)
+        radar = svgcharts.render_radar_svg(spec)
+        bar = svgcharts.render_bar_svg(spec)
+        self.assertIn('fill-opacity="0.25"', radar)
+        self.assertEqual(bar.count('fill="#3b82f6"'), 6)
+        self.assertIn('&lt;Gyarados&gt; Stats', bar)
+        self.assertNotIn('<Gyarados>', bar)
+
+    def test_detail_page_inlines_svg(self):
+        response = self.client.get(reverse('PokeApp:pokemon_detail', args=[self.pokemon.slug]))
+        self.assertContains(response, 'aria-label="Gyarados stat radar chart"')
+        self.assertContains(response, 'aria-label="Gyarados stat bar chart"')
+
+
+class LazyImportTest(TestCase):
+    HEAVY_MODULES = ('pandas', 'matplotlib', 'seaborn', 'numpy')
+
+    def test_worker_startup_skips_data_science_stack(self):
+        script = (
+            "import json, os, sys\n"
+            "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PokeWorld.settings')\n"
+            "import django\n"
+            "django.setup()\n"
+            "from django.urls import get_resolver\n"
+            "get_resolver().url_patterns\n"
+            "from django.core.management import load_command_class\n"
+            "for name in ('fetch_pokemon', 'render_charts', 'clean_duplicates'):\n"
+            "    load_command_class('PokeApp', name)\n"
+            f"print(json.dumps([m for m in {self.HEAVY_MODULES!r} if m in sys.modules]))\n"
+        )
+        project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run(
+            [sys.executable, '-c', script], cwd=project_dir,
+            capture_output=True, text=True, check=True
+        )
+        self.assertEqual(json.loads(result.stdout.strip().splitlines()[-1]), [])
+
+
+class ApiPaginationTest(TestCase):
+    def setUp(self):
+        for i in range(25):
+            Pokemon.objects.create(
+                name=f"Pokemon{i:02d}", type1="normal", hp=i, attack=50, defense=50,
+                sp_attack=50, sp_defense=50, speed=50
+            )
+        self.url = reverse('PokeApp:api_pokemon_list')
+
+    def test_cursor_walks_every_row_once(self):
+        names = []
+        cursor = None
+        pages = 0
+        while True:
+            params = {'page_size': 10}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get(self.url, params).json()
+            names += [p['name'] for p in data['results']]
+            pages += 1
+            cursor = data['next']
+            if not cursor:
+                break
+        self.assertEqual(pages, 3)
+        self.assertEqual(names, [f"Pokemon{i:02d}" for i in range(25)])
+
+    def test_default_and_max_page_size(self):
+        data = self.client.get(self.url).json()
+        self.assertEqual(len(data['results']), 20)
+        self.assertIsNotNone(data['next'])
+        data = self.client.get(self.url, {'page_size': 1000}).json()
+        self.assertEqual(len(data['results']), 25)
+        self.assertIsNone(data['next'])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'not-a-cursor'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'page_size': 'ten'}).status_code, 400)
+        # Well-formed cursors carrying values no row can have
+        for params in (
+            {'cursor': encode_cursor([None])},
+            {'cursor': encode_cursor(["x"])},
+            {'sort': 'total', 'cursor': encode_cursor(["x", 1])},
+            {'sort': 'total', 'cursor': encode_cursor([None, 1])},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'error': 'Invalid cursor'})
+        data = self.client.get(self.url, {'sort': 'total', 'cursor': encode_cursor([260, 2 ** 31])}).json()
+        self.assertEqual([p['name'] for p in data['results']], [f"Pokemon{i:02d}" for i in range(11, 25)])
+
+
+class HomePageTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(30):
+            Pokemon.objects.create(
+                name=f"Pokemon{i:02d}", type1="fire", hp=i, attack=50, defense=50,
+                sp_attack=50, sp_defense=50, speed=50
+            )
+        self.url = reverse('PokeApp:home')
+
+    def test_renders_first_page_with_cursor(self):
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.context['pokemons']), 20)
+        self.assertNotContains(response, "Pokemon20")
+        cursor = response.context['next_cursor']
+        self.assertContains(response, f'data-next-cursor="{cursor}"')
+        data = self.client.get(reverse('PokeApp:api_pokemon_list'), {'cursor': cursor}).json()
+        self.assertEqual(data['results'][0]['name'], "Pokemon20")
+
+    def test_stream_mode_sends_every_card(self):
+        user = User.objects.create_user(username='ash', password='pikachu123')
+        Favorite.objects.create(user=user, pokemon=Pokemon.objects.get(name="Pokemon25"))
+        self.client.force_login(user)
+        response = self.client.get(self.url, {'stream': 1})
+        self.assertTrue(response.streaming)
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(body.count('data-pokemon-id='), 30)
+        self.assertEqual(body.count('fill="#facc15"'), 1)
+        self.assertTrue(body.rstrip().endswith('</html>'))
+
+
+def run_django_script(script):
+    """Run ``script`` in a fresh Python process with the project settings; returns its stdout."""
+    script = (
+        "import os\n"
+        "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PokeWorld.settings')\n"
+        "import django\n"
+        "django.setup()\n"
+    ) + script
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, '-c', script], cwd=project_dir, capture_output=True, text=True, check=True
+    )
+    return result.stdout
+
+
+class FavoriteIdSetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='misty', password='starmie123')
+        self.pokemons = [
+            Pokemon.objects.create(
+                name=f"Pokemon{i}", type1="water", hp=50, attack=50, defense=50,
+                sp_attack=50, sp_defense=50, speed=50
+            )
+            for i in range(5)
+        ]
+
+    def test_bitmap_membership(self):
+        ids = FavoriteIdSet.from_ids([1000, 3, 17, 3])
+        self.assertIn(3, ids)
+        self.assertIn(17, ids)
+        self.assertIn(1000, ids)
+        self.assertNotIn(4, ids)
+        self.assertNotIn(2, ids)
+        self.assertNotIn(5000, ids)
+        self.assertEqual(list(ids), [3, 17, 1000])
+        self.assertEqual(len(ids), 3)
+        self.assertFalse(FavoriteIdSet.from_ids([]))
+
+    def test_cache_follows_toggle_favorite(self):
+        self.client.force_login(self.user)
+        target = self.pokemons[2]
+        self.assertNotIn(target.id, get_favorite_ids(self.user))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('PokeApp:toggle_favorite', args=[target.id]))
+        self.assertIn(target.id, get_favorite_ids(self.user))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('PokeApp:toggle_favorite', args=[target.id]))
+        self.assertNotIn(target.id, get_favorite_ids(self.user))
+
+    def test_invalidation_reaches_other_processes(self):
+        Favorite.objects.create(user=self.user, pokemon=self.pokemons[0])
+        self.assertEqual(len(get_favorite_ids(self.user)), 1)
+        # A change made through another worker drops the bitmap this one reads
+        run_django_script(
+            "from PokeApp.favorites import invalidate_favorite_ids\n"
+            f"invalidate_favorite_ids({self.user.pk})\n"
+        )
+        self.assertIsNone(cache.get(favorites.CACHE_KEY.format(user_id=self.user.pk)))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_cache_is_flagged(self):
+        from .checks import check_shared_cache
+        self.assertEqual([warning.id for warning in check_shared_cache(None)], ['PokeApp.W001'])
+
+    def test_home_page_marks_favorites_from_cache(self):
+        Favorite.objects.create(user=self.user, pokemon=self.pokemons[1])
+        self.client.force_login(self.user)
+        get_favorite_ids(self.user)
+        # session, user and one page of Pokémon; the favorite ids come from the cache
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('PokeApp:home'))
+        favorites = [p.name for p in response.context['pokemons'] if p.is_favorite]
+        self.assertEqual(favorites, ["Pokemon1"])
+        data = self.client.get(reverse('PokeApp:api_pokemon_list')).json()
+        self.assertEqual([p['name'] for p in data['results'] if p['is_favorite']], ["Pokemon1"])
+
+
+class SearchTest(TestCase):
+    def setUp(self):
+        search.reset_search_index()
+        self.addCleanup(search.reset_search_index)
+        for name, type1, type2 in [
+            ("Pikachu", "electric", None),
+            ("Pichu", "electric", None),
+            ("Charmander", "fire", None),
+            ("Charizard", "fire", "flying"),
+            ("Gyarados", "water", "flying"),
+        ]:
+            Pokemon.objects.create(
+                name=name, type1=type1, type2=type2, hp=50, attack=50, defense=50,
+                sp_attack=50, sp_defense=50, speed=50
+            )
+        self.url = reverse('PokeApp:api_pokemon_search')
+
+    def names(self, query, **params):
+        data = self.client.get(self.url, {'q': query, **params}).json()
+        return [p['name'] for p in data['results']]
+
+    def test_prefix_matches_rank_first(self):
+        self.assertEqual(self.names("char")[:2], ["Charizard", "Charmander"])
+        self.assertEqual(self.names("pikachu")[0], "Pikachu")
+
+    def test_type_and_fuzzy_matches(self):
+        self.assertEqual(set(self.names("flying")), {"Charizard", "Gyarados"})
+        self.assertEqual(self.names("charmandr")[0], "Charmander")
+        self.assertEqual(self.names("gyrados")[0], "Gyarados")
+        self.assertEqual(self.names(""), [])
+        self.assertEqual(len(self.names("p", limit=1)), 1)
+
+    def test_index_follows_saves_and_deletes(self):
+        self.assertEqual(self.names("eevee"), [])
+        eevee = Pokemon.objects.create(
+            name="Eevee", type1="normal", hp=55, attack=55, defense=50,
+            sp_attack=45, sp_defense=65, speed=55
+        )
+        self.assertEqual(self.names("eev"), ["Eevee"])
+        eevee.name = "Vaporeon"
+        eevee.save()
+        self.assertEqual(self.names("vapor"), ["Vaporeon"])
+        self.assertNotIn("Eevee", self.names("eevee"))
+        eevee.delete()
+        self.assertEqual(self.names("vapor"), [])
+
+    def test_own_saves_do_not_rebuild_the_index(self):
+        self.assertEqual(self.names("pikachu")[0], "Pikachu")
+        pikachu = Pokemon.objects.get(name="Pikachu")
+        with mock.patch.object(search.SearchIndex, 'build', wraps=search.get_index().build) as build:
+            with self.captureOnCommitCallbacks(execute=True):
+                pikachu.name = "Raichu"
+                pikachu.save()
+            with self.captureOnCommitCallbacks(execute=True):
+                Pokemon.objects.get(name="Pichu").delete()
+            self.assertEqual(self.names("raichu")[0], "Raichu")
+            self.assertNotIn("Pichu", self.names("pichu"))
+            build.assert_not_called()
+            # A bump this process did not patch in still rebuilds
+            dataset.bump_version()
+            self.names("raichu")
+            build.assert_called_once()
+
+    def test_index_follows_dataset_version(self):
+        self.assertEqual(self.names("pikachu")[0], "Pikachu")
+        # A bulk write elsewhere skips the signals and only bumps the version
+        Pokemon.objects.filter(name="Pikachu").update(name="Raichu", slug="raichu")
+        self.assertNotIn("Raichu", self.names("raichu"))
+        dataset.bump_version()
+        self.assertEqual(self.names("raichu")[0], "Raichu")
+        self.assertNotIn("Pikachu", self.names("pikachu"))
+
+
+class ApiFilterSortTest(TestCase):
+    def setUp(self):
+        rows = [
+            ("Charmander", "fire", None, 39, 52, 43, 60, 50, 65),
+            ("Charizard", "fire", "flying", 78, 84, 78, 109, 85, 100),
+            ("Pidgey", "normal", "flying", 40, 45, 40, 35, 35, 56),
+            ("Squirtle", "water", None, 44, 48, 65, 50, 64, 43),
+            ("Blastoise", "water", None, 79, 83, 100, 85, 105, 78),
+        ]
+        for name, type1, type2, *stats in rows:
+            Pokemon.objects.create(
+                name=name, type1=type1, type2=type2, hp=stats[0], attack=stats[1],
+                defense=stats[2], sp_attack=stats[3], sp_defense=stats[4], speed=stats[5]
+            )
+        self.url = reverse('PokeApp:api_pokemon_list')
+
+    def names(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [p['name'] for p in response.json()['results']]
+
+    def test_type_filters(self):
+        self.assertEqual(self.names(type1="Fire"), ["Charmander", "Charizard"])
+        self.assertEqual(self.names(type2="flying"), ["Charizard", "Pidgey"])
+        self.assertEqual(self.names(type="flying", type1="normal"), ["Pidgey"])
+
+    def test_types_match_whatever_case_they_were_written_in(self):
+        Pokemon.objects.create(
+            name="Moltres", type1="Fire", type2="Flying", hp=90, attack=100, defense=90,
+            sp_attack=125, sp_defense=85, speed=90
+        )
+        ingest.upsert_pokemons([{
+            'name': "Ponyta", 'type1': "FIRE", 'type2': None, 'hp': 50, 'attack': 85, 'defense': 55,
+            'sp_attack': 65, 'sp_defense': 65, 'speed': 90, 'image_url': None,
+        }])
+        self.assertEqual(self.names(type1="Fire"), ["Charmander", "Charizard", "Moltres", "Ponyta"])
+        self.assertEqual(self.names(type2="FLYING"), ["Charizard", "Pidgey", "Moltres"])
+
+        # Rows written before normalisation are fixed by the data migration
+        from importlib import import_module
+
+        from django.apps import apps
+        Pokemon.objects.filter(name="Squirtle").update(type1="Water")
+        import_module('PokeApp.migrations.0010_lowercase_pokemon_types').lowercase_types(apps, None)
+        self.assertEqual(self.names(type1="water"), ["Squirtle", "Blastoise"])
+
+    def test_stat_ranges_and_sorting(self):
+        self.assertEqual(self.names(speed_min=60, sort="-speed"), ["Charizard", "Blastoise", "Charmander"])
+        self.assertEqual(self.names(hp_min=40, hp_max=78, sort="hp"), ["Pidgey", "Squirtle", "Charizard"])
+        self.assertEqual(self.names(sort="-total", total_min=400), ["Charizard", "Blastoise"])
+
+    def test_sorted_pages_follow_cursor(self):
+        first = self.client.get(self.url, {'sort': '-attack', 'page_size': 2}).json()
+        second = self.client.get(self.url, {'sort': '-attack', 'page_size': 2, 'cursor': first['next']}).json()
+        third = self.client.get(self.url, {'sort': '-attack', 'page_size': 2, 'cursor': second['next']}).json()
+        names = [p['name'] for page in (first, second, third) for p in page['results']]
+        self.assertEqual(names, ["Charizard", "Blastoise", "Charmander", "Squirtle", "Pidgey"])
+        self.assertIsNone(third['next'])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.url, {'sort': 'weight'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'hp_min': 'lots'}).status_code, 400)
+
+
+class StatSnapshotTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        analytics.reset_snapshot()
+        rows = [
+            ("Charmander", "fire", None, 39, 52, 43, 60, 50, 65),
+            ("Charizard", "fire", "flying", 78, 84, 78, 109, 85, 100),
+            ("Vulpix", "fire", None, 38, 41, 40, 50, 65, 65),
+            ("Pidgey", "normal", "flying", 40, 45, 40, 35, 35, 56),
+            ("Squirtle", "water", None, 44, 48, 65, 50, 64, 43),
+        ]
+        self.pokemons = {}
+        for name, type1, type2, *stats in rows:
+            self.pokemons[name] = Pokemon.objects.create(
+                name=name, type1=type1, type2=type2, hp=stats[0], attack=stats[1],
+                defense=stats[2], sp_attack=stats[3], sp_defense=stats[4], speed=stats[5]
+            )
+
+    def test_snapshot_is_columnar_and_read_only(self):
+        snapshot = analytics.get_snapshot()
+        self.assertEqual(len(snapshot), 5)
+        self.assertEqual(snapshot.stats.dtype, analytics.np.int16)
+        self.assertEqual(snapshot.stats.shape, (5, 6))
+        self.assertEqual(snapshot.types[snapshot.type1[0]], "fire")
+        self.assertEqual(snapshot.type2[0], analytics.NO_TYPE)
+        with self.assertRaises(ValueError):
+            snapshot.stats[0, 0] = 1
+
+    def test_analytics_run_without_queries(self):
+        snapshot = analytics.get_snapshot()
+        with self.assertNumQueries(0):
+            self.assertIs(analytics.get_snapshot(), snapshot)
+            top = snapshot.top('speed', n=2)
+            fire = snapshot.top('total', n=5, pokemon_type='Fire')
+            charizard = self.pokemons["Charizard"].id
+            ranks = snapshot.type_percentiles(charizard)
+            histogram = snapshot.distribution('total', bins=4)
+        self.assertEqual([name for _, name, _, _ in top], ["Charizard", "Charmander"])
+        self.assertEqual([name for _, name, _, _ in fire], ["Charizard", "Charmander", "Vulpix"])
+        # Higher than both other fire types and than Pidgey among flying types
+        self.assertEqual(ranks, [("fire", 100.0), ("flying", 100.0)])
+        self.assertEqual(snapshot.percentile_in_type(self.pokemons["Vulpix"].id, "fire"), 0.0)
+        self.assertIsNone(snapshot.percentile_in_type(self.pokemons["Squirtle"].id, "water"))
+        self.assertEqual(histogram['count'], 5)
+        self.assertEqual(sum(histogram['counts']), 5)
+        self.assertEqual(histogram['max'], 534)
+
+    def test_snapshot_rebuilds_when_version_changes(self):
+        snapshot = analytics.get_snapshot()
+        with self.captureOnCommitCallbacks(execute=True):
+            Pokemon.objects.create(
+                name="Growlithe", type1="fire", hp=55, attack=70, defense=45,
+                sp_attack=70, sp_defense=50, speed=60
+            )
+        rebuilt = analytics.get_snapshot()
+        self.assertIsNot(rebuilt, snapshot)
+        self.assertEqual(rebuilt.version, dataset.get_version())
+        self.assertEqual(len(rebuilt), 6)
+
+    def test_detail_page_shows_rank_within_type(self):
+        analytics.get_snapshot()
+        url = reverse('PokeApp:pokemon_detail', args=[self.pokemons["Charmander"].slug])
+        response = self.client.get(url)
+        self.assertContains(response, "higher than 50% of Fire types")
+
+
+class SimilarPokemonTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        analytics.reset_snapshot()
+        rows = [
+            ("Charmander", "fire", None, 39, 52, 43, 60, 50, 65),
+            ("Charmeleon", "fire", None, 58, 64, 58, 80, 65, 80),
+            ("Charizard", "fire", "flying", 78, 84, 78, 109, 85, 100),
+            ("Squirtle", "water", None, 44, 48, 65, 50, 64, 43),
+            ("Wartortle", "water", None, 59, 63, 80, 65, 80, 58),
+            ("Pidgeot", "normal", "flying", 83, 80, 75, 70, 70, 101),
+        ]
+        for name, type1, type2, *stats in rows:
+            Pokemon.objects.create(
+                name=name, type1=type1, type2=type2, hp=stats[0], attack=stats[1],
+                defense=stats[2], sp_attack=stats[3], sp_defense=stats[4], speed=stats[5]
+            )
+
+    def similar(self, slug, **params):
+        response = self.client.get(reverse('PokeApp:api_pokemon_similar', args=[slug]), params)
+        self.assertEqual(response.status_code, 200)
+        return [p['name'] for p in response.json()['results']]
+
+    def test_kd_tree_matches_brute_force(self):
+        rng = analytics.np.random.default_rng(0)
+        points = rng.integers(1, 255, size=(2000, 6))
+        tree = similarity.KDTree(points, leaf_size=16)
+        for query in rng.integers(1, 255, size=(20, 6)):
+            rows, distances = tree.query(query, k=5)
+            brute = analytics.np.sqrt(((points - query) ** 2).sum(axis=1))
+            self.assertTrue(analytics.np.allclose(distances, analytics.np.sort(brute)[:5]))
+        rows, _ = tree.query(points[7], k=3, exclude=7)
+        self.assertNotIn(7, rows)
+
+    def test_api_lists_nearest_stat_profiles(self):
+        self.assertEqual(self.similar("wartortle", k=2), ["Squirtle", "Charmeleon"])
+        self.assertEqual(self.similar("charizard", k=1), ["Pidgeot"])
+        self.assertEqual(self.similar("charizard", k=2, type="fire"), ["Charmeleon", "Charmander"])
+        self.assertEqual(len(self.similar("charmander", k=50)), 5)
+        self.assertEqual(len(self.similar("charmander", k=3, normalize=1)), 3)
+
+    def test_api_errors(self):
+        url = reverse('PokeApp:api_pokemon_similar', args=["missingno"])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        url = reverse('PokeApp:api_pokemon_similar', args=["charmander"])
+        self.assertEqual(self.client.get(url, {'k': 'many'}).status_code, 400)
+        # Unknown types are refused instead of each building (and keeping) a tree
+        trees = len(similarity.get_similarity_index()._trees)
+        for junk in ('zzz1', 'zzz2'):
+            response = self.client.get(url, {'type': junk})
+            self.assertEqual((response.status_code, response.json()), (400, {'error': 'Unknown type'}))
+        self.assertEqual(len(similarity.get_similarity_index()._trees), trees)
+        self.assertEqual(self.client.get(url, {'type': 'Fire'}).status_code, 200)
+
+    def test_lookups_come_from_the_prebuilt_index(self):
+        self.similar("squirtle")
+        with self.assertNumQueries(0):
+            self.similar("squirtle")
+            self.similar("pidgeot", k=2)
+
+    def test_detail_page_shows_similar_strip(self):
+        response = self.client.get(reverse('PokeApp:pokemon_detail', args=["squirtle"]))
+        self.assertContains(response, "Pokémon with similar stat profiles")
+        self.assertEqual([p['name'] for p in response.context['similar_pokemons']][:2], ["Charmander", "Wartortle"])
+
+
+class TypeMatchupTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        analytics.reset_snapshot()
+        self.user = User.objects.create_user(username="trainer", password="pikachu123")
+        rows = [
+            ("Charizard", "fire", "flying"),
+            ("Blastoise", "water", None),
+            ("Venusaur", "grass", "poison"),
+            ("Pikachu", "electric", None),
+            ("Geodude", "rock", "ground"),
+            ("Gengar", "ghost", "poison"),
+        ]
+        self.ids = {}
+        for name, type1, type2 in rows:
+            pokemon = Pokemon.objects.create(
+                name=name, type1=type1, type2=type2, hp=50, attack=50, defense=50,
+                sp_attack=50, sp_defense=50, speed=50
+            )
+            self.ids[name] = pokemon.id
+
+    def code(self, pokemon_type):
+        return matchups.type_code(pokemon_type)
+
+    def test_effectiveness_chart(self):
+        self.assertEqual(matchups.EFFECTIVENESS.shape, (18, 18))
+        self.assertEqual(matchups.EFFECTIVENESS[self.code("electric"), self.code("ground")], 0)
+        self.assertEqual(matchups.EFFECTIVENESS[self.code("water"), self.code("fire")], 2)
+        # Rock hits Charizard four times as hard
+        multipliers = matchups.defensive_multipliers([self.code("fire")], [self.code("flying")])
+        self.assertEqual(multipliers[0, self.code("rock")], 4)
+        self.assertEqual(multipliers[0, self.code("ground")], 0)
+
+    def test_team_analysis(self):
+        analysis = matchups.analyze_team([self.code("fire"), self.code("water")], [-1, -1])
+        self.assertIn("grass", analysis['offense']['covered'])
+        self.assertIn("rock", analysis['offense']['covered'])
+        self.assertIn("normal", analysis['offense']['missing'])
+        # Water is weak to electric and fire does not resist it
+        self.assertIn("electric", analysis['open_to'])
+        fire_row = next(row for row in analysis['defense'] if row['type'] == "fire")
+        self.assertEqual((fire_row['weak'], fire_row['resist']), (0, 2))
+
+    def test_suggestions_match_exhaustive_search(self):
+        rng = analytics.np.random.default_rng(3)
+        type1 = rng.integers(0, 18, 12)
+        type2 = analytics.np.where(rng.random(12) < 0.5, rng.integers(0, 18, 12), -1)
+        best = matchups.suggest_completions([self.code("fire")], [-1], type1, type2, slots=2, limit=1)[0]
+        expected = max(
+            int(matchups.analyze_team([self.code("fire"), type1[i], type1[j]], [-1, type2[i], type2[j]])['score'])
+            for i in range(12) for j in range(i + 1, 12)
+        )
+        self.assertEqual(best[1], expected)
+        self.assertEqual(len(best[0]), 2)
+
+    def test_coverage_api(self):
+        url = reverse('PokeApp:api_team_coverage')
+        response = self.client.get(url, {'ids': f"{self.ids['Charizard']},{self.ids['Blastoise']}"})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([p['name'] for p in data['team']], ["Charizard", "Blastoise"])
+        self.assertIn("electric", data['open_to'])
+        self.assertEqual(self.client.get(url, {'ids': "999"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'ids': "1,2,3,4,5,6,7"}).status_code, 400)
+
+    def test_suggestions_come_from_favorites(self):
+        for name in ("Blastoise", "Venusaur", "Pikachu", "Geodude"):
+            Favorite.objects.create(user=self.user, pokemon_id=self.ids[name])
+        url = reverse('PokeApp:api_team_suggestions')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.login(username="trainer", password="pikachu123")
+        data = self.client.get(url, {'ids': self.ids['Charizard'], 'slots': 2}).json()
+        favorites = {"Blastoise", "Venusaur", "Pikachu", "Geodude"}
+        self.assertTrue(data['suggestions'])
+        for suggestion in data['suggestions']:
+            names = {p['name'] for p in suggestion['pokemons']}
+            self.assertEqual(len(names), 2)
+            self.assertLessEqual(names, favorites)
+
+        for params in ({'slots': "two"}, {'limit': "1e3"}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'error': "slots and limit must be integers"})
+        response = self.client.get(url, {'ids': "1,x"})
+        self.assertEqual(response.json(), {'error': "ids must be integers"})
+
+    def test_team_page(self):
+        for name in ("Charizard", "Blastoise", "Venusaur"):
+            Favorite.objects.create(user=self.user, pokemon_id=self.ids[name])
+        self.client.login(username="trainer", password="pikachu123")
+        response = self.client.get(reverse('PokeApp:team'), {'ids': [self.ids['Charizard']]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p.name for p in response.context['team']], ["Charizard"])
+        self.assertContains(response, "Coverage score")
+        self.assertContains(response, "Best ways to complete this team")
+        self.assertContains(self.client.get(reverse('PokeApp:favorites')), reverse('PokeApp:team'))
+
+
+class TypeStatsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        analytics.reset_snapshot()
+        rows = [
+            ("Charmander", "fire", None, 39),
+            ("Charizard", "fire", "flying", 78),
+            ("Pidgey", "normal", "flying", 40),
+            ("Squirtle", "water", None, 44),
+        ]
+        for name, type1, type2, hp in rows:
+            Pokemon.objects.create(
+                name=name, type1=type1, type2=type2, hp=hp, attack=50, defense=50,
+                sp_attack=50, sp_defense=50, speed=50
+            )
+        self.url = reverse('PokeApp:api_type_stats')
+
+    def test_per_type_summaries_and_pairs(self):
+        data = self.client.get(self.url).json()
+        self.assertFalse(data['stale'])
+        fire = data['stats']['fire']
+        self.assertEqual(fire['count'], 2)
+        self.assertEqual(fire['hp']['mean'], 58.5)
+        self.assertEqual(fire['hp']['median'], 58.5)
+        self.assertEqual((fire['hp']['min'], fire['hp']['max']), (39, 78))
+        self.assertEqual(fire['total']['max'], 328)
+        self.assertEqual(data['stats']['flying']['count'], 2)
+        self.assertEqual(data['stats']['dragon'], {'count': 0})
+
+        types = data['types']
+        pairs = data['co_occurrence']
+        fire, flying, water = types.index("fire"), types.index("flying"), types.index("water")
+        self.assertEqual(pairs[fire][flying], 1)
+        self.assertEqual(pairs[flying][fire], 1)
+        self.assertEqual(pairs[fire][fire], 1)
+        self.assertEqual(pairs[water][water], 1)
+
+    def test_polling_does_not_recompute(self):
+        self.client.get(self.url)
+        with mock.patch.object(analytics.StatSnapshot, 'type_statistics') as recompute:
+            with self.assertNumQueries(0):
+                for _ in range(3):
+                    self.assertEqual(self.client.get(self.url).status_code, 200)
+        recompute.assert_not_called()
+
+    def test_stale_result_served_while_another_worker_recomputes(self):
+        first = self.client.get(self.url).json()
+        version = dataset.bump_version()
+        # Another worker already holds the recompute lock for the new version
+        cache.add(analytics.TYPE_STATS_LOCK_KEY.format(version=version), True)
+        with mock.patch.object(analytics.StatSnapshot, 'type_statistics') as recompute:
+            data = self.client.get(self.url).json()
+        recompute.assert_not_called()
+        self.assertTrue(data['stale'])
+        self.assertEqual(data['version'], first['version'])
+
+    def test_data_changes_are_picked_up_once(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Pokemon.objects.create(
+                name="Vulpix", type1="fire", hp=38, attack=41, defense=40,
+                sp_attack=50, sp_defense=65, speed=65
+            )
+        data = self.client.get(self.url).json()
+        self.assertFalse(data['stale'])
+        self.assertEqual(data['stats']['fire']['count'], 3)
+
+    def test_bump_from_another_process_is_picked_up(self):
+        self.client.get(self.url)
+        # A bulk write that skips the signals, like fetch_pokemon or load_pokedex
+        # make before bumping the version in their own process
+        Pokemon.objects.filter(type1="fire").update(hp=100)
+        out = run_django_script("from PokeApp import dataset\nprint(dataset.bump_version())\n")
+        self.assertEqual(dataset.get_version(), int(out.split()[-1]))
+        data = self.client.get(self.url).json()
+        self.assertFalse(data['stale'])
+        self.assertEqual(data['stats']['fire']['hp']['max'], 100)
+
+
+class ExportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="trainer", password="pikachu123")
+        self.pokemons = []
+        for i, (name, type2) in enumerate([("Bulbasaur", "poison"), ("Charmander", None), ("Squirtle", None)]):
+            self.pokemons.append(Pokemon.objects.create(
+                name=name, type1="grass", type2=type2, hp=40 + i, attack=50, defense=50,
+                sp_attack=50, sp_defense=50, speed=50, image_url=f"https://img.example/{i}.png"
+            ))
+        Favorite.objects.create(user=self.user, pokemon=self.pokemons[1])
+        self.url = reverse('PokeApp:api_pokemon_export')
+
+    def body(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_ndjson_streams_every_row(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['Content-Type'], "application/x-ndjson; charset=utf-8")
+        rows = [json.loads(line) for line in self.body(response).decode().splitlines()]
+        self.assertEqual([row['name'] for row in rows], ["Bulbasaur", "Charmander", "Squirtle"])
+        self.assertEqual(rows[0]['type2'], "poison")
+        self.assertIsNone(rows[1]['type2'])
+        self.assertNotIn('favorite_count', rows[0])
+
+    def test_csv_with_favorite_counts(self):
+        response = self.client.get(self.url, {'format': 'csv', 'favorites': 1})
+        rows = list(csv.DictReader(io.StringIO(self.body(response).decode())))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual([row['favorite_count'] for row in rows], ["0", "1", "0"])
+        self.assertEqual(rows[0]['hp'], "40")
+
+    def test_gzip(self):
+        response = self.client.get(self.url, {'gzip': 1})
+        self.assertEqual(response['Content-Type'], "application/gzip")
+        self.assertIn('pokedex.ndjson.gz', response['Content-Disposition'])
+        lines = gzip.decompress(self.body(response)).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+
+    def test_rows_are_streamed_in_chunks(self):
+        from . import export
+        chunks = list(export.export_chunks('ndjson', chunk_size=2))
+        self.assertEqual([chunk.count('\n') for chunk in chunks], [2, 1])
+        self.assertEqual(self.client.get(self.url, {'format': 'xml'}).status_code, 400)
+
+    def test_command_writes_file(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'pokedex.csv.gz')
+        call_command('export_pokedex', format='csv', favorites=True, gzip=True, output=path, stderr=io.StringIO())
+        with gzip.open(path, 'rt', newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([row['name'] for row in rows], ["Bulbasaur", "Charmander", "Squirtle"])
+
+        out = io.StringIO()
+        call_command('export_pokedex', stdout=out, stderr=io.StringIO())
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+
+
+class PokedexDumpTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.path = os.path.join(self.tmpdir, 'pokedex.npz')
+        self.user = User.objects.create_user(username="trainer", password="pikachu123")
+        self.bulbasaur = Pokemon.objects.create(
+            name="Bulbasaur", type1="grass", type2="poison", hp=45, attack=49, defense=49,
+            sp_attack=65, sp_defense=65, speed=45, image_url="https://img.example/1.png"
+        )
+        self.mew = Pokemon.objects.create(
+            name="Mew", type1="psychic", hp=100, attack=100, defense=100,
+            sp_attack=100, sp_defense=100, speed=100
+        )
+        self.favorite = Favorite.objects.create(user=self.user, pokemon=self.mew)
+
+    def dump_and_wipe(self, **options):
+        call_command('dump_pokedex', self.path, stdout=io.StringIO(), **options)
+        Favorite.objects.all().delete()
+        Pokemon.objects.all().delete()
+
+    def test_round_trip(self):
+        created_at = self.favorite.created_at
+        self.dump_and_wipe(favorites=True)
+        out = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('load_pokedex', self.path, stdout=out)
+        self.assertIn("Loaded 2 Pokémon and 1 favorites", out.getvalue())
+
+        bulbasaur = Pokemon.objects.get(id=self.bulbasaur.id)
+        self.assertEqual((bulbasaur.slug, bulbasaur.type2, bulbasaur.sp_attack), ("bulbasaur", "poison", 65))
+        mew = Pokemon.objects.get(id=self.mew.id)
+        self.assertIsNone(mew.type2)
+        self.assertIsNone(mew.image_url)
+        favorite = Favorite.objects.get()
+        self.assertEqual((favorite.user_id, favorite.pokemon_id), (self.user.id, self.mew.id))
+        self.assertEqual(favorite.created_at, created_at)
+        self.assertEqual((mew.favorite_count, bulbasaur.favorite_count), (1, 0))
+        self.assertIn(self.mew.id, get_favorite_ids(self.user))
+
+    def test_load_uses_one_transaction_and_batches(self):
+        self.dump_and_wipe()
+        with self.assertNumQueries(4):
+            # SAVEPOINT, existence check, one batched INSERT, RELEASE
+            call_command('load_pokedex', self.path, batch_size=100, stdout=io.StringIO())
+        self.assertEqual(Pokemon.objects.count(), 2)
+
+    def test_refuses_to_overwrite_without_replace(self):
+        call_command('dump_pokedex', self.path, stdout=io.StringIO())
+        with self.assertRaises(CommandError):
+            call_command('load_pokedex', self.path, stdout=io.StringIO())
+        Pokemon.objects.filter(id=self.mew.id).update(hp=1)
+        # The dump has no favorites, so replacing would silently lose the existing one
+        with self.assertRaisesMessage(CommandError, "drop_favorites"):
+            call_command('load_pokedex', self.path, replace=True, stdout=io.StringIO())
+        self.assertEqual(Favorite.objects.count(), 1)
+        call_command('load_pokedex', self.path, replace=True, drop_favorites=True, stdout=io.StringIO())
+        self.assertEqual(Pokemon.objects.get(id=self.mew.id).hp, 100)
+        self.assertFalse(Favorite.objects.exists())
+
+    def test_replace_restores_favorites_from_the_dump(self):
+        created_at = self.favorite.created_at
+        call_command('dump_pokedex', self.path, favorites=True, stdout=io.StringIO())
+        Favorite.objects.create(user=self.user, pokemon=self.bulbasaur)
+        call_command('load_pokedex', self.path, replace=True, stdout=io.StringIO())
+        self.assertEqual(list(Favorite.objects.values_list('pokemon_id', 'created_at')), [(self.mew.id, created_at)])
+        # Loading leaves the model field alone; ORM creates still stamp "now"
+        self.assertTrue(Favorite._meta.get_field('created_at').auto_now_add)
+        later = Favorite.objects.create(user=self.user, pokemon=self.bulbasaur)
+        self.assertGreater(later.created_at, created_at)
+
+    def test_favorites_of_unknown_users(self):
+        self.dump_and_wipe(favorites=True)
+        self.user.delete()
+        out = io.StringIO()
+        call_command('load_pokedex', self.path, stdout=out)
+        self.assertIn("Skipped 1 favorites", out.getvalue())
+        self.assertFalse(Favorite.objects.exists())
+
+        call_command('load_pokedex', self.path, replace=True, create_users=True, stdout=io.StringIO())
+        self.assertEqual(Favorite.objects.get().user.username, "trainer")
+
+
+
+def pokeapi_payload(number, name, types, stats=(45, 49, 49, 65, 65, 45)):
+    """A trimmed-down PokeAPI ``/pokemon/`` response."""
+    stat_names = ('hp', 'attack', 'defense', 'special-attack', 'special-defense', 'speed')
+    return {
+        'id': number,
+        'name': name,
+        'types': [{'slot': i + 1, 'type': {'name': t}} for i, t in enumerate(types)],
+        'stats': [{'base_stat': v, 'stat': {'name': s}} for s, v in zip(stat_names, stats)],
+        'sprites': {'other': {'official-artwork': {'front_default': f"https://img.example/{number}.png"}}},
+    }
+
+
+class FakePokeAPI:
+    """Local stand-in for PokeAPI serving ``payloads`` at ``/pokemon/<number>/``.
+
+    ``failures[number]`` 503 responses are sent before the real one. Payloads
+    carry an ``ETag`` of their content and conditional requests get a 304.
+    """
+
+    def __init__(self, payloads, failures=None, files=None):
+        self.payloads = payloads
+        self.failures = dict(failures or {})
+        # Other paths served as is, e.g. artwork
+        self.files = files or {}
+        self.requests = []
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                fake.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.root = f"http://127.0.0.1:{self.server.server_port}"
+        self.base_url = f"{self.root}/api/v2"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def send(self, handler, status, body=b'', headers=()):
+        handler.send_response(status)
+        for header in headers:
+            handler.send_header(*header)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def handle(self, handler):
+        if handler.path in self.files:
+            with self.lock:
+                self.requests.append((handler.path, dict(handler.headers)))
+            self.send(handler, 200, self.files[handler.path], [('Content-Type', 'image/png')])
+            return
+        parts = handler.path.strip('/').split('/')
+        number = int(parts[-1]) if parts[-1].isdigit() else None
+        with self.lock:
+            self.requests.append((number, dict(handler.headers)))
+            failing = self.failures.get(number, 0)
+            if failing:
+                self.failures[number] = failing - 1
+        if failing:
+            self.send(handler, 503)
+        elif number not in self.payloads:
+            self.send(handler, 404)
+        else:
+            body = json.dumps(self.payloads[number]).encode()
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            if handler.headers.get('If-None-Match') == etag:
+                self.send(handler, 304, headers=[('ETag', etag)])
+            else:
+                self.send(handler, 200, body, [('Content-Type', 'application/json'), ('ETag', etag),
+                                               ('Last-Modified', 'Sat, 01 Jan 2022 00:00:00 GMT')])
+
+
+class FetchPokemonTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.payloads = {
+            1: pokeapi_payload(1, 'bulbasaur', ['grass', 'poison']),
+            4: pokeapi_payload(4, 'charmander', ['fire'], (39, 52, 43, 60, 50, 65)),
+            7: pokeapi_payload(7, 'squirtle', ['water'], (44, 48, 65, 50, 64, 43)),
+        }
+
+    def fetch(self, fake, **options):
+        out, err = io.StringIO(), io.StringIO()
+        options = {'base_url': fake.base_url, 'rate': 0, 'backoff': 0, 'verbosity': 0, **options}
+        call_command('fetch_pokemon', stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_fetches_range_concurrently(self):
+        with FakePokeAPI(self.payloads) as fake:
+            out, err = self.fetch(fake, start=1, end=7, concurrency=4)
+        self.assertIn("3 Pokémon data fetched and saved!", out)
+        self.assertIn("4 Pokémon could not be fetched", out)
+        self.assertIn("#2:", err)
+        self.assertEqual(sorted(n for n, _ in fake.requests), list(range(1, 8)))
+        bulbasaur = Pokemon.objects.get(slug='bulbasaur')
+        self.assertEqual((bulbasaur.name, bulbasaur.type1, bulbasaur.type2), ("Bulbasaur", "grass", "poison"))
+        self.assertEqual(Pokemon.objects.get(slug='squirtle').defense, 65)
+        self.assertEqual(Pokemon.objects.get(slug='charmander').image_url, "https://img.example/4.png")
+
+    def test_retries_transient_errors(self):
+        with FakePokeAPI(self.payloads, failures={4: 2}) as fake:
+            out, _ = self.fetch(fake, start=4, end=4, retries=2)
+        self.assertIn("1 Pokémon data fetched and saved!", out)
+        self.assertEqual([n for n, _ in fake.requests], [4, 4, 4])
+
+        with FakePokeAPI(self.payloads, failures={7: 5}) as fake:
+            out, err = self.fetch(fake, start=7, end=7, retries=1)
+        self.assertIn("0 Pokémon data fetched and saved!", out)
+        self.assertIn("HTTP 503", err)
+        self.assertEqual(len(fake.requests), 2)
+
+    def test_request_errors_become_fetch_errors(self):
+        client = pokeapi.PokeAPIClient(rate=0, backoff=0, retries=1)
+        self.addCleanup(client.close)
+        ok = mock.Mock(status_code=200, headers={})
+        ok.json.return_value = self.payloads[1]
+        with mock.patch.object(client.session, 'get', side_effect=[
+            requests.exceptions.ChunkedEncodingError("connection broken"), ok,
+        ]) as get:
+            self.assertEqual(client.get_json(client.pokemon_url(1)), self.payloads[1])
+        self.assertEqual(get.call_count, 2)
+        for error in (requests.exceptions.ContentDecodingError("bad gzip"), requests.exceptions.TooManyRedirects(),
+                      requests.exceptions.InvalidURL("no host")):
+            with mock.patch.object(client.session, 'get', side_effect=error) as get:
+                [(number, data, fetch_error)] = client.fetch_pokemon([1])
+            self.assertEqual((number, data, get.call_count), (1, None, 1))
+            self.assertIsInstance(fetch_error, pokeapi.FetchError)
+            self.assertIs(fetch_error.__cause__, error)
+
+    def test_updates_existing_rows(self):
+        Pokemon.objects.create(name="Bulbasaur", type1="grass", hp=1, attack=1, defense=1,
+                               sp_attack=1, sp_defense=1, speed=1)
+        with FakePokeAPI(self.payloads) as fake:
+            self.fetch(fake, start=1, end=1)
+        self.assertEqual(Pokemon.objects.get(slug='bulbasaur').hp, 45)
+        self.assertEqual(Pokemon.objects.count(), 1)
+
+    def test_rejects_bad_range(self):
+        with self.assertRaises(CommandError):
+            call_command('fetch_pokemon', start=5, end=4, stdout=io.StringIO())
+
+    def test_rate_limiter(self):
+        limiter = pokeapi.RateLimiter(rate=1000, burst=5)
+        with mock.patch('PokeApp.pokeapi.time.sleep') as sleep:
+            for _ in range(5):
+                limiter.acquire()
+            sleep.assert_not_called()
+
+
+class IngestTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        search.reset_search_index()
+        self.record = {
+            'name': "Pikachu", 'type1': "electric", 'type2': None, 'hp': 35, 'attack': 55, 'defense': 40,
+            'sp_attack': 50, 'sp_defense': 50, 'speed': 90, 'image_url': "https://img.example/25.png",
+        }
+
+    def test_inserts_and_updates_by_slug(self):
+        Pokemon.objects.create(name="Pikachu", type1="electric", hp=1, attack=1, defense=1,
+                               sp_attack=1, sp_defense=1, speed=1)
+        records = [{**self.record, 'name': f"Pokemon {i}"} for i in range(250)] + [self.record]
+        with self.assertNumQueries(8):
+            # SAVEPOINT, six INSERT ... ON CONFLICT batches, RELEASE
+            written = ingest.upsert_pokemons(records, batch_size=50)
+        self.assertEqual(written, 251)
+        self.assertEqual(Pokemon.objects.count(), 251)
+        pikachu = Pokemon.objects.get(slug="pikachu")
+        self.assertEqual((pikachu.hp, pikachu.speed), (35, 90))
+        self.assertTrue(Pokemon.objects.filter(slug="pokemon-249").exists())
+
+    def test_duplicate_slugs_keep_last_record(self):
+        records = ingest.with_slugs([self.record, {**self.record, 'hp': 99}, {**self.record, 'name': "Raichu"}])
+        self.assertEqual([(r['slug'], r['hp']) for r in records], [("pikachu", 99), ("raichu", 35)])
+        ingest.upsert_pokemons([self.record, {**self.record, 'hp': 99}])
+        self.assertEqual(Pokemon.objects.get(slug="pikachu").hp, 99)
+
+    def test_refreshes_derived_data_after_commit(self):
+        version = dataset.get_version()
+        self.assertEqual(len(search.get_index()), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest.upsert_pokemons([self.record])
+        self.assertNotEqual(dataset.get_version(), version)
+        self.assertEqual([entry.slug for _, entry in search.get_index().search("pika")], ["pikachu"])
+        self.assertEqual(ingest.upsert_pokemons([]), 0)
+
+
+class FetchSyncTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        self.payloads = {
+            n: pokeapi_payload(n, name, types)
+            for n, name, types in [(1, 'bulbasaur', ['grass', 'poison']), (2, 'ivysaur', ['grass', 'poison']),
+                                   (3, 'venusaur', ['grass', 'poison']), (4, 'charmander', ['fire'])]
+        }
+
+    def sync(self, fake, **options):
+        out = io.StringIO()
+        options = {'base_url': fake.base_url, 'rate': 0, 'backoff': 0, 'verbosity': 0, 'start': 1, 'end': 4,
+                   'sync': True, 'cache_dir': self.cache_dir, **options}
+        call_command('fetch_pokemon', stdout=out, stderr=io.StringIO(), **options)
+        return out.getvalue()
+
+    def test_unchanged_sync_sends_conditional_requests_and_writes_nothing(self):
+        with FakePokeAPI(self.payloads) as fake:
+            out = self.sync(fake)
+            self.assertIn("4 Pokémon data fetched and saved!", out)
+            self.assertTrue(all('If-None-Match' not in headers for _, headers in fake.requests))
+
+            fake.requests.clear()
+            with self.assertNumQueries(1):
+                # One SELECT comparing the cached payloads with the stored rows
+                out = self.sync(fake)
+            self.assertIn("0 Pokémon data fetched and saved!", out)
+            self.assertIn("4 not modified", out)
+            self.assertTrue(all(headers.get('If-None-Match') for _, headers in fake.requests))
+            self.assertTrue(all(headers.get('If-Modified-Since') for _, headers in fake.requests))
+
+            # A changed payload and a locally edited row are both written again
+            self.payloads[2]['stats'][0]['base_stat'] = 61
+            Pokemon.objects.filter(slug='charmander').update(hp=1)
+            out = self.sync(fake)
+        self.assertIn("2 Pokémon data fetched and saved!", out)
+        self.assertIn("3 not modified", out)
+        self.assertEqual(Pokemon.objects.get(slug='ivysaur').hp, 61)
+        self.assertEqual(Pokemon.objects.get(slug='charmander').hp, 45)
+
+    def test_interrupted_sync_resumes_from_checkpoint(self):
+        upsert = ingest.upsert_pokemons
+        calls = []
+
+        def fail_second_chunk(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            return upsert(*args, **kwargs)
+
+        checkpoint = os.path.join(self.cache_dir, 'checkpoint.json')
+        with FakePokeAPI(self.payloads) as fake:
+            with mock.patch.object(ingest, 'upsert_pokemons', side_effect=fail_second_chunk):
+                with self.assertRaises(KeyboardInterrupt):
+                    self.sync(fake, checkpoint_every=2)
+            self.assertEqual(Pokemon.objects.count(), 2)
+            with open(checkpoint) as f:
+                self.assertEqual(json.load(f)['next'], 3)
+
+            fake.requests.clear()
+            out = self.sync(fake, checkpoint_every=2)
+            self.assertIn("Resuming from #3", out)
+            self.assertEqual(sorted(n for n, _ in fake.requests), [3, 4])
+            self.assertEqual(Pokemon.objects.count(), 4)
+            self.assertFalse(os.path.exists(checkpoint))
+
+            # A checkpoint only applies to the same range
+            with open(checkpoint, 'w') as f:
+                json.dump({'run': {'base_url': fake.base_url, 'start': 1, 'end': 50}, 'next': 3}, f)
+            fake.requests.clear()
+            self.sync(fake)
+            self.assertEqual(sorted(n for n, _ in fake.requests), [1, 2, 3, 4])
+
+    def test_resumed_sync_retries_failed_numbers_first(self):
+        upsert = ingest.upsert_pokemons
+        calls = []
+
+        def fail_second_chunk(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            return upsert(*args, **kwargs)
+
+        checkpoint = os.path.join(self.cache_dir, 'checkpoint.json')
+        with FakePokeAPI(self.payloads, failures={2: 1}) as fake:
+            with mock.patch.object(ingest, 'upsert_pokemons', side_effect=fail_second_chunk):
+                with self.assertRaises(KeyboardInterrupt):
+                    self.sync(fake, checkpoint_every=2, retries=0)
+            self.assertEqual(list(Pokemon.objects.values_list('slug', flat=True)), ['bulbasaur'])
+            with open(checkpoint) as f:
+                state = json.load(f)
+            self.assertEqual((state['next'], state['failed']), (3, [2]))
+
+            fake.requests.clear()
+            out = self.sync(fake, checkpoint_every=2, retries=0)
+            self.assertIn("Retrying 1 Pokémon that failed before", out)
+            self.assertEqual(sorted(n for n, _ in fake.requests), [2, 3, 4])
+            self.assertEqual(Pokemon.objects.count(), 4)
+            self.assertFalse(os.path.exists(checkpoint))
+
+    def test_response_cache_round_trip(self):
+        response_cache = pokeapi.ResponseCache(self.cache_dir)
+        self.assertIsNone(response_cache.get("http://example.test/a/"))
+        response_cache.put("http://example.test/a/", {'ETag': '"x"'}, {'name': 'mew'})
+        entry = response_cache.get("http://example.test/a/")
+        self.assertEqual((entry['etag'], entry['last_modified'], entry['data']), ('"x"', None, {'name': 'mew'}))
+        self.assertEqual(os.listdir(self.cache_dir), [os.path.basename(response_cache._path("http://example.test/a/"))])
+
+
+def png_bytes(width=475, height=475):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGBA', (width, height), (255, 0, 0, 255)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_URL='/media/')
+class ImageMirrorTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.pikachu = Pokemon.objects.create(
+            name="Pikachu", type1="electric", hp=35, attack=55, defense=40,
+            sp_attack=50, sp_defense=50, speed=90, image_url="http://images.invalid/25.png"
+        )
+
+    def mirror(self, **options):
+        out, err = io.StringIO(), io.StringIO()
+        call_command('mirror_images', stdout=out, stderr=err, rate=0, verbosity=0, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_falls_back_to_remote_image(self):
+        sources = images.image_sources(self.pikachu, 'card')
+        self.assertEqual((sources['src'], sources['srcset']), ("http://images.invalid/25.png", ''))
+        response = self.client.get(reverse('PokeApp:home'))
+        self.assertContains(response, 'src="http://images.invalid/25.png"')
+        self.assertNotContains(response, 'srcset="/media/')
+
+    def test_concurrent_writes_use_their_own_temp_files(self):
+        path = os.path.join(self.media_root, 'artwork.png')
+        both_writing = threading.Barrier(2, timeout=5)
+        errors = []
+
+        def write(data):
+            def save(f):
+                f.write(data)
+                both_writing.wait()
+            try:
+                images._write(path, save)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(data,)) for data in (b'a' * 10, b'b' * 10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(os.listdir(self.media_root), ['artwork.png'])
+        with open(path, 'rb') as f:
+            self.assertIn(f.read(), (b'a' * 10, b'b' * 10))
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o644)
+
+    def test_requires_pillow(self):
+        with mock.patch.object(images, 'pillow_available', return_value=False):
+            with self.assertRaises(CommandError):
+                self.mirror()
+
+    @skipUnless(images.pillow_available(), "Pillow is not installed")
+    def test_mirrors_variants_and_serves_srcset(self):
+        from PIL import Image
+
+        with FakePokeAPI({}, files={'/25.png': png_bytes()}) as fake:
+            Pokemon.objects.filter(pk=self.pikachu.pk).update(image_url=f"{fake.root}/25.png")
+            out, _ = self.mirror()
+            self.assertIn("Mirrored 1 images (9 files)", out)
+            self.assertIn("All images are already mirrored!", self.mirror()[0])
+        self.assertEqual(len(fake.requests), 1)
+
+        pikachu = Pokemon.objects.get(pk=self.pikachu.pk)
+        self.assertTrue(images.has_local_image(pikachu))
+        for width in (96, 192, 224, 448):
+            with Image.open(os.path.join(self.media_root, images.variant_path(pikachu.image_path, width, 'webp'))) as im:
+                self.assertEqual((im.format, im.width), ('WEBP', width))
+
+        card = images.image_sources(pikachu, 'card')
+        base = os.path.splitext(pikachu.image_path)[0]
+        self.assertEqual(card['src'], f"/media/{base}_96.png")
+        self.assertEqual(card['webp_srcset'], f"/media/{base}_96.webp 1x, /media/{base}_192.webp 2x")
+
+        response = self.client.get(reverse('PokeApp:home'))
+        self.assertContains(response, f'<source type="image/webp" srcset="{card["webp_srcset"]}" />', html=False)
+        response = self.client.get(reverse('PokeApp:pokemon_detail', args=["pikachu"]))
+        self.assertContains(response, f"/media/{base}_448.webp 2x")
+        result = self.client.get(reverse('PokeApp:api_pokemon_list')).json()['results'][0]
+        self.assertEqual((result['image_src'], result['image_srcset']), (card['src'], card['srcset']))
+
+    @skipUnless(images.pillow_available(), "Pillow is not installed")
+    def test_changed_url_and_broken_images(self):
+        with FakePokeAPI({}, files={'/25.png': png_bytes(), '/25b.png': png_bytes(50, 40), '/bad.png': b'nope'}) as fake:
+            Pokemon.objects.filter(pk=self.pikachu.pk).update(image_url=f"{fake.root}/25.png")
+            self.mirror()
+            old_path = Pokemon.objects.get(pk=self.pikachu.pk).image_path
+
+            # A new artwork URL is not served from the old mirror, and re-mirroring replaces it
+            Pokemon.objects.filter(pk=self.pikachu.pk).update(image_url=f"{fake.root}/25b.png")
+            pikachu = Pokemon.objects.get(pk=self.pikachu.pk)
+            self.assertEqual(images.image_sources(pikachu)['src'], f"{fake.root}/25b.png")
+            self.mirror()
+            pikachu = Pokemon.objects.get(pk=self.pikachu.pk)
+            self.assertNotEqual(pikachu.image_path, old_path)
+            files = os.listdir(os.path.join(self.media_root, images.IMAGE_SUBDIR))
+            self.assertEqual(len(files), 9)
+            self.assertTrue(all(name.startswith(os.path.basename(pikachu.image_path)[:-4]) for name in files))
+
+            Pokemon.objects.filter(pk=self.pikachu.pk).update(image_url=f"{fake.root}/bad.png")
+            out, err = self.mirror()
+        self.assertIn("1 images could not be mirrored", out)
+        self.assertIn("pikachu:", err)
+        self.assertEqual(Pokemon.objects.get(pk=self.pikachu.pk).image_path, pikachu.image_path)
+
+    @skipUnless(images.pillow_available(), "Pillow is not installed")
+    def test_failures_do_not_lose_mirrored_rows(self):
+        from PIL import Image
+
+        raichu = Pokemon.objects.create(
+            name="Raichu", type1="electric", hp=60, attack=90, defense=55,
+            sp_attack=90, sp_defense=80, speed=110, image_url="http://images.invalid/26.png"
+        )
+        files = {'/25.png': png_bytes(50, 50), '/26.png': png_bytes(300, 300)}
+        with FakePokeAPI({}, files=files) as fake, mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 100 * 100):
+            Pokemon.objects.filter(pk=self.pikachu.pk).update(image_url=f"{fake.root}/25.png")
+            Pokemon.objects.filter(pk=raichu.pk).update(image_url=f"{fake.root}/26.png")
+            out, err = self.mirror()
+        # A decompression bomb is one failed image, not a crashed run
+        self.assertIn("Mirrored 1 images", out)
+        self.assertIn("raichu:", err)
+        self.assertTrue(Pokemon.objects.get(pk=self.pikachu.pk).image_path)
+        self.assertFalse(Pokemon.objects.get(pk=raichu.pk).image_path)
+
+        Pokemon.objects.filter(pk=self.pikachu.pk).update(image_path='')
+        with FakePokeAPI({}, files=files) as fake, \
+                mock.patch.object(images, 'remove_stale', side_effect=[0, KeyboardInterrupt]):
+            Pokemon.objects.filter(pk=self.pikachu.pk).update(image_url=f"{fake.root}/25.png")
+            Pokemon.objects.filter(pk=raichu.pk).update(image_url=f"{fake.root}/26.png")
+            with self.assertRaises(KeyboardInterrupt):
+                self.mirror(concurrency=1)
+        # The image finished before the interruption is still recorded
+        self.assertEqual(Pokemon.objects.exclude(image_path='').count(), 1)
+
+
+class CleanDuplicatesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Duplicates only exist where the case-insensitive constraint is missing
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX pokemon_name_ci_unique')
+        stats = dict(hp=35, attack=55, defense=40, sp_attack=50, sp_defense=50, speed=90)
+        self.pikachu = Pokemon.objects.create(name="Pikachu", type1="electric", **stats)
+        self.pikachu2 = Pokemon.objects.create(name="PIKACHU", slug="pikachu-2", type1="electric", **stats)
+        self.pikachu3 = Pokemon.objects.create(name="pikachu", slug="pikachu-3", type1="electric", **stats)
+        self.mew = Pokemon.objects.create(name="Mew", type1="psychic", **stats)
+        self.ash = User.objects.create_user(username="ash", password="pikachu123")
+        self.misty = User.objects.create_user(username="misty", password="starmie123")
+        # Ash favorited two copies; the older favorite survives, moved onto the kept row
+        self.ash_old = Favorite.objects.create(user=self.ash, pokemon=self.pikachu3)
+        Favorite.objects.create(user=self.ash, pokemon=self.pikachu)
+        Favorite.objects.create(user=self.ash, pokemon=self.mew)
+        Favorite.objects.create(user=self.misty, pokemon=self.pikachu2)
+
+    def clean(self, **options):
+        out = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('clean_duplicates', stdout=out, **options)
+        return out.getvalue()
+
+    def test_merges_duplicates_and_favorites(self):
+        self.assertIn(self.pikachu3.id, get_favorite_ids(self.ash))
+        out = self.clean()
+        self.assertIn("Found 1 Pokémon with duplicates", out)
+        self.assertIn("Deleted 2 duplicates, moving 2 favorites and merging 1", out)
+        self.assertEqual(list(Pokemon.objects.order_by('id').values_list('name', flat=True)), ["Pikachu", "Mew"])
+        self.assertEqual(
+            sorted(Favorite.objects.values_list('user__username', 'pokemon__name')),
+            [("ash", "Mew"), ("ash", "Pikachu"), ("misty", "Pikachu")],
+        )
+        kept = Favorite.objects.get(user=self.ash, pokemon=self.pikachu)
+        self.assertEqual((kept.id, kept.created_at), (self.ash_old.id, self.ash_old.created_at))
+        self.assertEqual(sorted(get_favorite_ids(self.ash)), sorted([self.pikachu.id, self.mew.id]))
+        self.assertEqual(Pokemon.objects.get(pk=self.pikachu.pk).favorite_count, 2)
+        self.assertIn("No duplicates found!", self.clean())
+
+    def test_dry_run_changes_nothing(self):
+        out = self.clean(dry_run=True)
+        self.assertIn("Would delete 2 duplicates, moving 2 favorites and merging 1", out)
+        self.assertIn("  - Pikachu: 3 entries", out)
+        self.assertEqual(Pokemon.objects.count(), 4)
+        self.assertEqual(Favorite.objects.count(), 4)
+
+    def test_query_count_does_not_grow_with_duplicates(self):
+        from .dedup import collapse_duplicates
+
+        with CaptureQueriesContext(connection) as few:
+            collapse_duplicates()
+        stats = dict(hp=1, attack=1, defense=1, sp_attack=1, sp_defense=1, speed=1)
+        for i in range(30):
+            Pokemon.objects.create(name=f"Clone{i}", type1="normal", **stats)
+            copy = Pokemon.objects.create(name=f"CLONE{i}", slug=f"clone{i}-copy", type1="normal", **stats)
+            Favorite.objects.create(user=self.misty, pokemon=copy)
+        with CaptureQueriesContext(connection) as many:
+            report = collapse_duplicates()
+        self.assertEqual((report.groups, report.pokemons, report.favorites_moved), (30, 30, 30))
+        self.assertEqual(len(many.captured_queries), len(few.captured_queries))
+
+
+class ReloadPokedexTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        stats = dict(hp=45, attack=49, defense=49, sp_attack=65, sp_defense=65, speed=45)
+        self.bulbasaur = Pokemon.objects.create(name="Bulbasaur", type1="grass", type2="poison", **stats)
+        self.charmander = Pokemon.objects.create(
+            name="Charmander", type1="fire", image_url="https://img.example/2.png", **stats
+        )
+        self.squirtle = Pokemon.objects.create(name="Squirtle", type1="water", **stats)
+        self.ash = User.objects.create_user(username="ash", password="pikachu123")
+        self.misty = User.objects.create_user(username="misty", password="starmie123")
+        Favorite.objects.create(user=self.ash, pokemon=self.bulbasaur)
+        Favorite.objects.create(user=self.ash, pokemon=self.squirtle)
+        Favorite.objects.create(user=self.misty, pokemon=self.squirtle)
+        self.payloads = {
+            1: pokeapi_payload(1, 'bulbasaur', ['grass', 'poison'], (50, 49, 49, 65, 65, 45)),
+            2: pokeapi_payload(2, 'charmander', ['fire']),
+            3: pokeapi_payload(3, 'pikachu', ['electric']),
+        }
+
+    def reload(self, fake, **options):
+        out = io.StringIO()
+        options = {'base_url': fake.base_url, 'rate': 0, 'backoff': 0, 'retries': 0, 'verbosity': 0,
+                   'start': 1, 'end': 3, **options}
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('reload_pokedex', stdout=out, stderr=io.StringIO(), **options)
+        return out.getvalue()
+
+    def test_swaps_in_fetched_pokedex_keeping_ids_and_favorites(self):
+        self.assertEqual(len(get_favorite_ids(self.ash)), 2)
+        with FakePokeAPI(self.payloads) as fake:
+            out = self.reload(fake)
+        self.assertIn("1 added, 1 updated, 1 removed (2 favorites of removed Pokémon dropped)", out)
+        self.assertEqual(
+            sorted(Pokemon.objects.values_list('slug', flat=True)), ["bulbasaur", "charmander", "pikachu"],
+        )
+        bulbasaur = Pokemon.objects.get(slug="bulbasaur")
+        self.assertEqual((bulbasaur.id, bulbasaur.hp), (self.bulbasaur.id, 50))
+        self.assertEqual(Pokemon.objects.get(slug="charmander").id, self.charmander.id)
+        self.assertEqual(list(Favorite.objects.values_list('user__username', 'pokemon_id')), [("ash", self.bulbasaur.id)])
+        self.assertEqual(list(get_favorite_ids(self.ash)), [self.bulbasaur.id])
+        self.assertFalse(PokemonStaging.objects.exists())
+
+    def test_failed_fetch_or_validation_leaves_live_data_alone(self):
+        with FakePokeAPI(self.payloads, failures={3: 1}) as fake:
+            with self.assertRaisesMessage(CommandError, "1 Pokémon could not be fetched"):
+                self.reload(fake)
+            with self.assertRaisesMessage(CommandError, "Only 1 Pokémon are staged for 3 live ones"):
+                self.reload(fake, end=1)
+        self.assertEqual(Pokemon.objects.count(), 3)
+        self.assertEqual(Favorite.objects.count(), 3)
+        self.assertFalse(PokemonStaging.objects.exists())
+
+        reload.stage_records([{**pokeapi.parse_pokemon(self.payloads[2]), 'hp': -1}])
+        self.assertEqual(reload.validate_staging(min_ratio=0), ["Negative hp values"])
+
+    def test_new_artwork_url_clears_the_mirror(self):
+        Pokemon.objects.filter(slug__in=["bulbasaur", "charmander"]).update(image_path="pokemon_images/old.png")
+        records = list(Pokemon.objects.values(*reload.STAGED_FIELDS))
+        for record in records:
+            if record['slug'] == "charmander":
+                record['image_url'] = "https://img.example/2-new.png"
+        reload.stage_records(records)
+        with self.captureOnCommitCallbacks(execute=True):
+            reload.swap_in()
+        self.assertEqual(
+            dict(Pokemon.objects.values_list('slug', 'image_path')),
+            {"bulbasaur": "pokemon_images/old.png", "charmander": "", "squirtle": ""},
+        )
+
+    def test_rename_onto_a_surviving_name_is_rejected(self):
+        records = list(Pokemon.objects.values(*reload.STAGED_FIELDS))
+        names = {"bulbasaur": "SQUIRTLE", "squirtle": "Wartortle"}
+        reload.stage_records([{**record, 'name': names.get(record['slug'], record['name'])} for record in records])
+        self.assertEqual(reload.validate_staging(), ["Names still held by other Pokémon: squirtle"])
+        with self.assertRaisesMessage(reload.ReloadError, "Names still held by other Pokémon: squirtle"):
+            reload.swap_in()
+        self.assertEqual(Pokemon.objects.get(slug="squirtle").name, "Squirtle")
+
+        # A name freed by a Pokémon that is removed, or kept by its own row, is fine
+        reload.stage_records([{**records[0], 'name': "Squirtle"}, records[1]])
+        self.assertEqual(reload.validate_staging(min_ratio=0), [])
+
+    def test_reload_from_dump(self):
+        path = os.path.join(tempfile.mkdtemp(), 'pokedex.npz')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        call_command('dump_pokedex', path, stdout=io.StringIO())
+        Pokemon.objects.filter(pk=self.squirtle.pk).update(speed=1)
+        Pokemon.objects.create(name="Mew", type1="psychic", hp=100, attack=100, defense=100,
+                               sp_attack=100, sp_defense=100, speed=100)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('reload_pokedex', from_dump=path, min_ratio=0.5, stdout=io.StringIO())
+        self.assertEqual(Pokemon.objects.get(pk=self.squirtle.pk).speed, 45)
+        self.assertFalse(Pokemon.objects.filter(slug="mew").exists())
+        self.assertEqual(Favorite.objects.count(), 3)
+
+    def test_swap_statement_count_does_not_grow(self):
+        records = [pokeapi.parse_pokemon(payload) for payload in self.payloads.values()]
+        reload.stage_records(records)
+        with CaptureQueriesContext(connection) as few:
+            reload.swap_in()
+        reload.stage_records(records + [{**records[2], 'name': f"Clone{i}"} for i in range(40)])
+        with CaptureQueriesContext(connection) as many:
+            report = reload.swap_in()
+        self.assertEqual((report.inserted, report.updated, report.deleted), (40, 0, 0))
+        self.assertEqual(len(many.captured_queries), len(few.captured_queries))
+
+
+class FavoriteWriteTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='brock', password='onix12345')
+        self.pokemons = [
+            Pokemon.objects.create(
+                name=f"Rock{i}", type1="rock", hp=50, attack=50, defense=50,
+                sp_attack=50, sp_defense=50, speed=50
+            )
+            for i in range(6)
+        ]
+        self.ids = [p.id for p in self.pokemons]
+
+    def favorite_ids(self):
+        return sorted(Favorite.objects.filter(user=self.user).values_list('pokemon_id', flat=True))
+
+    def statements(self, queries):
+        # Savepoints come from the test case's own transaction
+        return [q['sql'].split()[0] for q in queries.captured_queries if 'SAVEPOINT' not in q['sql']]
+
+    def test_toggle_is_one_conditional_statement(self):
+        target = self.ids[0]
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(favorites.toggle_favorite(self.user.pk, target), 'added')
+        # The favorite, then its counter
+        self.assertEqual(self.statements(queries), ['INSERT', 'UPDATE'])
+        self.assertEqual(self.favorite_ids(), [target])
+        self.assertIsNotNone(Favorite.objects.get(user=self.user).created_at)
+        self.assertEqual(Pokemon.objects.get(pk=target).favorite_count, 1)
+        self.assertIn(target, get_favorite_ids(self.user))
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(favorites.toggle_favorite(self.user.pk, target), 'removed')
+        self.assertEqual(self.statements(queries), ['INSERT', 'DELETE', 'UPDATE'])
+        self.assertEqual(Pokemon.objects.get(pk=target).favorite_count, 0)
+        self.assertEqual(self.favorite_ids(), [])
+        self.assertNotIn(target, get_favorite_ids(self.user))
+        self.assertIsNone(favorites.toggle_favorite(self.user.pk, max(self.ids) + 1))
+        self.assertFalse(Favorite.objects.exists())
+
+    def test_toggle_view(self):
+        self.client.force_login(self.user)
+        url = reverse('PokeApp:toggle_favorite', args=[self.ids[1]])
+        self.assertEqual(self.client.post(url).json(), {'status': 'added'})
+        self.assertEqual(self.client.post(url).json(), {'status': 'removed'})
+        missing = reverse('PokeApp:toggle_favorite', args=[max(self.ids) + 1])
+        self.assertEqual(self.client.post(missing).status_code, 404)
+        # Ids too large for the database are simply not found
+        self.assertEqual(self.client.post(f"/favorite/{2 ** 64}/").status_code, 404)
+        self.assertEqual(self.client.post(f"/favorite/{2 ** 63}/").status_code, 404)
+        self.assertEqual(self.client.get(url).status_code, 400)
+
+    def test_batch_adds_and_removes_in_one_request(self):
+        Favorite.objects.create(user=self.user, pokemon=self.pokemons[0])
+        Favorite.objects.create(user=self.user, pokemon=self.pokemons[1])
+        self.assertEqual(len(get_favorite_ids(self.user)), 2)
+        self.client.force_login(self.user)
+        url = reverse('PokeApp:batch_favorites')
+        payload = {'add': self.ids[1:4] + [max(self.ids) + 1], 'remove': [self.ids[0], self.ids[5]]}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, payload, content_type='application/json')
+        self.assertEqual(response.json(), {'added': 2, 'removed': 1})
+        self.assertEqual(self.favorite_ids(), self.ids[1:4])
+        self.assertEqual(list(get_favorite_ids(self.user)), self.ids[1:4])
+
+        for bad in (
+            {'add': 'all'}, {'add': [1], 'remove': [1]}, {'add': [True]}, [1, 2],
+            {'add': [2 ** 64]}, {'remove': [-2 ** 63 - 1]},
+        ):
+            self.assertEqual(self.client.post(url, bad, content_type='application/json').status_code, 400)
+        self.assertEqual(self.client.post(url, 'not json', content_type='application/json').status_code, 400)
+        self.assertEqual(self.favorite_ids(), self.ids[1:4])
+        with self.assertRaises(ValueError):
+            favorites.set_favorites(self.user.pk, add=[2 ** 63])
+
+    def test_batch_statement_count_does_not_grow(self):
+        Favorite.objects.create(user=self.user, pokemon=self.pokemons[5])
+        with CaptureQueriesContext(connection) as few:
+            favorites.set_favorites(self.user.pk, add=self.ids[:1], remove=self.ids[5:])
+        with CaptureQueriesContext(connection) as many:
+            added, removed = favorites.set_favorites(self.user.pk, add=self.ids[1:5], remove=self.ids[:1])
+        self.assertEqual((added, removed), (4, 1))
+        self.assertEqual(len(many.captured_queries), len(few.captured_queries))
+        self.assertEqual(
+            list(Pokemon.objects.order_by('id').values_list('favorite_count', flat=True)), [0, 1, 1, 1, 1, 0],
+        )
+
+    def test_counts_follow_rows_actually_changed(self):
+        # Another request got there first: its rows exist and were already counted
+        Favorite.objects.create(user=self.user, pokemon=self.pokemons[0])
+        Favorite.objects.create(user=self.user, pokemon=self.pokemons[1])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(favorites.set_favorites(self.user.pk, add=self.ids[:3], remove=self.ids[3:]), (1, 0))
+        self.assertEqual(self.statements(queries), ['INSERT', 'UPDATE', 'DELETE'])
+        self.assertEqual(
+            list(Pokemon.objects.order_by('id').values_list('favorite_count', flat=True)), [1, 1, 1, 0, 0, 0],
+        )
+
+    def test_batch_without_returning_checks_each_row(self):
+        features = type(connection.features)
+        Favorite.objects.create(user=self.user, pokemon=self.pokemons[0])
+        with mock.patch.object(features, 'can_return_rows_from_bulk_insert', False):
+            with CaptureQueriesContext(connection) as queries:
+                added, removed = favorites.set_favorites(
+                    self.user.pk, add=self.ids[:3] + [max(self.ids) + 1], remove=self.ids[3:5],
+                )
+            self.assertEqual((added, removed), (2, 0))
+            self.assertEqual(self.statements(queries), ['INSERT'] * 4 + ['UPDATE'] + ['DELETE'] * 2)
+            self.assertEqual(favorites.set_favorites(self.user.pk, remove=self.ids[:2]), (0, 2))
+        self.assertEqual(
+            list(Pokemon.objects.order_by('id').values_list('favorite_count', flat=True)), [0, 0, 1, 0, 0, 0],
+        )
+
+
+class FavoriteCountTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        leaderboard.reset_leaderboard()
+        self.addCleanup(leaderboard.reset_leaderboard)
+        self.pokemons = [
+            Pokemon.objects.create(
+                name=f"Ghost{i}", type1="ghost", type2="poison" if i % 2 else None, hp=50, attack=50,
+                defense=50, sp_attack=50, sp_defense=50, speed=50
+            )
+            for i in range(4)
+        ]
+        self.users = [User.objects.create_user(username=f"trainer{i}", password="gengar123") for i in range(3)]
+
+    def counts(self):
+        return list(Pokemon.objects.order_by('id').values_list('favorite_count', flat=True))
+
+    def test_orm_writes_keep_counts(self):
+        favorite = Favorite.objects.create(user=self.users[0], pokemon=self.pokemons[1])
+        Favorite.objects.create(user=self.users[1], pokemon=self.pokemons[1])
+        self.assertEqual(self.counts(), [0, 2, 0, 0])
+        favorite.delete()
+        self.users[1].delete()
+        self.assertEqual(self.counts(), [0, 0, 0, 0])
+
+    def test_reconcile_command_repairs_drift(self):
+        for user in self.users:
+            favorites.set_favorites(user.pk, add=[self.pokemons[2].id, self.pokemons[3].id])
+        Pokemon.objects.filter(pk=self.pokemons[2].pk).update(favorite_count=7)
+        Pokemon.objects.filter(pk=self.pokemons[0].pk).update(favorite_count=-1)
+
+        out = io.StringIO()
+        call_command('reconcile_favorite_counts', dry_run=True, stdout=out)
+        self.assertIn("2 favorite counts are out of date", out.getvalue())
+        self.assertEqual(self.counts(), [-1, 0, 7, 3])
+        out = io.StringIO()
+        call_command('reconcile_favorite_counts', stdout=out)
+        self.assertIn("Fixed 2 favorite counts", out.getvalue())
+        self.assertEqual(self.counts(), [0, 0, 3, 3])
+        out = io.StringIO()
+        call_command('reconcile_favorite_counts', stdout=out)
+        self.assertIn("All favorite counts are correct!", out.getvalue())
+
+    def test_stale_saves_keep_counts(self):
+        from django.contrib.admin.sites import site
+        from django.forms import modelform_factory
+
+        stale = Pokemon.objects.get(pk=self.pokemons[1].pk)
+        Favorite.objects.create(user=self.users[0], pokemon=self.pokemons[1])
+        stale.hp = 60
+        stale.save()
+        self.assertEqual(self.counts(), [0, 1, 0, 0])
+        self.assertEqual(Pokemon.objects.get(pk=stale.pk).hp, 60)
+
+        self.assertNotIn('favorite_count', modelform_factory(Pokemon, fields='__all__').base_fields)
+        self.assertIn('favorite_count', site._registry[Pokemon].readonly_fields)
+
+    def test_leaderboard_is_served_from_memory(self):
+        for user, picks in zip(self.users, ([3, 1], [3, 1], [3, 2])):
+            favorites.set_favorites(user.pk, add=[self.pokemons[i].id for i in picks])
+        url = reverse('PokeApp:api_leaderboard')
+        data = self.client.get(url).json()
+        self.assertEqual(
+            [(row['name'], row['favorite_count']) for row in data['results']],
+            [("Ghost3", 3), ("Ghost1", 2), ("Ghost2", 1)],
+        )
+        self.assertEqual((data['results'][0]['type1'], data['results'][0]['type2']), ("Ghost", "Poison"))
+        # Ties keep id order and the cached rows answer any limit
+        favorites.toggle_favorite(self.users[2].pk, self.pokemons[1].id)
+        with self.assertNumQueries(0):
+            data = self.client.get(url, {'limit': 1}).json()
+        self.assertEqual([row['name'] for row in data['results']], ["Ghost3"])
+        self.assertEqual(self.client.get(url, {'limit': 'x'}).status_code, 400)
+
+        leaderboard.reset_leaderboard()
+        data = self.client.get(url).json()
+        self.assertEqual([row['favorite_count'] for row in data['results']], [3, 3, 1])
+        dataset.bump_version()
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+    def test_export_reads_the_counter(self):
+        favorites.set_favorites(self.users[0].pk, add=[self.pokemons[0].id])
+        with self.assertNumQueries(1):
+            rows = list(export.export_rows(with_favorites=True))
+        self.assertEqual([row[-1] for row in rows], [1, 0, 0, 0])
+
+
+class FavoritesPageTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='erika', password='tangela123')
+        self.other = User.objects.create_user(username='sabrina', password='alakazam123')
+        self.pokemons = [
+            Pokemon.objects.create(
+                name=f"Grass{i}", type1="grass", type2="poison" if i % 3 == 0 else None, hp=50, attack=50,
+                defense=50, sp_attack=50, sp_defense=50, speed=50
+            )
+            for i in range(30)
+        ]
+        # Favorited newest-last; several share a timestamp so ties are broken by id
+        base = timezone.now()
+        favorites = [
+            Favorite(user=self.user, pokemon=p, created_at=base + timedelta(seconds=i // 3))
+            for i, p in enumerate(self.pokemons)
+        ]
+        with mock.patch.object(Favorite._meta.get_field('created_at'), 'auto_now_add', False):
+            Favorite.objects.bulk_create(favorites)
+        Favorite.objects.create(user=self.other, pokemon=self.pokemons[0])
+        self.newest_first = [p.name for p in reversed(self.pokemons)]
+        self.client.force_login(self.user)
+
+    def test_json_pages_cover_every_favorite_once(self):
+        url = reverse('PokeApp:api_favorites')
+        names, cursor = [], None
+        while True:
+            params = {'page_size': 7, **({'cursor': cursor} if cursor else {})}
+            data = self.client.get(url, params).json()
+            self.assertLessEqual(len(data['results']), 7)
+            names += [row['name'] for row in data['results']]
+            cursor = data['next']
+            if not cursor:
+                break
+        self.assertEqual(names, self.newest_first)
+        row = self.client.get(url, {'page_size': 1}).json()['results'][0]
+        self.assertEqual((row['slug'], row['type1'], row['bg_color1']), ("grass29", "grass", "bg-green-500"))
+        self.assertEqual(row['detail_url'], reverse('PokeApp:pokemon_detail', args=["grass29"]))
+        for cursor in ('bogus', encode_cursor([None, 1]), encode_cursor(["yesterday", 1])):
+            response = self.client.get(url, {'cursor': cursor})
+            self.assertEqual((response.status_code, response.json()), (400, {'error': 'Invalid cursor'}))
+        response = self.client.get(url, {'page_size': 'x'})
+        self.assertEqual((response.status_code, response.json()), (400, {'error': 'Invalid page_size'}))
+        self.assertRedirects(
+            self.client.get(reverse('PokeApp:favorites'), {'cursor': encode_cursor([None, 1])}),
+            reverse('PokeApp:favorites'),
+        )
+
+    def test_page_loads_only_card_columns(self):
+        get_favorite_ids(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('PokeApp:favorites'))
+        self.assertEqual([p.name for p in response.context['pokemons']], self.newest_first[:24])
+        self.assertTrue(response.context['next_cursor'])
+        self.assertContains(response, 'data-next-cursor="')
+        self.assertContains(response, 'Older favorites')
+        favorite_queries = [q['sql'] for q in queries.captured_queries if 'PokeApp_favorite' in q['sql']]
+        self.assertEqual(len(favorite_queries), 1)
+        self.assertIn('LIMIT 25', favorite_queries[0])
+        self.assertNotIn('"hp"', favorite_queries[0])
+
+        last = self.client.get(reverse('PokeApp:favorites'), {'cursor': response.context['next_cursor']})
+        self.assertEqual([p.name for p in last.context['pokemons']], self.newest_first[24:])
+        self.assertIsNone(last.context['next_cursor'])
+        self.assertRedirects(
+            self.client.get(reverse('PokeApp:favorites'), {'cursor': 'bogus'}), reverse('PokeApp:favorites'),
+        )
+
+    def test_cursor_keeps_microseconds(self):
+        Favorite.objects.filter(user=self.user).delete()
+        base = timezone.now().replace(microsecond=100)
+        with mock.patch.object(Favorite._meta.get_field('created_at'), 'auto_now_add', False):
+            for i, p in enumerate(self.pokemons[:3]):
+                Favorite.objects.create(user=self.user, pokemon=p, created_at=base + timedelta(microseconds=i * 300))
+        url = reverse('PokeApp:api_favorites')
+        first = self.client.get(url, {'page_size': 1}).json()
+        rest = self.client.get(url, {'page_size': 5, 'cursor': first['next']}).json()
+        self.assertEqual(
+            [row['name'] for row in first['results'] + rest['results']], ["Grass2", "Grass1", "Grass0"],
+        )
+
+    def test_no_favorites_skips_the_query(self):
+        Favorite.objects.filter(user=self.user).delete()
+        get_favorite_ids(self.user)
+        response = self.client.get(reverse('PokeApp:favorites'))
+        self.assertContains(response, "You have not favorited any Pokémon yet.")
+        self.assertEqual(self.client.get(reverse('PokeApp:api_favorites')).json(), {'results': [], 'next': None})
@@ -10,6 +10,16 @@ urlpatterns = [
     path('logout/', views.logout_view, name='logout'),
     path('favorite/<int:pokemon_id>/', views.toggle_favorite, name='toggle_favorite'),
     path('favorites/', views.favorites_view, name='favorites'),
+    path('favorites/batch/', views.batch_favorites, name='batch_favorites'),
+    path('favorites/team/', views.team_view, name='team'),
     path('api/pokemons/', views.api_pokemon_list, name="api_pokemon_list"),
+    path('api/pokemons/export/', views.api_pokemon_export, name="api_pokemon_export"),
+    path('api/pokemons/leaderboard/', views.api_leaderboard, name="api_leaderboard"),
+    path('api/pokemons/search/', views.api_pokemon_search, name="api_pokemon_search"),
+    path('api/stats/types/', views.api_type_stats, name="api_type_stats"),
+    path('api/favorites/', views.api_favorites, name="api_favorites"),
+    path('api/team/coverage/', views.api_team_coverage, name="api_team_coverage"),
+    path('api/team/suggestions/', views.api_team_suggestions, name="api_team_suggestions"),
+    path('api/pokemons/<slug:slug>/similar/', views.api_pokemon_similar, name="api_pokemon_similar"),
     path('<slug:slug>/', views.pokemon_detail, name='pokemon_detail'),
 ]
\ No newline at end of file
@@ -1,90 +1,31 @@
+import json
+
 # Django imports
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from django.contrib.auth import login, logout
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
-from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
 from django.conf import settings
-from django.db.models import Min
+from django.utils.safestring import mark_safe
 
 # Local imports
 from . import models
+from . import charts
+from . import dataset
+from . import export
+from . import favorites
+from . import images
+from . import leaderboard
+from . import search
+from . import svgcharts
+from .constants import TYPE_COLORS, TYPE_BG_COLORS
+from .favorites import get_favorite_ids
 from .models import Favorite
-
-# Third-party imports
-import pandas as pd
-import matplotlib
-matplotlib.use('Agg')  
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-import os
-
-# Color constants
-TYPE_COLORS = {
-    "Grass": "text-green-600",
-    "Poison": "text-purple-600",
-    "Fire": "text-red-500",
-    "Water": "text-blue-500",
-    "Electric": "text-yellow-400",
-    "Ice": "text-cyan-400",
-    "Fighting": "text-orange-600",
-    "Ground": "text-yellow-700",
-    "Flying": "text-indigo-400",
-    "Psychic": "text-pink-500",
-    "Bug": "text-lime-500",
-    "Rock": "text-gray-500",
-    "Ghost": "text-purple-800",
-    "Dragon": "text-indigo-800",
-    "Dark": "text-gray-800",
-    "Steel": "text-gray-400",
-    "Fairy": "text-pink-300",
-    "Normal": "text-gray-700"
-}
-
-TYPE_BG_COLORS = {
-    "Grass": "bg-green-500",
-    "Poison": "bg-purple-500",
-    "Fire": "bg-red-500",
-    "Water": "bg-blue-500",
-    "Electric": "bg-yellow-400",
-    "Ice": "bg-cyan-400",
-    "Fighting": "bg-orange-500",
-    "Ground": "bg-yellow-600",
-    "Flying": "bg-indigo-400",
-    "Psychic": "bg-pink-500",
-    "Bug": "bg-lime-500",
-    "Rock": "bg-gray-500",
-    "Ghost": "bg-purple-600",
-    "Dragon": "bg-indigo-600",
-    "Dark": "bg-gray-700",
-    "Steel": "bg-gray-400",
-    "Fairy": "bg-pink-300",
-    "Normal": "bg-gray-500"
-}
-
-CHART_COLORS = {
-    "Grass": "#10b981",      # green-500
-    "Poison": "#8b5cf6",     # purple-500
-    "Fire": "#ef4444",       # red-500
-    "Water": "#3b82f6",      # blue-500
-    "Electric": "#facc15",   # yellow-400
-    "Ice": "#22d3ee",        # cyan-400
-    "Fighting": "#f97316",   # orange-500
-    "Ground": "#ca8a04",     # yellow-600
-    "Flying": "#818cf8",     # indigo-400
-    "Psychic": "#ec4899",    # pink-500
-    "Bug": "#84cc16",        # lime-500
-    "Rock": "#6b7280",       # gray-500
-    "Ghost": "#9333ea",      # purple-600
-    "Dragon": "#6366f1",     # indigo-600
-    "Dark": "#374151",       # gray-700
-    "Steel": "#9ca3af",      # gray-400
-    "Fairy": "#f9a8d4",      # pink-300
-    "Normal": "#6b7280"      # gray-500
-}
+from .pagination import InvalidCursor, keyset_page, parse_page_size
+from .query import QueryError, plan_pokemon_query
 
 # User Registration
 def register_view(request):
@@ -119,58 +60,116 @@ def logout_view(request):
 @login_required
 def toggle_favorite(request, pokemon_id):
     if request.method == 'POST':
-        pokemon = get_object_or_404(models.Pokemon, id=pokemon_id)
-        fav, created = Favorite.objects.get_or_create(user=request.user, pokemon=pokemon)
-        if not created:
-            fav.delete()
-            return JsonResponse({'status': 'removed'})
-        return JsonResponse({'status': 'added'})
+        status = favorites.toggle_favorite(request.user.pk, pokemon_id)
+        if status is None:
+            raise Http404("No Pokémon matches the given query.")
+        return JsonResponse({'status': status})
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
+# Most ids a single batch request may touch
+MAX_BATCH_FAVORITES = 2000
+
+def _id_list(value):
+    if not isinstance(value, list) or not all(
+        isinstance(v, int) and not isinstance(v, bool) and favorites.is_valid_id(v) for v in value
+    ):
+        raise ValueError
+    return value
+
+# Add/remove many favorites at once: {"add": [ids], "remove": [ids]}
+@login_required
+def batch_favorites(request):
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    try:
+        payload = json.loads(request.body)
+        add, remove = _id_list(payload.get('add', [])), _id_list(payload.get('remove', []))
+    except (ValueError, AttributeError):
+        return JsonResponse({'error': 'Expected {"add": [ids], "remove": [ids]}'}, status=400)
+    if set(add) & set(remove):
+        return JsonResponse({'error': 'An id cannot be both added and removed'}, status=400)
+    if len(add) + len(remove) > MAX_BATCH_FAVORITES:
+        return JsonResponse({'error': f'At most {MAX_BATCH_FAVORITES} ids per request'}, status=400)
+    added, removed = favorites.set_favorites(request.user.pk, add=add, remove=remove)
+    return JsonResponse({'added': added, 'removed': removed})
+
+# Rows per flushed chunk when the home grid is streamed
+STREAM_CHUNK_SIZE = 100
+STREAM_MARKER = mark_safe('<!-- pokemon-cards -->')
+
+def _add_card_fields(p, user_favs):
+    t1 = (p.type1 or "").capitalize()
+    t2 = (p.type2 or "").capitalize() if p.type2 else None
+    p.color1 = TYPE_COLORS.get(t1, "text-gray-600")
+    p.color2 = TYPE_COLORS.get(t2, "text-gray-600") if t2 else None
+    p.is_favorite = p.id in user_favs
+    p.image = images.image_sources(p, 'card')
+    return p
+
 def pokemon_list(request):
-    # Get unique Pokémon by name to avoid duplicates
-    pokemon_ids = models.Pokemon.objects.values('name').annotate(
-        id=Min('id')
-    ).values_list('id', flat=True)
-    
-    # Get the actual Pokémon objects
-    pokemons = models.Pokemon.objects.filter(id__in=pokemon_ids).order_by('id')
-    
-    user_favs = []
-    if request.user.is_authenticated:
-        user_favs = Favorite.objects.filter(user=request.user).values_list('pokemon_id', flat=True)
-    
+    user_favs = get_favorite_ids(request.user)
+
+    if request.GET.get('stream'):
+        return _stream_pokemon_list(request, user_favs)
+
+    # Only the first page is rendered here; infinite scroll picks up from the cursor.
+    # Names are unique (case-insensitively) at the database level, so no dedup is needed
+    pokemons, next_cursor = keyset_page(models.Pokemon.objects.all(), ['id'])
     for p in pokemons:
-        t1 = (p.type1 or "").capitalize()
-        t2 = (p.type2 or "").capitalize() if p.type2 else None
-        p.color1 = TYPE_COLORS.get(t1, "text-gray-600")
-        p.color2 = TYPE_COLORS.get(t2, "text-gray-600") if t2 else None
-        p.is_favorite = p.id in user_favs
+        _add_card_fields(p, user_favs)
     
-    return render(request, "base.html", {"pokemons": pokemons})
+    return render(request, "base.html", {"pokemons": pokemons, "next_cursor": next_cursor})
+
+def _stream_pokemon_list(request, user_favs):
+    """Send the whole grid for crawlers and no-JS clients, flushing cards in chunks."""
+    page = render_to_string("base.html", {"pokemons": [], "stream_marker": STREAM_MARKER}, request=request)
+    head, tail = page.split(STREAM_MARKER, 1)
+    card_template = get_template('PokeApp/pokemon_card.html')
+
+    def cards():
+        yield head
+        chunk = []
+        for p in models.Pokemon.objects.order_by('id').iterator(chunk_size=STREAM_CHUNK_SIZE):
+            chunk.append(card_template.render({'p': _add_card_fields(p, user_favs), 'user': request.user}, request))
+            if len(chunk) == STREAM_CHUNK_SIZE:
+                yield ''.join(chunk)
+                chunk = []
+        if chunk:
+            yield ''.join(chunk)
+        yield tail
+
+    return StreamingHttpResponse(cards(), content_type='text/html; charset=utf-8')
 
 def api_pokemon_list(request):
-    page = int(request.GET.get('page', 1))
-    page_size = 20
-    # Get unique Pokémon by name to avoid duplicates
-    pokemon_ids = models.Pokemon.objects.values('name').annotate(
-        id=Min('id')
-    ).values_list('id', flat=True)
-    
-    # Get the actual Pokémon objects
-    pokemons = models.Pokemon.objects.filter(id__in=pokemon_ids).order_by('id')
-    paginator = Paginator(pokemons, page_size)
-    page_obj = paginator.get_page(page)
+    try:
+        page_size = parse_page_size(request.GET.get('page_size'))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid page_size'}, status=400)
+    try:
+        pokemons, ordering = plan_pokemon_query(request.GET)
+    except QueryError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    user_favs = get_favorite_ids(request.user)
+    # Page through the canonical rows on the planned ordering instead of OFFSET
+    try:
+        page, next_cursor = keyset_page(pokemons, ordering, request.GET.get('cursor'), page_size)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
     results = []
-    for p in page_obj:
+    for p in page:
         t1 = (p.type1 or "").capitalize()
         t2 = (p.type2 or "").capitalize() if p.type2 else None
         color1 = TYPE_COLORS.get(t1, "text-gray-600")
         color2 = TYPE_COLORS.get(t2, "text-gray-600") if t2 else None
+        image = images.image_sources(p, 'card')
         results.append({
+            'id': p.id,
             'name': p.name,
             'slug': p.slug,
             'image_url': p.image_url,
+            'image_src': image['src'],
+            'image_srcset': image['srcset'],
+            'image_webp_srcset': image['webp_srcset'],
             'type1': t1,
             'type2': t2,
             'color1': color1,
@@ -178,24 +177,323 @@ def api_pokemon_list(request):
             'hp': p.hp,
             'attack': p.attack,
             'defense': p.defense,
+            'sp_attack': p.sp_attack,
+            'sp_defense': p.sp_defense,
+            'speed': p.speed,
+            'total': p.hp + p.attack + p.defense + p.sp_attack + p.sp_defense + p.speed,
             'detail_url': reverse('PokeApp:pokemon_detail', args=[p.slug]),
+            'is_favorite': p.id in user_favs,
+        })
+    return JsonResponse({'results': results, 'next': next_cursor})
+
+def api_pokemon_export(request):
+    fmt = request.GET.get('format', 'ndjson')
+    compress = request.GET.get('gzip') in ('1', 'true')
+    try:
+        chunks = export.export_chunks(fmt, request.GET.get('favorites') in ('1', 'true'), compress)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    filename = f"pokedex.{fmt}" + (".gz" if compress else "")
+    content_type = 'application/gzip' if compress else f"{export.CONTENT_TYPES[fmt]}; charset=utf-8"
+    # Rows are formatted as they are read, so the whole table is never held in memory
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+def api_pokemon_search(request):
+    try:
+        limit = max(1, min(int(request.GET.get('limit', search.DEFAULT_LIMIT)), search.MAX_LIMIT))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid limit'}, status=400)
+    results = []
+    for score, entry in search.get_index().search(request.GET.get('q', ''), limit):
+        t1 = (entry.type1 or "").capitalize()
+        t2 = (entry.type2 or "").capitalize() if entry.type2 else None
+        results.append({
+            'id': entry.id,
+            'name': entry.name,
+            'slug': entry.slug,
+            'image_url': entry.image_url,
+            'type1': t1,
+            'type2': t2,
+            'color1': TYPE_COLORS.get(t1, "text-gray-600"),
+            'color2': TYPE_COLORS.get(t2, "text-gray-600") if t2 else None,
+            'score': round(score, 3),
+            'detail_url': reverse('PokeApp:pokemon_detail', args=[entry.slug]),
         })
     return JsonResponse({'results': results})
 
+def _similar_pokemons(row, k, normalize=False, pokemon_type=None):
+    from .similarity import get_similarity_index
+
+    index = get_similarity_index()
+    snapshot = index.snapshot
+    results = []
+    for neighbour, distance in index.neighbours(row, k, normalize, pokemon_type):
+        type1, type2 = snapshot.type_names(neighbour)
+        t1 = type1.capitalize()
+        t2 = type2.capitalize() if type2 else None
+        results.append({
+            'id': int(snapshot.ids[neighbour]),
+            'name': snapshot.names[neighbour],
+            'slug': snapshot.slugs[neighbour],
+            'image_url': snapshot.image_urls[neighbour],
+            'type1': t1,
+            'type2': t2,
+            'color1': TYPE_COLORS.get(t1, "text-gray-600"),
+            'color2': TYPE_COLORS.get(t2, "text-gray-600") if t2 else None,
+            'distance': round(distance, 3),
+            'detail_url': reverse('PokeApp:pokemon_detail', args=[snapshot.slugs[neighbour]]),
+        })
+    return results
+
+def api_pokemon_similar(request, slug):
+    from . import analytics, similarity
+
+    try:
+        k = max(1, min(int(request.GET.get('k', similarity.DEFAULT_K)), similarity.MAX_K))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid k'}, status=400)
+    # Answered from the in-memory snapshot and its k-d tree, not the database
+    row = analytics.get_snapshot().row_for_slug(slug)
+    if row is None:
+        return JsonResponse({'error': 'Pokémon not found'}, status=404)
+    normalize = request.GET.get('normalize') in ('1', 'true')
+    try:
+        results = _similar_pokemons(row, k, normalize, request.GET.get('type') or None)
+    except ValueError:
+        return JsonResponse({'error': 'Unknown type'}, status=400)
+    return JsonResponse({'results': results})
+
+# Completions offered on the team page and by default from the suggestions API
+TEAM_SUGGESTIONS = 5
+MAX_TEAM_SUGGESTIONS = 20
+
+# Columns the favorite cards and the team builder read
+FAVORITE_CARD_FIELDS = ['id', 'name', 'slug', 'type1', 'type2', 'image_url', 'image_path']
+# Newest first; id breaks ties between favorites saved in the same instant
+FAVORITES_ORDERING = ['-created_at', '-id']
+FAVORITES_PAGE_SIZE = 24
+
+def _favorites_queryset(user):
+    return (
+        Favorite.objects.filter(user=user).select_related('pokemon')
+        .only('created_at', *(f'pokemon__{field}' for field in FAVORITE_CARD_FIELDS))
+    )
+
+def _add_favorite_card_fields(p):
+    t1 = (p.type1 or "").capitalize()
+    t2 = (p.type2 or "").capitalize() if p.type2 else None
+    p.color1 = "text-gray-600"  # Default text color
+    p.color2 = "text-gray-600" if t2 else None
+    p.bg_color1 = TYPE_BG_COLORS.get(t1, "bg-gray-500")
+    p.bg_color2 = TYPE_BG_COLORS.get(t2, "bg-gray-500") if t2 else None
+    p.image = images.image_sources(p, 'card')
+    return p
+
+def _favorite_pokemons(user):
+    # The cached id set answers "no favorites" without touching the database
+    pokemons = []
+    if get_favorite_ids(user):
+        pokemons = [fav.pokemon for fav in _favorites_queryset(user)]
+    return [_add_favorite_card_fields(p) for p in pokemons]
+
+def _favorites_page(user, cursor, page_size):
+    """One keyset page of ``user``'s favorites, newest first: ``(pokemons, next_cursor)``.
+
+    Raises ``InvalidCursor`` for a bad ``cursor``.
+    """
+    if not get_favorite_ids(user):
+        return [], None
+    favs, next_cursor = keyset_page(_favorites_queryset(user), FAVORITES_ORDERING, cursor, page_size)
+    return [_add_favorite_card_fields(fav.pokemon) for fav in favs], next_cursor
+
 @login_required
 def favorites_view(request):
-    user_favs = Favorite.objects.filter(user=request.user).select_related('pokemon')
-    pokemons = [fav.pokemon for fav in user_favs]
-    
+    try:
+        page_size = parse_page_size(request.GET.get('page_size'), FAVORITES_PAGE_SIZE)
+        pokemons, next_cursor = _favorites_page(request.user, request.GET.get('cursor'), page_size)
+    except ValueError:
+        return redirect('PokeApp:favorites')
+    return render(request, 'PokeApp/favorites.html', {'pokemons': pokemons, 'next_cursor': next_cursor})
+
+# JSON pages of the favorites list for infinite scroll
+@login_required
+def api_favorites(request):
+    try:
+        page_size = parse_page_size(request.GET.get('page_size'), FAVORITES_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid page_size'}, status=400)
+    try:
+        pokemons, next_cursor = _favorites_page(request.user, request.GET.get('cursor'), page_size)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    results = [
+        {
+            'id': p.id,
+            'name': p.name,
+            'slug': p.slug,
+            'image_url': p.image_url,
+            'image_src': p.image['src'],
+            'image_srcset': p.image['srcset'],
+            'image_webp_srcset': p.image['webp_srcset'],
+            'type1': p.type1,
+            'type2': p.type2,
+            'bg_color1': p.bg_color1,
+            'bg_color2': p.bg_color2,
+            'detail_url': reverse('PokeApp:pokemon_detail', args=[p.slug]),
+        }
+        for p in pokemons
+    ]
+    return JsonResponse({'results': results, 'next': next_cursor})
+
+def _parse_team_ids(values):
+    """Pokémon ids from ``?ids=1,2&ids=3`` style parameters, in order and without repeats."""
+    ids = []
+    for value in values:
+        for part in value.split(','):
+            if part.strip():
+                try:
+                    pokemon_id = int(part)
+                except ValueError:
+                    raise ValueError("ids must be integers") from None
+                if pokemon_id not in ids:
+                    ids.append(pokemon_id)
+    return ids
+
+def _type_badges(types):
+    return [
+        {'name': t.capitalize(), 'bg_color': TYPE_BG_COLORS.get(t.capitalize(), "bg-gray-500")}
+        for t in types
+    ]
+
+@login_required
+def team_view(request):
+    from . import matchups
+
+    pokemons = _favorite_pokemons(request.user)
+    try:
+        selected_ids = _parse_team_ids(request.GET.getlist('ids'))[:matchups.TEAM_SIZE]
+    except ValueError:
+        selected_ids = []
+    by_id = {p.id: p for p in pokemons}
+    team = [by_id[pokemon_id] for pokemon_id in selected_ids if pokemon_id in by_id]
+    bench = [p for p in pokemons if p.id not in selected_ids]
     for p in pokemons:
-        t1 = (p.type1 or "").capitalize()
-        t2 = (p.type2 or "").capitalize() if p.type2 else None
-        p.color1 = "text-gray-600"  # Default text color
-        p.color2 = "text-gray-600" if t2 else None
-        p.bg_color1 = TYPE_BG_COLORS.get(t1, "bg-gray-500")
-        p.bg_color2 = TYPE_BG_COLORS.get(t2, "bg-gray-500") if t2 else None
-    
-    return render(request, 'PokeApp/favorites.html', {'pokemons': pokemons})
+        p.selected = p.id in selected_ids
+
+    def codes(members):
+        return ([matchups.type_code(p.type1) for p in members],
+                [matchups.type_code(p.type2) for p in members])
+
+    analysis = matchups.analyze_team(*codes(team)) if team else None
+    if analysis:
+        for key in ('covered', 'missing'):
+            analysis['offense'][key] = _type_badges(analysis['offense'][key])
+        analysis['open_to'] = _type_badges(analysis['open_to'])
+        for row in analysis['defense']:
+            row['badge'] = _type_badges([row['type']])[0]
+    suggestions = []
+    for members, score in matchups.suggest_completions(*codes(team), *codes(bench), limit=TEAM_SUGGESTIONS):
+        added = [bench[i] for i in members]
+        suggestions.append({
+            'pokemons': added,
+            'score': score,
+            'ids': ','.join(str(p.id) for p in team + added),
+        })
+
+    return render(request, 'PokeApp/team.html', {
+        'pokemons': pokemons,
+        'team': team,
+        'analysis': analysis,
+        'suggestions': suggestions,
+        'max_score': 2 * matchups.TYPE_COUNT,
+    })
+
+def api_leaderboard(request):
+    try:
+        limit = max(1, min(int(request.GET.get('limit', leaderboard.DEFAULT_LIMIT)), leaderboard.LEADERBOARD_SIZE))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid limit'}, status=400)
+    # Served from the worker's in-memory copy of the top rows; favorites are never counted here
+    results = [
+        {**row, 'type1': (row['type1'] or "").capitalize(),
+         'type2': row['type2'].capitalize() if row['type2'] else None}
+        for row in leaderboard.top_favorited(limit)
+    ]
+    return JsonResponse({'results': results})
+
+def api_type_stats(request):
+    from . import analytics
+
+    # Served from the cache; only the first request after a data change recomputes
+    stats = analytics.get_type_stats()
+    return JsonResponse({**stats, 'stale': stats['version'] != dataset.get_version()})
+
+def _team_members(snapshot, rows):
+    members = []
+    for row in rows:
+        type1, type2 = snapshot.type_names(row)
+        members.append({
+            'id': int(snapshot.ids[row]),
+            'name': snapshot.names[row],
+            'slug': snapshot.slugs[row],
+            'type1': type1.capitalize(),
+            'type2': type2.capitalize() if type2 else None,
+        })
+    return members
+
+def _team_rows(request, snapshot, maximum):
+    ids = _parse_team_ids(request.GET.getlist('ids'))
+    if len(ids) > maximum:
+        raise ValueError(f"A team has at most {maximum} Pokémon")
+    rows = [snapshot.row(pokemon_id) for pokemon_id in ids]
+    if None in rows:
+        raise ValueError("Unknown Pokémon id")
+    return rows
+
+def api_team_coverage(request):
+    from . import analytics, matchups
+
+    snapshot = analytics.get_snapshot()
+    try:
+        rows = _team_rows(request, snapshot, matchups.TEAM_SIZE)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    analysis = matchups.analyze_team(snapshot.type1[rows], snapshot.type2[rows])
+    return JsonResponse({'team': _team_members(snapshot, rows), **analysis})
+
+@login_required
+def api_team_suggestions(request):
+    from . import analytics, matchups
+
+    snapshot = analytics.get_snapshot()
+    try:
+        rows = _team_rows(request, snapshot, matchups.TEAM_SIZE - 1)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    try:
+        limit = max(1, min(int(request.GET.get('limit', TEAM_SUGGESTIONS)), MAX_TEAM_SUGGESTIONS))
+        slots = int(request.GET['slots']) if request.GET.get('slots') else None
+    except ValueError:
+        return JsonResponse({'error': "slots and limit must be integers"}, status=400)
+    # Candidates are the user's favorites, with types read from the stat snapshot
+    bench = [row for row in (snapshot.row(i) for i in get_favorite_ids(request.user))
+             if row is not None and row not in rows]
+    suggestions = matchups.suggest_completions(
+        snapshot.type1[rows], snapshot.type2[rows],
+        snapshot.type1[bench], snapshot.type2[bench], slots=slots, limit=limit,
+    )
+    return JsonResponse({
+        'team': _team_members(snapshot, rows),
+        'suggestions': [
+            {'pokemons': _team_members(snapshot, [bench[i] for i in members]), 'score': score}
+            for members, score in suggestions
+        ],
+    })
+
+# Neighbours shown in the "similar stat profiles" strip on the detail page
+SIMILAR_STRIP_SIZE = 6
 
 def pokemon_detail(request, slug):
     pokemon = get_object_or_404(models.Pokemon, slug=slug)
@@ -208,78 +506,37 @@ def pokemon_detail(request, slug):
     pokemon.bg_color1 = TYPE_BG_COLORS.get(pokemon.type1.capitalize(), "bg-gray-500")
     pokemon.bg_color2 = TYPE_BG_COLORS.get(pokemon.type2.capitalize(), "bg-gray-500") if pokemon.type2 else None
 
-    # Get chart colors based on primary type
-    primary_type = pokemon.type1.capitalize()
-    chart_color = CHART_COLORS.get(primary_type, "#6b7280")  # Default to gray if type not found
-    
-    # Get secondary type color if Pokémon has dual types
-    secondary_chart_color = None
-    if pokemon.type2:
-        secondary_type = pokemon.type2.capitalize()
-        secondary_chart_color = CHART_COLORS.get(secondary_type, "#6b7280")
-
-    # Prepare stats data
-    stats = {
-        'stat': ['HP', 'Attack', 'Defense', 'Sp. Atk', 'Sp. Def', 'Speed'],
-        'value': [pokemon.hp, pokemon.attack, pokemon.defense, pokemon.sp_attack, pokemon.sp_defense, pokemon.speed]
-    }
-    df = pd.DataFrame(stats)
-
-    # Generate Radar Chart with type color
-    categories = df['stat'].tolist()
-    values = df['value'].tolist()
-    values += values[:1]
-
-    angles = np.linspace(0, 2*np.pi, len(categories), endpoint=False).tolist()
-    angles += angles[:1]
-
-    fig, ax = plt.subplots(figsize=(5,5), subplot_kw=dict(polar=True))
-    
-    # Use gradient effect for dual-type Pokémon
-    if secondary_chart_color:
-        ax.plot(angles, values, color=chart_color, linewidth=2)
-        ax.fill(angles, values, color=chart_color, alpha=0.3)
-        # Add a subtle overlay with secondary color
-        ax.fill(angles, values, color=secondary_chart_color, alpha=0.1)
-    else:
-        ax.plot(angles, values, color=chart_color, linewidth=2)
-        ax.fill(angles, values, color=chart_color, alpha=0.25)
-    
-    ax.set_thetagrids(np.degrees(angles[:-1]), categories)
-
-    radar_path = os.path.join(settings.MEDIA_ROOT, 'pokemon_charts', f'radar_{pokemon.slug}.png')
-    os.makedirs(os.path.dirname(radar_path), exist_ok=True)
-    plt.savefig(radar_path, bbox_inches='tight')
-    plt.close()
-
-    # Generate Bar Chart with type color
-    plt.figure(figsize=(6,4))
-    
-    if secondary_chart_color:
-        # Create alternating colors for dual-type Pokémon
-        custom_palette = []
-        for i in range(len(df)):
-            if i % 2 == 0:
-                custom_palette.append(chart_color)
-            else:
-                custom_palette.append(secondary_chart_color)
-    else:
-        # Use single color for single-type Pokémon
-        custom_palette = [chart_color] * len(df)
-    
-    sns.barplot(x='stat', y='value', data=df, palette=custom_palette)
-    plt.title(f"{pokemon.name} Stats")
-    bar_path = os.path.join(settings.MEDIA_ROOT, 'pokemon_charts', f'bar_{pokemon.slug}.png')
-    plt.savefig(bar_path, bbox_inches='tight')
-    plt.close()
-
     # Prepare context for template
     context = {
         'pokemon': pokemon,
-        'radar_chart_url': f'{settings.MEDIA_URL}pokemon_charts/radar_{pokemon.slug}.png',
-        'bar_chart_url': f'{settings.MEDIA_URL}pokemon_charts/bar_{pokemon.slug}.png',
+        'pokemon_image': images.image_sources(pokemon, 'detail'),
         'color1': pokemon.color1,
         'color2': pokemon.color2
     }
 
+    # Ranked against the in-memory stat snapshot, so this costs no queries
+    from . import analytics
+    context['type_ranks'] = [
+        {
+            'type': pokemon_type.capitalize(),
+            'percent': int(percent),
+            'bg_color': TYPE_BG_COLORS.get(pokemon_type.capitalize(), "bg-gray-500"),
+        }
+        for pokemon_type, percent in analytics.get_snapshot().type_percentiles(pokemon.id)
+    ]
+    row = analytics.get_snapshot().row(pokemon.id)
+    context['similar_pokemons'] = _similar_pokemons(row, SIMILAR_STRIP_SIZE) if row is not None else []
+
+    spec = charts.chart_spec(pokemon)
+    if getattr(settings, 'POKEMON_CHART_BACKEND', 'svg') == 'svg':
+        # Inline SVG needs no files and no matplotlib state, so it is safe in threaded workers
+        context['radar_chart_svg'] = mark_safe(svgcharts.render_radar_svg(spec))
+        context['bar_chart_svg'] = mark_safe(svgcharts.render_bar_svg(spec))
+    else:
+        # PNGs are stored under a hash of their stats and colors, so they are
+        # only drawn when that combination has not been rendered before
+        charts.ensure_charts(spec)
+        context['radar_chart_url'] = charts.chart_url('radar', spec)
+        context['bar_chart_url'] = charts.chart_url('bar', spec)
+
     return render(request, 'PokeApp/pokemon_detail.html', context)
\ No newline at end of file
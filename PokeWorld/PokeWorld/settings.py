@@ -127,6 +127,52 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR,"static")]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Cache settings
+# Favorite bitmaps, the dataset version and cached aggregates must be shared by
+# every worker and management command, so a per-process cache (LocMemCache)
+# is not enough. The file cache below is shared by all processes on this host;
+# deployments spread over several hosts need Redis or Memcached instead, e.g.
+#   'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379'
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('POKEWORLD_CACHE_DIR', os.path.join(BASE_DIR, '.django-cache')),
+        # Every entry that should expire says so; the dataset version must not
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    }
+}
+
+# Each test run gets its own cache directory instead of the one above
+TEST_RUNNER = 'PokeWorld.test_runner.TestRunner'
+
 # Authentication settings
 LOGIN_REDIRECT_URL = '/'
-LOGOUT_REDIRECT_URL = '/'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = '/'
+
+# Chart settings
+# 'svg' draws the stat charts inline without matplotlib, 'png' serves cached matplotlib images
+POKEMON_CHART_BACKEND = 'svg'
+# Generated stat charts are evicted oldest-first once the directory grows past this size
+POKEMON_CHART_CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+# Favorites settings
+# How long a user's cached favorite-id bitmap lives (it is also dropped on every change)
+POKEMON_FAVORITES_CACHE_TIMEOUT = 24 * 60 * 60
+# Seconds each worker reuses its in-memory most-favorited leaderboard before re-reading it
+POKEMON_LEADERBOARD_TTL = 60
+
+# Search settings
+# Build the in-memory Pokémon search index when a WSGI/ASGI worker starts
+POKEMON_SEARCH_WARM_ON_STARTUP = True
+
+# Analytics settings
+# Build the NumPy stat snapshot when a worker starts; worth enabling with a
+# preloading server (e.g. gunicorn --preload) so forked workers share it
+POKEMON_ANALYTICS_WARM_ON_STARTUP = False
+# How long per-type statistics stay cached for one dataset version (they never go stale within it)
+POKEMON_TYPE_STATS_CACHE_TIMEOUT = 24 * 60 * 60
+
+# PokeAPI settings
+# Response cache and checkpoint of `fetch_pokemon --sync`
+POKEAPI_CACHE_DIR = os.path.join(BASE_DIR, '.pokeapi-cache')
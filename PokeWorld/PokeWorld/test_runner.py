@@ -0,0 +1,37 @@
+"""Test runner that points the shared cache at a throwaway directory.
+
+The default cache is a directory shared by every process on the host, so a
+test run would otherwise clear the development server's entries and leave
+versions and aggregates computed from test data behind for it to read.
+"""
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+CACHE_DIR_ENV = 'POKEWORLD_CACHE_DIR'
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_dir = tempfile.mkdtemp(prefix='pokeworld-test-cache-')
+        # Subprocesses started by tests load the settings again and read this
+        self._old_cache_env = os.environ.get(CACHE_DIR_ENV)
+        os.environ[CACHE_DIR_ENV] = self._cache_dir
+        self._cache_override = override_settings(CACHES={
+            **settings.CACHES, 'default': {**settings.CACHES['default'], 'LOCATION': self._cache_dir},
+        })
+        self._cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_override.disable()
+        if self._old_cache_env is None:
+            os.environ.pop(CACHE_DIR_ENV, None)
+        else:
+            os.environ[CACHE_DIR_ENV] = self._old_cache_env
+        shutil.rmtree(self._cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -14,3 +14,18 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PokeWorld.settings')
 
 application = get_wsgi_application()
+
+# Build the in-memory search index before the first request arrives
+from django.conf import settings  # noqa: E402
+
+if getattr(settings, 'POKEMON_SEARCH_WARM_ON_STARTUP', True):
+    from PokeApp.search import warm_search_index  # noqa: E402
+
+    warm_search_index()
+
+# Opt-in: loads NumPy at start-up, but with a preloading server the snapshot is
+# then built once and shared copy-on-write by every forked worker
+if getattr(settings, 'POKEMON_ANALYTICS_WARM_ON_STARTUP', False):
+    from PokeApp.analytics import warm_snapshot  # noqa: E402
+
+    warm_snapshot()
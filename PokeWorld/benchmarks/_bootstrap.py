@@ -0,0 +1,59 @@
+"""Shared setup for benchmark scripts: configure Django on a throwaway database."""
+import os
+import random
+import sys
+import tempfile
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django(temp_database=True):
+    """Configure Django; with ``temp_database`` the default DB is a fresh, migrated SQLite file.
+
+    Returns the temporary directory holding the database (or ``None``).
+    """
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PokeWorld.settings')
+
+    from django.conf import settings
+
+    workdir = None
+    if temp_database:
+        workdir = tempfile.mkdtemp(prefix='pokeworld-bench-')
+        settings.DATABASES['default']['NAME'] = os.path.join(workdir, 'bench.sqlite3')
+        settings.MEDIA_ROOT = os.path.join(workdir, 'media')
+
+    import django
+    django.setup()
+
+    if temp_database:
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+    return workdir
+
+
+def populate_pokemons(rows, batch=50_000, seed=0):
+    """Insert ``rows`` synthetic Pokémon with random types and stats, then ANALYZE."""
+    from django.db import connection, transaction
+
+    from PokeApp.constants import TYPE_COLORS
+
+    types = [t.lower() for t in TYPE_COLORS]
+    rng = random.Random(seed)
+    sql = (
+        'INSERT INTO "PokeApp_pokemon" (name, slug, type1, type2, hp, attack, defense, '
+        "sp_attack, sp_defense, speed, image_url, image_path, favorite_count) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NULL, '', 0)"
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, rows, batch):
+            cursor.executemany(sql, [
+                (f"Pokemon{i}", f"pokemon{i}", rng.choice(types),
+                 rng.choice(types) if rng.random() < 0.5 else None,
+                 *(rng.randint(5, 200) for _ in range(6)))
+                for i in range(start, min(start + batch, rows))
+            ])
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
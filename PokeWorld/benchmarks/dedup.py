@@ -0,0 +1,79 @@
+"""Time the set-based ``clean_duplicates`` on a large number of duplicates.
+
+Fills a throwaway SQLite database with ``--rows`` synthetic Pokémon, drops the
+case-insensitive name constraint and adds ``--duplicates`` upper-case copies
+of them (100,000 by default) with favorites spread over originals and copies,
+then runs a dry run and the real cleanup, counting queries for each.
+
+    python benchmarks/dedup.py --rows 50000 --duplicates 100000
+"""
+import argparse
+import time
+
+from _bootstrap import populate_pokemons, setup_django
+
+setup_django()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from PokeApp.dedup import collapse_duplicates  # noqa: E402
+from PokeApp.models import Favorite, Pokemon  # noqa: E402
+
+CASE_FUNCTIONS = ('UPPER', 'LOWER')
+
+
+def add_duplicates(rows, duplicates, users=20):
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('DROP INDEX pokemon_name_ci_unique')
+        # Names stay unique case-sensitively, so each row has at most an upper- and a lower-case copy
+        for copy, case in enumerate(CASE_FUNCTIONS):
+            cursor.execute(
+                'INSERT INTO "PokeApp_pokemon" (name, slug, type1, type2, hp, attack, defense, sp_attack, '
+                f'sp_defense, speed, image_url, image_path, favorite_count) SELECT {case}(name), '
+                f'slug || \'-copy{copy}\', type1, type2, hp, attack, defense, sp_attack, sp_defense, speed, '
+                'image_url, image_path, 0 '
+                'FROM "PokeApp_pokemon" WHERE id <= %s',
+                [max(0, min(rows, duplicates - copy * rows))],
+            )
+        for i in range(users):
+            user = User.objects.create_user(username=f"bench{i}")
+            # Favorites on every 7th row, some of them on several copies of the same Pokémon
+            cursor.execute(
+                'INSERT INTO "PokeApp_favorite" (user_id, pokemon_id, created_at) '
+                'SELECT %s, id, CURRENT_TIMESTAMP FROM "PokeApp_pokemon" WHERE id %% %s = 0',
+                [user.pk, i + 7],
+            )
+
+
+def timed(dry_run):
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        report = collapse_duplicates(dry_run=dry_run)
+        elapsed = time.perf_counter() - started
+    return report, elapsed, len(queries.captured_queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--duplicates', type=int, default=100_000)
+    args = parser.parse_args()
+    if args.duplicates > len(CASE_FUNCTIONS) * args.rows:
+        parser.error(f"--duplicates can be at most {len(CASE_FUNCTIONS)} x --rows")
+
+    populate_pokemons(args.rows)
+    add_duplicates(args.rows, args.duplicates)
+    print(f"{Pokemon.objects.count()} Pokémon, {Favorite.objects.count()} favorites\n")
+
+    for dry_run in (True, False):
+        report, elapsed, queries = timed(dry_run)
+        print(f"{'dry run' if dry_run else 'cleanup':<8} {elapsed:6.2f}s  {queries} queries  "
+              f"groups={report.groups} deleted={report.pokemons} "
+              f"moved={report.favorites_moved} merged={report.favorites_merged}")
+    print(f"\n{Pokemon.objects.count()} Pokémon, {Favorite.objects.count()} favorites left")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Measure the streaming Pokédex export on a large table.
+
+Fills a throwaway SQLite database with synthetic Pokémon (one million rows by
+default) plus some favorites, then drains ``export_chunks`` for each format
+and reports throughput and, from a second traced pass, the peak Python heap
+allocation, which should stay flat however many rows are exported.
+
+    python benchmarks/export.py --rows 1000000
+"""
+import argparse
+import time
+import tracemalloc
+
+from _bootstrap import populate_pokemons, setup_django
+
+setup_django()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+
+from PokeApp.export import export_chunks  # noqa: E402
+from PokeApp.favorites import reconcile_favorite_counts  # noqa: E402
+
+CASES = [
+    ('ndjson', False, False),
+    ('csv', False, False),
+    ('ndjson', False, True),
+    ('csv', True, False),
+]
+
+
+def add_favorites(rows, users=20):
+    with connection.cursor() as cursor:
+        for i in range(users):
+            user = User.objects.create_user(username=f"bench{i}")
+            cursor.execute(
+                'INSERT INTO "PokeApp_favorite" (user_id, pokemon_id, created_at) '
+                'SELECT %s, id, CURRENT_TIMESTAMP FROM "PokeApp_pokemon" WHERE id %% %s = 0',
+                [user.pk, i + 7],
+            )
+    # Raw inserts bypass the counters the export reads
+    reconcile_favorite_counts()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    populate_pokemons(args.rows)
+    add_favorites(args.rows)
+    print(f"inserted {args.rows} rows in {time.perf_counter() - started:.1f}s\n")
+
+    for fmt, with_favorites, compress in CASES:
+        started = time.perf_counter()
+        size = sum(len(chunk) for chunk in export_chunks(fmt, with_favorites, compress))
+        elapsed = time.perf_counter() - started
+        # Second pass under tracemalloc, which would otherwise distort the timing
+        tracemalloc.start()
+        for _ in export_chunks(fmt, with_favorites, compress):
+            pass
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        label = fmt + (' +favorites' if with_favorites else '') + (' gzip' if compress else '')
+        print(f"{label:<22} {args.rows / elapsed:10,.0f} rows/s   {size / 2**20:8.1f} MiB   "
+              f"peak heap {peak / 2**20:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Time filtered and sorted /api/pokemons/ queries on a large table.
+
+Fills a throwaway SQLite database with synthetic Pokémon (one million rows by
+default), then runs the planner from ``PokeApp.query`` for typical filter/sort
+combinations, including a deep keyset page, and prints the latency and the
+SQLite query plan of each one.
+
+    python benchmarks/filters.py --rows 1000000
+"""
+import argparse
+import statistics
+import time
+
+from _bootstrap import populate_pokemons, setup_django
+
+setup_django()
+
+from django.db import connection  # noqa: E402
+from django.http import QueryDict  # noqa: E402
+
+from PokeApp.pagination import keyset_page  # noqa: E402
+from PokeApp.query import plan_pokemon_query  # noqa: E402
+
+QUERIES = [
+    'type1=fire',
+    'type1=water&sort=-attack',
+    'type1=fire&sort=-total',
+    'type2=flying&sort=speed',
+    'type=dragon&speed_min=120&sort=-speed',
+    'hp_min=100&hp_max=120&sort=hp',
+    'sort=-total',
+    'total_min=600&sort=-total',
+    'attack_min=150&defense_max=40&sort=-attack',
+]
+
+
+def time_page(params, cursor=None, repeat=20):
+    queryset, ordering = plan_pokemon_query(QueryDict(params))
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        page, next_cursor = keyset_page(queryset, ordering, cursor, 20)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), page, next_cursor, queryset.order_by(*ordering)[:21]
+
+
+def query_plan(queryset):
+    sql, sql_params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', sql_params)
+        return '; '.join(row[-1] for row in cursor.fetchall())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    populate_pokemons(args.rows)
+    print(f"inserted {args.rows} rows in {time.perf_counter() - started:.1f}s\n")
+
+    for params in QUERIES:
+        ms, page, _, queryset = time_page(params)
+        print(f"{params:<45} {ms:8.2f} ms  {len(page)} rows")
+        print(f"    plan: {query_plan(queryset)}")
+
+    # A page deep into the default ordering costs the same as the first one
+    queryset, ordering = plan_pokemon_query(QueryDict(''))
+    _, deep_cursor = keyset_page(queryset.filter(id__gte=args.rows // 2), ordering, None, 20)
+    ms, page, _, _ = time_page('', cursor=deep_cursor)
+    print(f"{'page starting at id ' + str(page[0].id):<45} {ms:8.2f} ms  {len(page)} rows")
+
+
+if __name__ == '__main__':
+    main()
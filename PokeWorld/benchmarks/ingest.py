@@ -0,0 +1,79 @@
+"""Compare Pokémon ingest paths on a throwaway database.
+
+Writes ``--records`` synthetic parsed records (10,000 by default) twice per
+path, first into an empty table and then again over the existing rows, using
+
+* ``update_or_create`` per record, as ``fetch_pokemon`` used to, and
+* ``ingest.upsert_pokemons``: batched ``INSERT ... ON CONFLICT`` in one transaction,
+
+and reports rows per second for each.
+
+    python benchmarks/ingest.py --records 10000
+"""
+import argparse
+import random
+import time
+
+from _bootstrap import setup_django
+
+setup_django()
+
+from django.db import connection  # noqa: E402
+from django.utils.text import slugify  # noqa: E402
+
+from PokeApp import ingest  # noqa: E402
+from PokeApp.constants import STAT_FIELDS, TYPE_COLORS  # noqa: E402
+from PokeApp.models import Pokemon  # noqa: E402
+
+
+def make_records(count, seed):
+    types = [t.lower() for t in TYPE_COLORS]
+    rng = random.Random(seed)
+    return [
+        {
+            'name': f"Pokemon {i}", 'type1': rng.choice(types),
+            'type2': rng.choice(types) if rng.random() < 0.5 else None,
+            **{field: rng.randint(5, 200) for field in STAT_FIELDS},
+            'image_url': f"https://img.example/{i}.png",
+        }
+        for i in range(count)
+    ]
+
+
+def update_or_create(records):
+    for record in records:
+        Pokemon.objects.update_or_create(slug=slugify(record['name']), defaults=record)
+
+
+def upsert(records):
+    ingest.upsert_pokemons(records)
+
+
+def clear():
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {connection.ops.quote_name(Pokemon._meta.db_table)}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=10_000)
+    args = parser.parse_args()
+
+    first, second = make_records(args.records, seed=0), make_records(args.records, seed=1)
+    results = {}
+    for label, write in (('update_or_create', update_or_create), ('bulk upsert', upsert)):
+        clear()
+        for phase, records in (('insert', first), ('update', second)):
+            started = time.perf_counter()
+            write(records)
+            elapsed = time.perf_counter() - started
+            assert Pokemon.objects.count() == args.records
+            results[label, phase] = args.records / elapsed
+            print(f"{label:<17} {phase:<7} {results[label, phase]:10,.0f} rows/s   {elapsed:6.2f}s")
+
+    for phase in ('insert', 'update'):
+        print(f"speed-up ({phase}): {results['bulk upsert', phase] / results['update_or_create', phase]:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Time team-completion searches over random favorite pools.
+
+Draws random type pairs for a pool of favorites and reports how long
+``suggest_completions`` takes to score every way of filling the open slots
+of a one- or three-member team.
+
+    python benchmarks/matchups.py --favorites 60
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from math import comb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PokeWorld.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+
+from PokeApp import matchups  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--favorites', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    type1 = rng.integers(0, matchups.TYPE_COUNT, args.favorites)
+    type2 = np.where(rng.random(args.favorites) < 0.5, rng.integers(0, matchups.TYPE_COUNT, args.favorites), -1)
+
+    for team_size in (1, 3, 5):
+        team = rng.integers(0, matchups.TYPE_COUNT, team_size)
+        slots = matchups.TEAM_SIZE - team_size
+        distinct = len({tuple(sorted(pair)) for pair in zip(type1.tolist(), type2.tolist())})
+        teams = min(comb(distinct, slots), matchups.MAX_CANDIDATE_TEAMS)
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            matchups.suggest_completions(team, [-1] * team_size, type1, type2)
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"  {slots} open slots, ~{teams} candidate teams: median {statistics.median(timings):.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
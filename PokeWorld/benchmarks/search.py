@@ -0,0 +1,76 @@
+"""Time typeahead queries against the in-memory search index.
+
+Builds a ``SearchIndex`` from synthetic Pokémon (real-looking names with
+numbered variants) without touching the database and reports per-query
+latency for prefix, type and misspelled queries.
+
+    python benchmarks/search.py --entries 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PokeWorld.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from PokeApp.constants import TYPE_COLORS  # noqa: E402
+from PokeApp.search import SearchIndex  # noqa: E402
+
+SYLLABLES = ['pi', 'ka', 'chu', 'bul', 'ba', 'saur', 'char', 'man', 'der', 'squir', 'tle',
+             'ee', 'vee', 'mew', 'two', 'gen', 'gar', 'dra', 'go', 'nite', 'lu', 'cario',
+             'snor', 'lax', 'gy', 'ara', 'dos', 'zu', 'bat', 'ra', 'ta', 'ta']
+
+QUERIES = {
+    'prefix': ['pik', 'char', 'mewtwo', 'bulbasaur-12', 'dra'],
+    'type': ['fire', 'psy', 'ghost'],
+    'fuzzy': ['pikachoo', 'charmandr', 'bulbsaur', 'gyarados', 'snorlx'],
+}
+
+
+def synthetic_pokemons(count, seed=0):
+    rng = random.Random(seed)
+    types = [t.lower() for t in TYPE_COLORS]
+    bases = sorted({''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(count // 20)})
+    bases += ['pikachu', 'charmander', 'bulbasaur', 'gyarados', 'snorlax', 'mewtwo', 'dragonite']
+    for i in range(count):
+        name = f"{bases[i % len(bases)]}-{i // len(bases)}" if i >= len(bases) else bases[i]
+        yield SimpleNamespace(
+            id=i + 1, name=name, slug=name, type1=rng.choice(types),
+            type2=rng.choice(types + [None] * 18), image_url=None,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    index = SearchIndex()
+    started = time.perf_counter()
+    index.build(synthetic_pokemons(args.entries))
+    print(f"built index of {len(index)} entries in {time.perf_counter() - started:.2f}s")
+
+    for kind, queries in QUERIES.items():
+        timings = []
+        for _ in range(args.repeat):
+            for query in queries:
+                started = time.perf_counter()
+                index.search(query)
+                timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        print(f"  {kind:<6} median {statistics.median(timings):.3f} ms   "
+              f"p95 {timings[int(len(timings) * 0.95)]:.3f} ms")
+    print("sample:", [entry.name for _, entry in index.search('pikachoo', 5)])
+
+
+if __name__ == '__main__':
+    main()
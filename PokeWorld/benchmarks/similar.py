@@ -0,0 +1,86 @@
+"""Time "similar Pokémon" lookups against a synthetic snapshot.
+
+Builds a ``StatSnapshot`` of random stat vectors without touching the
+database, then reports how long the similarity index takes to build and how
+long uncached lookups take (raw, normalised and type-filtered) next to a
+brute-force pairwise scan of the same data.
+
+    python benchmarks/similar.py --entries 100000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PokeWorld.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+
+from PokeApp.analytics import TYPES, StatSnapshot  # noqa: E402
+from PokeApp.similarity import SimilarityIndex  # noqa: E402
+
+
+def synthetic_snapshot(count, seed=0):
+    rng = np.random.default_rng(seed)
+    stats = rng.integers(5, 255, size=(count, 6))
+    type1 = rng.integers(0, len(TYPES), size=count)
+    type2 = np.where(rng.random(count) < 0.5, rng.integers(0, len(TYPES), size=count), -1)
+    names = [f"pokemon-{i}" for i in range(count)]
+    return StatSnapshot(0, np.arange(1, count + 1), names, names, [None] * count, stats, type1, type2)
+
+
+def timed(fn, rows):
+    timings = []
+    for row in rows:
+        started = time.perf_counter()
+        fn(int(row))
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('-k', type=int, default=6)
+    args = parser.parse_args()
+
+    snapshot = synthetic_snapshot(args.entries)
+    started = time.perf_counter()
+    index = SimilarityIndex(snapshot)
+    print(f"built similarity index over {len(snapshot)} Pokémon in {time.perf_counter() - started:.2f}s")
+
+    rows = np.random.default_rng(1).integers(0, len(snapshot), size=args.queries)
+    stats = snapshot.stats.astype(np.float64)
+
+    def brute_force(row):
+        diff = stats - stats[row]
+        distances = np.einsum('ij,ij->i', diff, diff)
+        distances[row] = np.inf
+        return np.argpartition(distances, args.k)[:args.k]
+
+    cases = {
+        'raw': lambda row: index.neighbours(row, args.k),
+        'normalised': lambda row: index.neighbours(row, args.k, normalize=True),
+        'fire only': lambda row: index.neighbours(row, args.k, pokemon_type='fire'),
+        'brute force': brute_force,
+    }
+    # Build the lazily created trees before timing lookups
+    index.neighbours(0, args.k, normalize=True)
+    index.neighbours(0, args.k, pokemon_type='fire')
+    for name, fn in cases.items():
+        median, p95 = timed(fn, rows)
+        print(f"  {name:<12} median {median:.3f} ms   p95 {p95:.3f} ms")
+    median, p95 = timed(cases['raw'], rows)
+    print(f"  {'cached':<12} median {median:.3f} ms   p95 {p95:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Measure what a fresh worker pays before it can serve its first request.
+
+Each sample starts a new interpreter, sets up Django, loads the WSGI
+application and URLconf (which imports every view module) and reports the
+wall time, peak RSS and which heavy data-science modules ended up imported.
+
+    python benchmarks/startup.py --runs 5 --max-import-ms 1500 --max-rss-mb 120
+
+Exits non-zero when a threshold is exceeded or a heavy module is loaded, so it
+can guard worker start-up in CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('pandas', 'matplotlib', 'seaborn', 'numpy')
+
+WORKER_SCRIPT = """
+import json, os, resource, sys, time
+started = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PokeWorld.settings')
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+elapsed_ms = (time.perf_counter() - started) * 1000
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == 'darwin':
+    rss_kb //= 1024
+print(json.dumps({
+    'import_ms': elapsed_ms,
+    'rss_mb': rss_kb / 1024,
+    'heavy': sorted(m for m in %r if m in sys.modules),
+}))
+""" % (HEAVY_MODULES,)
+
+
+def sample():
+    result = subprocess.run(
+        [sys.executable, '-c', WORKER_SCRIPT],
+        cwd=PROJECT_DIR, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-import-ms', type=float, default=None)
+    parser.add_argument('--max-rss-mb', type=float, default=None)
+    args = parser.parse_args()
+
+    samples = [sample() for _ in range(args.runs)]
+    import_ms = statistics.median(s['import_ms'] for s in samples)
+    rss_mb = statistics.median(s['rss_mb'] for s in samples)
+    heavy = sorted({m for s in samples for m in s['heavy']})
+
+    print(f"worker start-up over {args.runs} runs:")
+    print(f"  import time (median): {import_ms:.1f} ms")
+    print(f"  peak RSS (median):    {rss_mb:.1f} MB")
+    print(f"  heavy modules loaded: {', '.join(heavy) or 'none'}")
+
+    failed = bool(heavy)
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        print(f"FAIL: import time above {args.max_import_ms} ms")
+        failed = True
+    if args.max_rss_mb is not None and rss_mb > args.max_rss_mb:
+        print(f"FAIL: RSS above {args.max_rss_mb} MB")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())